@@ -0,0 +1,4 @@
+"""Offline benchmarks for the voice memo analyzer.
+
+Run with python -m benchmarks.run; see benchmarks/run.py for the options.
+"""
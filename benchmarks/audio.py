@@ -0,0 +1,60 @@
+"""Synthesize speech-like recordings with ffmpeg's lavfi sources.
+
+The recordings are not intelligible speech. They have the properties the
+pipeline reacts to: a voice-band tone modulated at syllable rate, short
+pauses between phrases, longer pauses between sentences that silence
+detection can split on, and a low noise floor. Each one is encoded as AAC
+in an m4a container, like a Voice Memo. Every recording gets its own
+pitch and noise seed, so no two share a content hash.
+"""
+
+import subprocess
+from pathlib import Path
+
+def synthesize_memo(path: Path, seconds: float, seed: int = 0) -> Path:
+    """Write a speech-like m4a recording of the given length.
+    
+    Args:
+        path: Where to write the recording
+        seconds: Length of the recording
+        seed: Varies the pitch, phrase timing and noise
+    
+    Returns:
+        Path: path
+    
+    Raises:
+        subprocess.CalledProcessError: If ffmpeg fails
+    """
+    pitch = 110 + (seed * 37) % 140
+    phrase = 2.5 + (seed % 5) * 0.3
+    # Talk for `phrase` seconds, pause 0.6s; every fourth pause is 1.5s long
+    cycle = phrase + 0.6
+    sentence = 4 * cycle + 0.9
+    gate = (
+        f"if(lt(mod(t,{sentence:.2f}),{4 * cycle:.2f}),"
+        f"lt(mod(mod(t,{sentence:.2f}),{cycle:.2f}),{phrase:.2f}),0)"
+    )
+    subprocess.run([
+        'ffmpeg', '-y', '-v', 'error',
+        '-f', 'lavfi', '-i', f"sine=frequency={pitch}:sample_rate=16000:duration={seconds}",
+        '-f', 'lavfi', '-i', f"anoisesrc=color=pink:amplitude=0.004:seed={seed}:sample_rate=16000:duration={seconds}",
+        '-filter_complex',
+        f"[0:a]tremolo=f=4:d=0.8,volume='0.5*{gate}':eval=frame[voice];"
+        "[voice][1:a]amix=inputs=2:duration=first:normalize=0",
+        '-ac', '1', '-c:a', 'aac', '-b:a', '64k', str(path)
+    ], check=True, capture_output=True, text=True)
+    return Path(path)
+
+def synthesize_memos(directory: Path, durations: list[float], copies: int = 1) -> list[Path]:
+    """Write copies recordings of each duration into directory.
+    
+    Returns:
+        list: The recordings, named by duration and copy number
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for duration in durations:
+        for copy in range(copies):
+            seed = len(paths)
+            paths.append(synthesize_memo(directory / f"memo_{int(duration)}s_{copy}.m4a", duration, seed))
+    return paths
@@ -0,0 +1,381 @@
+"""A local stand-in for the OpenAI transcription, chat and batch endpoints.
+
+FakeOpenAIServer answers the requests the analyzer makes with responses
+of the right shape. It simulates the costs that matter for throughput:
+a base latency per request with jitter, a per-megabyte upload cost for
+audio, the delay between streamed tokens, and randomly injected 429 rate
+limit errors. Chat usage reports cached prompt tokens the way the provider's
+prompt cache does: prefixes of 1024 tokens and up, in 128-token steps, that
+an earlier request already sent. Batch jobs (file upload, batch create and
+retrieve, output download) complete batch_seconds after they are created.
+Point a client at it with OPENAI_BASE_URL=server.base_url.
+
+    with FakeOpenAIServer(latency=0.3, rate_limit_rate=0.05) as server:
+        client = OpenAI(base_url=server.base_url, api_key="fake")
+        ...
+        print(server.stats())
+"""
+
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TIMESTAMP = re.compile(r"^\[?(\d+:\d\d(?::\d\d)?)\]?\s", re.MULTILINE)
+CACHE_MIN_TOKENS = 1024  # Shortest prompt prefix that is cached
+CACHE_INCREMENT_TOKENS = 128  # Cached prefixes grow in steps of this many tokens
+OBJECT_ID = re.compile(r"/(file-|batch_)[\w-]+")  # Folded into {id} in the stats endpoint names
+
+class FakeOpenAIServer:
+    """Serves the transcription, chat completion and batch endpoints with simulated latency.
+    
+    Transcriptions are verbose_json responses with one segment (and a few
+    words) per segment_seconds of audio. The audio length is estimated from
+    the upload size at bytes_per_audio_second, which matches the 'speech'
+    encoding profile by default. Chat completions return an analysis JSON
+    object, streamed as server-sent events when the request asks for it.
+    Batch jobs answer every line of their input file the way the chat
+    endpoint would, failing a batch_failure_rate fraction of the lines.
+    """
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.05, upload_seconds_per_mb: float = 0.5,
+                 rate_limit_rate: float = 0.0, stream_chunk_delay: float = 0.005,
+                 bytes_per_audio_second: float = 4000, segment_seconds: float = 5.0,
+                 batch_seconds: float = 0.0, batch_failure_rate: float = 0.0,
+                 seed: int = 0, host: str = "127.0.0.1", port: int = 0):
+        """Initialize the server settings; start() begins serving.
+        
+        Args:
+            latency: Base seconds before each response starts
+            jitter: Latency varies uniformly by up to this many seconds either way
+            upload_seconds_per_mb: Extra seconds per megabyte of request body
+            rate_limit_rate: Fraction of requests answered with a 429
+            stream_chunk_delay: Seconds between streamed completion chunks
+            bytes_per_audio_second: Upload bytes per second of audio, used to
+                size transcripts
+            segment_seconds: Length of each transcript segment
+            batch_seconds: Seconds from creating a batch until it is completed
+            batch_failure_rate: Fraction of batch requests that fail
+            seed: Seed for jitter and 429 injection, so runs are repeatable
+            host: Interface to listen on
+            port: Port to listen on, or 0 for any free port
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.upload_seconds_per_mb = upload_seconds_per_mb
+        self.rate_limit_rate = rate_limit_rate
+        self.stream_chunk_delay = stream_chunk_delay
+        self.bytes_per_audio_second = bytes_per_audio_second
+        self.segment_seconds = segment_seconds
+        self.batch_seconds = batch_seconds
+        self.batch_failure_rate = batch_failure_rate
+        self.host = host
+        self.port = port
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._prefixes = set()
+        self._files = {}
+        self._batches = {}
+        self._ids = itertools.count(1)
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """The URL to pass as the client's base_url."""
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        """Start serving on a background thread."""
+        self._server = ThreadingHTTPServer((self.host, self.port), _handler(self))
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def stats(self) -> dict:
+        """Return per-endpoint counts of requests, 429s and bytes received."""
+        with self._lock:
+            return {endpoint: dict(counts) for endpoint, counts in self._stats.items()}
+
+    def reset_stats(self) -> None:
+        """Clear the counters returned by stats() and the simulated prompt cache."""
+        with self._lock:
+            self._stats = {}
+            self._prefixes = set()
+
+    def _record(self, endpoint: str, body_bytes: int, rate_limited: bool) -> None:
+        """Count one request."""
+        with self._lock:
+            counts = self._stats.setdefault(endpoint, {'requests': 0, 'rate_limited': 0, 'bytes_received': 0})
+            counts['requests'] += 1
+            counts['rate_limited'] += rate_limited
+            counts['bytes_received'] += body_bytes
+
+    def _draw(self) -> tuple[float, bool]:
+        """Pick a request's latency and whether it is rate limited."""
+        with self._lock:
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+            return max(delay, 0.0), self._random.random() < self.rate_limit_rate
+
+    def transcription(self, body_bytes: int) -> dict:
+        """Build a verbose_json transcription for an upload of body_bytes."""
+        duration = max(body_bytes / self.bytes_per_audio_second, 1.0)
+        segments, words, texts = [], [], []
+        start = 0.0
+        while start < duration:
+            end = min(start + self.segment_seconds, duration)
+            text = f"Segment {len(segments) + 1} covers the plan, the budget and next steps."
+            segments.append({'id': len(segments), 'start': start, 'end': end, 'text': text})
+            step = (end - start) / 4
+            words.extend(
+                {'word': word, 'start': start + index * step, 'end': start + (index + 1) * step}
+                for index, word in enumerate(text.split()[:4])
+            )
+            texts.append(text)
+            start = end
+        return {'text': " ".join(texts), 'language': "english", 'duration': duration,
+                'segments': segments, 'words': words}
+
+    def usage(self, request: dict, completion: str) -> dict:
+        """Estimate a completion's token usage at four characters per token.
+        
+        The longest prefix of the prompt seen in an earlier request counts
+        as cached; every eligible prefix of this one is remembered.
+        """
+        prompt = "".join(str(message.get('content', '')) for message in request.get('messages', []))
+        prompt_tokens, completion_tokens = len(prompt) // 4, len(completion) // 4
+        cached_tokens = 0
+        with self._lock:
+            for tokens in range(CACHE_MIN_TOKENS, prompt_tokens + 1, CACHE_INCREMENT_TOKENS):
+                prefix = hash(prompt[:tokens * 4])
+                if prefix in self._prefixes:
+                    cached_tokens = tokens
+                self._prefixes.add(prefix)
+        return {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+                'prompt_tokens_details': {'cached_tokens': cached_tokens}}
+
+    def completion(self, request: dict) -> dict:
+        """Build the (non-streamed) chat completion response for request."""
+        content = self.analysis(request)
+        return {
+            'id': "chatcmpl-fake", 'object': "chat.completion", 'created': int(time.time()),
+            'model': request.get('model', "gpt-4o"),
+            'choices': [{'index': 0, 'finish_reason': "stop",
+                         'message': {'role': "assistant", 'content': content}}],
+            'usage': self.usage(request, content)
+        }
+
+    def upload(self, filename: str, purpose: str, content: bytes) -> dict:
+        """Store an uploaded file and return its file object."""
+        with self._lock:
+            file_id = f"file-fake{next(self._ids)}"
+            self._files[file_id] = content
+        return {'id': file_id, 'object': "file", 'bytes': len(content), 'created_at': int(time.time()),
+                'filename': filename, 'purpose': purpose, 'status': "processed"}
+
+    def file_content(self, file_id: str) -> bytes | None:
+        """Return an uploaded or generated file's content, or None if there is no such file."""
+        with self._lock:
+            return self._files.get(file_id)
+
+    def create_batch(self, params: dict) -> dict | None:
+        """Answer every request in a batch's input file and return the batch object.
+        
+        Returns None if the input file doesn't exist.
+        """
+        content = self.file_content(params.get('input_file_id', ""))
+        if content is None:
+            return None
+        output, errors = [], []
+        for line in content.decode().splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            with self._lock:
+                failed = self._random.random() < self.batch_failure_rate
+                line_id = f"batch_req_{next(self._ids)}"
+            if failed:
+                errors.append({'id': line_id, 'custom_id': item['custom_id'], 'error': None, 'response': {
+                    'status_code': 500, 'body': {'error': {'message': "Simulated failure"}}
+                }})
+            else:
+                output.append({'id': line_id, 'custom_id': item['custom_id'], 'error': None, 'response': {
+                    'status_code': 200, 'request_id': "req_fake", 'body': self.completion(item['body'])
+                }})
+        with self._lock:
+            batch = {
+                'id': f"batch_fake{next(self._ids)}", 'object': "batch", 'endpoint': params.get('endpoint'),
+                'input_file_id': params['input_file_id'],
+                'completion_window': params.get('completion_window', "24h"),
+                'status': "in_progress", 'created_at': int(time.time()), 'metadata': params.get('metadata'),
+                'output_file_id': None, 'error_file_id': None,
+                'request_counts': {'total': len(output) + len(errors), 'completed': 0, 'failed': 0}
+            }
+            self._batches[batch['id']] = (time.monotonic(), batch, output, errors)
+        return self.batch(batch['id'])
+
+    def batch(self, batch_id: str) -> dict | None:
+        """Return a batch object, completing the batch once batch_seconds have passed."""
+        with self._lock:
+            if batch_id not in self._batches:
+                return None
+            created, batch, output, errors = self._batches[batch_id]
+            if batch['status'] == "in_progress" and time.monotonic() - created >= self.batch_seconds:
+                batch['status'] = "completed"
+                batch['completed_at'] = int(time.time())
+                batch['request_counts'] = {'total': len(output) + len(errors),
+                                           'completed': len(output), 'failed': len(errors)}
+                for field, lines in (('output_file_id', output), ('error_file_id', errors)):
+                    if lines:
+                        file_id = f"file-fake{next(self._ids)}"
+                        self._files[file_id] = "".join(json.dumps(line) + "\n" for line in lines).encode()
+                        batch[field] = file_id
+            return dict(batch)
+
+    def analysis(self, request: dict) -> str:
+        """Build the analysis JSON a chat completion returns for request."""
+        prompt = " ".join(str(message.get('content', '')) for message in request.get('messages', []))
+        timestamps = TIMESTAMP.findall(prompt)[:3] or ["00:00"]
+        return json.dumps({
+            'action_items': ["Send the revised plan", "Confirm the budget"],
+            'overall_summary': "The group reviewed the plan, agreed on the budget and set next steps.",
+            'key_moments': [
+                {'timestamp': timestamp, 'summary': "Discussed the plan"} for timestamp in timestamps
+            ]
+        }, indent=2)
+
+def _handler(server: FakeOpenAIServer) -> type:
+    """Build the request handler class bound to server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            endpoint = self.path.split("?", 1)[0]
+            delay, rate_limited = server._draw()
+            delay += len(body) / 1_000_000 * server.upload_seconds_per_mb
+            server._record(OBJECT_ID.sub("/{id}", endpoint), len(body), rate_limited)
+            time.sleep(delay)
+            
+            if rate_limited:
+                self._send_json(429, {'error': {
+                    'message': "Rate limit reached (simulated)", 'type': "rate_limit_error",
+                    'code': "rate_limit_exceeded"
+                }}, {'retry-after-ms': "50", 'retry-after': "0.05"})
+            elif endpoint == "/v1/audio/transcriptions":
+                self._send_json(200, server.transcription(len(body)))
+            elif endpoint == "/v1/chat/completions":
+                self._chat(json.loads(body or b"{}"))
+            elif endpoint == "/v1/files":
+                fields = self._form(body)
+                filename, content = fields.get('file', ("upload", b""))
+                purpose = fields.get('purpose', (None, b""))[1].decode()
+                self._send_json(200, server.upload(filename, purpose, content))
+            elif endpoint == "/v1/batches":
+                self._send_found(server.create_batch(json.loads(body or b"{}")), "input file")
+            else:
+                self._send_json(404, {'error': {'message': f"Unknown endpoint {endpoint}"}})
+
+        def do_GET(self):
+            endpoint = self.path.split("?", 1)[0]
+            delay, _ = server._draw()
+            server._record(OBJECT_ID.sub("/{id}", endpoint), 0, False)
+            time.sleep(delay)
+            
+            parts = endpoint.strip("/").split("/")
+            if parts[:2] == ["v1", "batches"] and len(parts) == 3:
+                self._send_found(server.batch(parts[2]), "batch")
+            elif parts[:2] == ["v1", "files"] and parts[3:] == ["content"]:
+                content = server.file_content(parts[2])
+                if content is None:
+                    self._send_found(None, "file")
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+            else:
+                self._send_json(404, {'error': {'message': f"Unknown endpoint {endpoint}"}})
+
+        def _form(self, body: bytes) -> dict:
+            """Parse a multipart/form-data body into {name: (filename, content)}."""
+            header = f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode()
+            message = BytesParser(policy=HTTP).parsebytes(header + body)
+            return {
+                part.get_param('name', header='content-disposition'): (part.get_filename(), part.get_payload(decode=True))
+                for part in message.iter_parts()
+            }
+
+        def _send_found(self, data: dict | None, kind: str):
+            if data is None:
+                self._send_json(404, {'error': {'message': f"No such {kind}"}})
+            else:
+                self._send_json(200, data)
+
+        def _chat(self, request: dict):
+            if not request.get('stream'):
+                self._send_json(200, server.completion(request))
+                return
+            content = server.analysis(request)
+            model = request.get('model', "gpt-4o")
+            
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            chunk = {'id': "chatcmpl-fake", 'object': "chat.completion.chunk",
+                     'created': int(time.time()), 'model': model}
+            for start in range(0, len(content), 16):
+                self._event({**chunk, 'choices': [
+                    {'index': 0, 'delta': {'content': content[start:start + 16]}, 'finish_reason': None}
+                ]})
+                time.sleep(server.stream_chunk_delay)
+            self._event({**chunk, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': "stop"}]})
+            if (request.get('stream_options') or {}).get('include_usage'):
+                self._event({**chunk, 'choices': [], 'usage': server.usage(request, content)})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+        def _event(self, data: dict):
+            self.wfile.write(f"data: {json.dumps(data)}\n\n".encode())
+            self.wfile.flush()
+
+        def _send_json(self, status: int, data: dict, headers: dict | None = None):
+            payload = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+    
+    return Handler
@@ -0,0 +1,271 @@
+"""Run the offline end-to-end benchmark and save the results as JSON.
+
+Synthesizes recordings, starts a FakeOpenAIServer and processes the
+recordings through each scenario with a fresh, empty data directory:
+
+    single  VoiceMemoAnalyzer.analyze_audio, one memo after another
+    batch   BatchPipeline (the threaded --batch path)
+    async   run_async_batch (--batch --async)
+
+Each scenario reports wall time, throughput in memos and audio seconds per
+second, end-to-end latency percentiles per memo, per-stage latency
+percentiles from the instrumentation spans, and the requests the fake
+server saw. Results are written to benchmarks/results/<commit>.json by
+default; --compare prints the change against an earlier results file.
+
+Usage:
+    python -m benchmarks.run --durations 60,600,1800 --copies 2 \\
+        --latency 0.4 --rate-limit-rate 0.05 --compare benchmarks/results/abc1234.json
+
+Needs ffmpeg and ffprobe on PATH. No OpenAI account or network is used.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .audio import synthesize_memos
+from .fake_openai import FakeOpenAIServer
+
+ROOT_DIR = Path(__file__).parent.parent
+RESULTS_DIR = Path(__file__).parent / "results"
+SCENARIOS = ("single", "batch", "async")
+
+# Module-level path settings that are pointed at a scratch directory per scenario
+DATA_SETTINGS = {
+    'DATA_DIR': "", 'MP3_DIR': "mp3_conversions", 'TRANSCRIPT_DIR': "transcripts",
+    'CACHE_DIR': "cache", 'RESULTS_DIR': "results", 'SEARCH_INDEX_PATH': "search.sqlite3",
+    'SEMANTIC_INDEX_DIR': "semantic", 'FINGERPRINT_INDEX_PATH': "fingerprints.sqlite3",
+    'WATCH_QUEUE_PATH': "watch_queue.sqlite3"
+}
+
+def percentiles(values: list[float]) -> dict:
+    """Summarize latencies as count, mean, p50, p90, p99 and max seconds."""
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+
+    def at(fraction: float) -> float:
+        position = fraction * (len(ordered) - 1)
+        lower = int(position)
+        upper = min(lower + 1, len(ordered) - 1)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+    return {
+        'count': len(ordered),
+        'mean': sum(ordered) / len(ordered),
+        'p50': at(0.5),
+        'p90': at(0.9),
+        'p99': at(0.99),
+        'max': ordered[-1]
+    }
+
+def stage_summary(report: dict) -> dict:
+    """Latency percentiles and summed measurements for each instrumented stage."""
+    durations = {}
+    for finished in report['spans']:
+        durations.setdefault(finished['name'], []).append(finished['duration'])
+    stages = {}
+    for name, stage in sorted(report['stages'].items()):
+        measurements = {
+            key: value for key, value in stage.items()
+            if key not in ('count', 'total_seconds', 'max_seconds')
+        }
+        stages[name] = {
+            'total_seconds': stage['total_seconds'], **percentiles(durations[name]), **measurements
+        }
+    return stages
+
+@contextlib.contextmanager
+def isolated_data_dir(root: Path):
+    """Point every loaded module's data paths at root for the duration of the block.
+    
+    The analyzer imports its path settings by name, so each module that
+    holds one is patched, the same way the tests monkeypatch them.
+    """
+    patched = []
+    for name, module in list(sys.modules.items()):
+        if not name.startswith("src.voice_memo_analyzer"):
+            continue
+        for setting, relative in DATA_SETTINGS.items():
+            if setting in vars(module):
+                patched.append((module, setting, getattr(module, setting)))
+                setattr(module, setting, root / relative)
+    try:
+        yield root
+    finally:
+        for module, setting, value in reversed(patched):
+            setattr(module, setting, value)
+
+def run_scenario(name: str, files: list[Path]) -> tuple[list[float], list[str]]:
+    """Process files with one scenario.
+    
+    Returns:
+        tuple: (end-to-end seconds per memo, error messages)
+    """
+    from src.voice_memo_analyzer import VoiceMemoAnalyzer, config
+    from src.voice_memo_analyzer.pipeline import BatchPipeline, run_async_batch
+    
+    analyzer = VoiceMemoAnalyzer()
+    if name == "single":
+        latencies, errors = [], []
+        for path in files:
+            started = time.perf_counter()
+            results = analyzer.analyze_audio(path)
+            latencies.append(time.perf_counter() - started)
+            if 'error' in results:
+                errors.append(f"{path.name}: {results['error']}")
+        return latencies, errors
+    if name == "batch":
+        outcomes = BatchPipeline(
+            analyzer,
+            prepare_workers=config.BATCH_PREPARE_WORKERS,
+            transcribe_workers=config.BATCH_TRANSCRIBE_WORKERS,
+            analyze_workers=config.BATCH_ANALYZE_WORKERS,
+            write_workers=config.BATCH_WRITE_WORKERS,
+            queue_size=config.BATCH_QUEUE_SIZE
+        ).run(files)
+    else:
+        outcomes = asyncio.run(run_async_batch(analyzer, files, max_concurrency=config.ASYNC_BATCH_CONCURRENCY))
+    return (
+        [outcome.elapsed for outcome in outcomes],
+        [f"{outcome.file_path.name}: {outcome.error}" for outcome in outcomes if not outcome.success]
+    )
+
+def benchmark(name: str, files: list[Path], audio_seconds: float, server: FakeOpenAIServer,
+              verbose: bool = False) -> dict:
+    """Run one scenario against an empty data directory and summarize it."""
+    from src.voice_memo_analyzer.utils.instrumentation import Profiler
+    
+    server.reset_stats()
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with tempfile.TemporaryDirectory() as data_dir, isolated_data_dir(Path(data_dir)), Profiler() as profiler, output:
+        started = time.perf_counter()
+        latencies, errors = run_scenario(name, files)
+        wall_seconds = time.perf_counter() - started
+    return {
+        'memos': len(files),
+        'failures': len(errors),
+        'errors': errors,
+        'wall_seconds': wall_seconds,
+        'throughput': {
+            'memos_per_second': len(files) / wall_seconds,
+            'audio_seconds_per_second': audio_seconds / wall_seconds
+        },
+        'latency': percentiles(latencies),
+        'stages': stage_summary(profiler.report()),
+        'server': server.stats()
+    }
+
+def git_revision() -> dict:
+    """Return the current commit and whether the tree has uncommitted changes."""
+    def git(*args: str) -> str:
+        result = subprocess.run(['git', *args], cwd=ROOT_DIR, capture_output=True, text=True)
+        return result.stdout.strip() if result.returncode == 0 else ""
+    return {'commit': git('rev-parse', '--short', 'HEAD') or "unknown",
+            'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+def compare(current: dict, baseline: dict) -> list[str]:
+    """Describe how each scenario's throughput and latency changed from baseline."""
+    lines = [f"=== Compared with {baseline['revision']['commit']} ==="]
+    for name, result in current['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if before is None:
+            continue
+        for label, now, then in (
+            ("memos/s", result['throughput']['memos_per_second'], before['throughput']['memos_per_second']),
+            ("p50 s", result['latency'].get('p50', 0.0), before['latency'].get('p50', 0.0)),
+            ("p90 s", result['latency'].get('p90', 0.0), before['latency'].get('p90', 0.0)),
+        ):
+            change = f"{(now - then) / then:+.1%}" if then else "n/a"
+            lines.append(f"{name:<8} {label:<8} {then:>9.3f} -> {now:>9.3f}  ({change})")
+    return lines
+
+def format_summary(results: dict) -> list[str]:
+    """Format a short per-scenario table of the results."""
+    lines = [f"{'scenario':<8} {'memos/s':>8} {'audio s/s':>10} {'p50 s':>8} {'p90 s':>8} {'p99 s':>8} {'fail':>5}"]
+    for name, result in results['scenarios'].items():
+        latency = result['latency']
+        lines.append(
+            f"{name:<8} {result['throughput']['memos_per_second']:>8.3f} "
+            f"{result['throughput']['audio_seconds_per_second']:>10.1f} "
+            f"{latency.get('p50', 0.0):>8.3f} {latency.get('p90', 0.0):>8.3f} "
+            f"{latency.get('p99', 0.0):>8.3f} {result['failures']:>5}"
+        )
+    return lines
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse the benchmark's command-line options."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n")[0])
+    parser.add_argument("--durations", default="30,300,1200",
+                        help="Comma-separated recording lengths in seconds (default: 30,300,1200)")
+    parser.add_argument("--copies", type=int, default=2, help="Recordings of each length (default: 2)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma-separated scenarios to run (default: {','.join(SCENARIOS)})")
+    parser.add_argument("--latency", type=float, default=0.3, help="Base seconds per API request")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Latency varies by up to this many seconds")
+    parser.add_argument("--upload-seconds-per-mb", type=float, default=0.5, help="Upload cost per megabyte")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--stream-chunk-delay", type=float, default=0.005,
+                        help="Seconds between streamed completion chunks")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for jitter and 429 injection")
+    parser.add_argument("--output", type=Path, help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", type=Path, metavar="BASELINE", help="Earlier results file to compare with")
+    parser.add_argument("--verbose", action="store_true", help="Show the analyzer's progress output")
+    args = parser.parse_args(argv)
+    args.durations = [float(value) for value in args.durations.split(",")]
+    args.scenarios = [value for value in args.scenarios.split(",") if value]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+def main(argv: list[str] | None = None) -> dict:
+    """Run the benchmark, print a summary and write the results file."""
+    args = parse_args(argv)
+    if not (shutil.which("ffmpeg") and shutil.which("ffprobe")):
+        sys.exit("The benchmark needs ffmpeg and ffprobe on PATH")
+    
+    server_settings = {
+        'latency': args.latency, 'jitter': args.jitter,
+        'upload_seconds_per_mb': args.upload_seconds_per_mb, 'rate_limit_rate': args.rate_limit_rate,
+        'stream_chunk_delay': args.stream_chunk_delay, 'seed': args.seed
+    }
+    results = {
+        'revision': git_revision(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'settings': {'durations': args.durations, 'copies': args.copies, 'server': server_settings},
+        'scenarios': {}
+    }
+    with tempfile.TemporaryDirectory() as audio_dir, FakeOpenAIServer(**server_settings) as server:
+        print(f"Synthesizing {len(args.durations) * args.copies} recordings...")
+        files = synthesize_memos(Path(audio_dir), args.durations, args.copies)
+        audio_seconds = sum(args.durations) * args.copies
+        os.environ['OPENAI_BASE_URL'] = server.base_url
+        os.environ['OPENAI_API_KEY'] = "benchmark"
+        for name in args.scenarios:
+            print(f"Running {name}...")
+            results['scenarios'][name] = benchmark(name, files, audio_seconds, server, args.verbose)
+    
+    print("\n".join(format_summary(results)))
+    if args.compare:
+        print("\n".join(compare(results, json.loads(args.compare.read_text()))))
+    output = args.output or RESULTS_DIR / f"{results['revision']['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results saved to: {output}")
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,33 @@ Usage:
     1. Command line: python main.py <path_to_audio_file>
     2. Drag and drop: Run python main.py and drag the audio file into the terminal
 
+Options:
+    --reanalyze    Ignore the cached analysis and run the transcript through the model again
+    --batch DIR    Process every m4a/mp3 in DIR (or matching a glob pattern) as a
+                   pipeline of concurrent stages and print a per-file summary
+    --async        Use the asyncio client path with a shared rate-limit scheduler
+    --batch-api    With --batch, analyze uncached transcripts in one OpenAI Batch API
+                   job (half price, finishes within 24 hours) and wait for it
+    --trim-silence Upload only detected speech to the transcriber (needs numpy)
+    --encoding-profile NAME
+                   How audio is encoded for upload: archive, speech (default),
+                   opus or passthrough
+    --stream       Print action items, key moments and the summary as they are generated
+    --cached-only  Show cached results only; never converts, uploads or creates an API client
+    --profile FILE Write per-stage timings, bytes, tokens and cache hits as JSON
+
+Cache maintenance:
+    python main.py cache stats
+    python main.py cache prune [--max-size 2G] [--max-age-days 30]
+    python main.py cache compact
+
+Search all transcripts:
+    python main.py search budget review [--limit 20] [--reindex]
+    python main.py search --semantic push the launch back
+
+Watch a folder and analyze new memos as they appear:
+    python main.py watch DIR [--workers N] [--poll] [--metrics-port 9464]
+
 The script will process the audio file and display the results, including:
 - Action items extracted from the conversation
 - Overall conversation summary
@@ -15,22 +42,312 @@ The script will process the audio file and display the results, including:
 - Full transcript with timestamps
 """
 
+import argparse
+import asyncio
 import sys
+from contextlib import nullcontext
 from pathlib import Path
-from src.voice_memo_analyzer import VoiceMemoAnalyzer
+from src.voice_memo_analyzer import VoiceMemoAnalyzer, config
+from src.voice_memo_analyzer.analyzer import StreamingDisplay
+from src.voice_memo_analyzer.utils.audio import ENCODING_PROFILES
+from src.voice_memo_analyzer.utils.instrumentation import Profiler
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command-line arguments.
+    
+    Args:
+        argv: Argument list to parse, defaults to sys.argv[1:]
+    
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Analyze a voice memo with OpenAI.")
+    parser.add_argument("audio_file", nargs="?", help="Path to an m4a or mp3 voice memo")
+    parser.add_argument(
+        "--reanalyze", action="store_true",
+        help="Ignore the cached analysis and call the model again"
+    )
+    parser.add_argument(
+        "--batch", metavar="DIR_OR_GLOB",
+        help="Process every voice memo in a directory or matching a glob pattern"
+    )
+    parser.add_argument(
+        "--async", dest="use_async", action="store_true",
+        help="Use the async OpenAI client with shared rate limiting and retries"
+    )
+    parser.add_argument(
+        "--batch-api", action="store_true",
+        help="With --batch, submit the analyses as one Batch API job and wait for it"
+    )
+    parser.add_argument(
+        "--trim-silence", action="store_true",
+        help="Detect speech and upload only the speech regions for transcription"
+    )
+    parser.add_argument(
+        "--encoding-profile", choices=list(ENCODING_PROFILES),
+        help=f"How audio is encoded for upload (default: {config.ENCODING_PROFILE})"
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="Stream the analysis and print each item as soon as it is generated"
+    )
+    parser.add_argument(
+        "--cached-only", action="store_true",
+        help="Show the cached results without converting, transcribing or analyzing"
+    )
+    parser.add_argument(
+        "--profile", type=Path, metavar="FILE",
+        help="Write per-stage timings, bytes, tokens and cache hits to FILE as JSON"
+    )
+    return parser.parse_args(argv)
+
+def run_batch(target: str, reanalyze: bool, use_async: bool = False,
+              trim_silence: bool = False, encoding_profile: str = config.ENCODING_PROFILE,
+              use_batch_api: bool = False) -> None:
+    """Process a directory or glob of voice memos and print a summary.
+    
+    Args:
+        target: Directory or glob pattern selecting the audio files
+        reanalyze: Ignore cached analyses and call the model again
+        use_async: Run memos concurrently on the async client instead of the
+            threaded stage pipeline
+        trim_silence: Upload only detected speech for transcription
+        encoding_profile: How audio is encoded for upload
+        use_batch_api: Analyze uncached transcripts in one Batch API job
+    
+    Raises:
+        SystemExit: If no files match or any file fails
+    """
+    from src.voice_memo_analyzer.pipeline import (
+        BatchApiPipeline, BatchPipeline, collect_audio_files, format_batch_summary, run_async_batch
+    )
+    
+    files = collect_audio_files(target)
+    if not files:
+        print(f"Error: No m4a or mp3 files found for: {target}")
+        sys.exit(1)
+    
+    print(f"Processing {len(files)} files...")
+    if use_async:
+        results = asyncio.run(run_async_batch(
+            VoiceMemoAnalyzer(trim_silence, encoding_profile), files, reanalyze, config.ASYNC_BATCH_CONCURRENCY
+        ))
+    else:
+        workers = {
+            'prepare_workers': config.BATCH_PREPARE_WORKERS,
+            'transcribe_workers': config.BATCH_TRANSCRIBE_WORKERS,
+            'analyze_workers': config.BATCH_ANALYZE_WORKERS,
+            'write_workers': config.BATCH_WRITE_WORKERS,
+            'queue_size': config.BATCH_QUEUE_SIZE
+        }
+        analyzer = VoiceMemoAnalyzer(trim_silence, encoding_profile)
+        if use_batch_api:
+            pipeline = BatchApiPipeline(analyzer, poll_seconds=config.BATCH_API_POLL_SECONDS, **workers)
+        else:
+            pipeline = BatchPipeline(analyzer, **workers)
+        results = pipeline.run(files, reanalyze=reanalyze)
+    print()
+    print(format_batch_summary(results))
+    if not all(result.success for result in results):
+        sys.exit(1)
+
+def parse_size(text: str) -> int:
+    """Parse a size such as 500M or 2G into bytes."""
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+def format_size(num_bytes: int) -> str:
+    """Format a byte count for display."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1024:
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+def cache_command(argv: list[str]) -> None:
+    """Run the cache maintenance subcommands (stats, prune, compact).
+    
+    Args:
+        argv: Arguments following the 'cache' command
+    """
+    from src.voice_memo_analyzer.utils.cache import (
+        get_batch_jobs, get_cache_stats, get_transcription_progress, prune_cache
+    )
+    
+    parser = argparse.ArgumentParser(prog="main.py cache", description="Inspect, prune or compact the cache.")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    subparsers.add_parser("stats", help="Show cache entry and file counts and sizes")
+    prune_parser = subparsers.add_parser("prune", help="Evict old or least-recently-used cache data")
+    prune_parser.add_argument(
+        "--max-size", type=parse_size, default=config.CACHE_MAX_BYTES,
+        help="Evict least-recently-used data until the cache is below this size (e.g. 2G)"
+    )
+    prune_parser.add_argument(
+        "--max-age-days", type=float, default=config.CACHE_MAX_AGE_DAYS,
+        help="Evict data not used within this many days"
+    )
+    subparsers.add_parser("compact", help="Drop the rows of replaced items from the semantic search index")
+    args = parser.parse_args(argv)
+    
+    if args.action == "stats":
+        stats = get_cache_stats()
+        for table in ("entries", "files"):
+            print(f"=== Cache {table.title()} ===")
+            for kind, item in stats[table].items():
+                print(f"{kind:<12} {item['count']:>8}  {format_size(item['bytes']):>10}")
+        print(f"Total: {format_size(stats['total_bytes'])}")
+        progress = get_transcription_progress()
+        if progress:
+            print("=== Unfinished Transcriptions ===")
+            for item in progress:
+                print(f"{item['filename']}: {item['done']} of {item['chunks']} chunks "
+                      f"(started {item['started']})")
+        batch_jobs = get_batch_jobs()
+        if batch_jobs:
+            print("=== Uncollected Batch Jobs ===")
+            for job in batch_jobs:
+                print(f"{job['batch_id']}: {job['requests']} requests (submitted {job['submitted']})")
+    elif args.action == "compact":
+        if not config.SEMANTIC_INDEX_DIR.exists():
+            print("No semantic index to compact")
+            return
+        dropped = VoiceMemoAnalyzer().semantic_index.compact()
+        print(f"Dropped {dropped} rows from the semantic index")
+    else:
+        if args.max_size is None and args.max_age_days is None:
+            parser.error("prune needs --max-size and/or --max-age-days")
+        evicted = prune_cache(max_bytes=args.max_size, max_age_days=args.max_age_days)
+        print(f"Evicted {evicted['entries']} entries and {evicted['files']} files "
+              f"({format_size(evicted['bytes'])})")
+
+def watch_command(argv: list[str]) -> None:
+    """Run the watch-folder daemon until interrupted.
+    
+    Args:
+        argv: Arguments following the 'watch' command
+    """
+    from src.voice_memo_analyzer.daemon import WatchDaemon
+    from src.voice_memo_analyzer.utils.instrumentation import MetricsRegistry, add_hook, serve_metrics
+    from src.voice_memo_analyzer.utils.job_queue import JobQueue
+    
+    parser = argparse.ArgumentParser(
+        prog="main.py watch", description="Analyze new voice memos as they appear in a folder."
+    )
+    parser.add_argument("directory", type=Path, help="Folder to watch")
+    parser.add_argument(
+        "--workers", type=int, default=config.WATCH_WORKERS,
+        help="Memos processed at the same time"
+    )
+    parser.add_argument(
+        "--poll", action="store_true",
+        help="Poll the folder instead of using inotify (for network or synced folders)"
+    )
+    parser.add_argument(
+        "--trim-silence", action="store_true",
+        help="Detect speech and upload only the speech regions for transcription"
+    )
+    parser.add_argument(
+        "--encoding-profile", choices=list(ENCODING_PROFILES), default=config.ENCODING_PROFILE,
+        help="How audio is encoded for upload"
+    )
+    parser.add_argument(
+        "--metrics-port", type=int, default=config.METRICS_PORT,
+        help="Serve Prometheus metrics at http://127.0.0.1:PORT/metrics"
+    )
+    args = parser.parse_args(argv)
+    if not args.directory.is_dir():
+        parser.error(f"not a directory: {args.directory}")
+    
+    if args.metrics_port is not None:
+        registry = MetricsRegistry()
+        add_hook(registry)
+        serve_metrics(registry, args.metrics_port)
+        print(f"Serving metrics at http://127.0.0.1:{args.metrics_port}/metrics")
+    
+    daemon = WatchDaemon(
+        VoiceMemoAnalyzer(args.trim_silence or config.TRIM_SILENCE, args.encoding_profile),
+        args.directory,
+        JobQueue(
+            config.WATCH_QUEUE_PATH, max_attempts=config.WATCH_MAX_ATTEMPTS, retry_seconds=config.WATCH_RETRY_SECONDS
+        ),
+        workers=args.workers,
+        settle_seconds=config.WATCH_SETTLE_SECONDS,
+        poll_interval=config.WATCH_POLL_SECONDS,
+        force_polling=args.poll
+    )
+    daemon.run()
 
-def get_audio_file() -> Path:
+def search_command(argv: list[str]) -> None:
+    """Search the transcript index and print matches grouped by memo.
+    
+    Args:
+        argv: Arguments following the 'search' command
+    """
+    from src.voice_memo_analyzer.utils.search import get_search_index, reindex_from_cache
+    
+    parser = argparse.ArgumentParser(prog="main.py search", description="Search all transcripts.")
+    parser.add_argument("query", nargs="*", help="Words to find; end a word with * for a prefix match")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum matching segments to show")
+    parser.add_argument(
+        "--semantic", action="store_true",
+        help="Search by meaning over segments, key moments and action items (needs numpy)"
+    )
+    parser.add_argument(
+        "--reindex", action="store_true",
+        help="Rebuild the index from every cached transcript first"
+    )
+    args = parser.parse_args(argv)
+    query = " ".join(args.query)
+    if not query and not args.reindex:
+        parser.error("a query is required unless --reindex is given")
+    
+    if args.semantic:
+        from src.voice_memo_analyzer.utils.semantic import reindex_semantic_from_cache
+        analyzer = VoiceMemoAnalyzer()
+        index = analyzer.semantic_index
+        if args.reindex:
+            print(f"Indexed {reindex_semantic_from_cache(index, analyzer.analysis_cache_key)} memos")
+    else:
+        index = get_search_index()
+        if args.reindex:
+            print(f"Indexed {reindex_from_cache(index)} transcripts")
+    if not query:
+        return
+    
+    hits = index.search(query, limit=args.limit)
+    if not hits:
+        print(f"No matches for: {query}")
+        return
+    by_memo = {}
+    for hit in hits:
+        by_memo.setdefault(hit.original_filename, []).append(hit)
+    for filename, memo_hits in by_memo.items():
+        print(f"\n{filename}")
+        for hit in memo_hits:
+            if args.semantic:
+                label = f"[{hit.timestamp}]" if hit.timestamp else "•"
+                print(f"  {label} {hit.text} ({hit.kind.replace('_', ' ')}, {hit.score:.2f})")
+            else:
+                print(f"  [{hit.timestamp}] {hit.snippet}")
+
+def get_audio_file(args: argparse.Namespace) -> Path:
     """Get the audio file path from either command line args or user input.
     
+    Args:
+        args: Parsed command-line arguments
+    
     Returns:
         Path: Path object for the audio file
         
     Raises:
         SystemExit: If no valid file is provided
     """
-    if len(sys.argv) == 2:
+    if args.audio_file:
         # File provided as command line argument
-        return Path(sys.argv[1])
+        return Path(args.audio_file)
     
     # No command line argument, prompt for drag and drop
     print("Please drag and drop your audio file into the terminal, then press Enter:")
@@ -40,6 +357,43 @@ def get_audio_file() -> Path:
     file_path = file_path.strip("'\"").replace("\\", "")
     return Path(file_path)
 
+def run_command(args: argparse.Namespace) -> None:
+    """Analyze the file or batch selected by the command-line arguments.
+    
+    Args:
+        args: Parsed command-line arguments
+    
+    Raises:
+        SystemExit: If the file doesn't exist, isn't cached with --cached-only,
+            or a batch has failures
+    """
+    trim_silence = args.trim_silence or config.TRIM_SILENCE
+    encoding_profile = args.encoding_profile or config.ENCODING_PROFILE
+    if args.batch_api and (not args.batch or args.use_async):
+        print("Error: --batch-api needs --batch and can't be combined with --async")
+        sys.exit(1)
+    if args.batch:
+        run_batch(args.batch, args.reanalyze, args.use_async, trim_silence, encoding_profile, args.batch_api)
+        return
+    
+    audio_file = get_audio_file(args)
+    if not audio_file.exists():
+        print(f"Error: File not found: {audio_file}")
+        sys.exit(1)
+    
+    analyzer = VoiceMemoAnalyzer(trim_silence=trim_silence, encoding_profile=encoding_profile)
+    on_item = StreamingDisplay() if args.stream and not args.cached_only else None
+    if args.cached_only:
+        results = analyzer.get_cached_results(audio_file)
+        if results is None:
+            print(f"No cached analysis for {audio_file}")
+            sys.exit(1)
+    elif args.use_async:
+        results = asyncio.run(analyzer.analyze_audio_async(audio_file, args.reanalyze, on_item))
+    else:
+        results = analyzer.analyze_audio(audio_file, reanalyze=args.reanalyze, on_item=on_item)
+    analyzer.display_results(results, streamed=on_item is not None)
+
 def main():
     """Process a voice memo file and display analysis results.
     
@@ -57,14 +411,24 @@ def main():
         SystemExit: If no valid file is provided or if the file doesn't exist
     """
     try:
-        audio_file = get_audio_file()
-        if not audio_file.exists():
-            print(f"Error: File not found: {audio_file}")
-            sys.exit(1)
-
-        analyzer = VoiceMemoAnalyzer()
-        results = analyzer.analyze_audio(audio_file)
-        analyzer.display_results(results)
+        if sys.argv[1:2] == ["cache"]:
+            cache_command(sys.argv[2:])
+            return
+        if sys.argv[1:2] == ["search"]:
+            search_command(sys.argv[2:])
+            return
+        if sys.argv[1:2] == ["watch"]:
+            watch_command(sys.argv[2:])
+            return
+        
+        args = parse_args()
+        with (Profiler() if args.profile else nullcontext()) as profiler:
+            try:
+                run_command(args)
+            finally:
+                if profiler is not None:
+                    profiler.write(args.profile)
+                    print(f"Profile written to: {args.profile}")
         
     except KeyboardInterrupt:
         print("\nOperation cancelled by user")
@@ -4,9 +4,87 @@ This module handles the analysis of transcribed conversations using OpenAI's GPT
 model to extract key information like action items, summaries, and important moments.
 """
 
+import asyncio
+import hashlib
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from openai import OpenAI
+from threading import Lock
+from typing import TYPE_CHECKING, Callable
+from ..utils.cache import get_analysis_cache_key
+from ..utils.formatting import SEGMENT_LINE, parse_timestamp
+from ..utils.instrumentation import span
+from ..utils.scheduler import RateLimitScheduler
+from .streaming import IncrementalJSONParser
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+CHARS_PER_TOKEN = 4
+MAX_MERGE_SECONDS = 120  # compact_transcript never merges segments further apart than this
+EXPECTED_COMPLETION_TOKENS = 1000  # Reserved against the TPM budget per request
+ANALYSIS_ERROR_SUMMARY = "Error analyzing transcript"
+
+# Model tiers, chosen per transcript by ConversationAnalyzer.route
+TIER_SMALL = "small"  # One call to small_model
+TIER_STANDARD = "standard"  # One call to model
+TIER_MAP_REDUCE = "map_reduce"  # Windows analyzed with model, merged by reduce_model
+
+# Called with ('action_items', item), ('key_moments', moment) or ('overall_summary', text)
+ItemCallback = Callable[[str, object], None]
+STREAMED_FIELDS = ('action_items', 'overall_summary', 'key_moments')  # Order of ANALYSIS_JSON_FORMAT
+
+ANALYSIS_JSON_FORMAT = """{
+  "action_items": ["item1", "item2"],
+  "overall_summary": "summary text",
+  "key_moments": [
+    {"timestamp": "MM:SS", "summary": "moment description"}
+  ]
+}"""
+
+# The instructions go in the system message and the transcript last, so every
+# request starts with the same prefix. At about 240 tokens that prefix is below
+# the 1024-token minimum of OpenAI's prompt cache, so it is only cached as part
+# of a request repeated in full (a re-analysis of a transcript window at least
+# that long); other requests report no cached_prompt_tokens.
+ANALYSIS_INSTRUCTIONS = """Analyze the timestamped conversation transcript you are given and provide:
+1. Action items that need to be taken
+2. Overall conversation summary
+3. Key moments with their timestamps
+
+Each transcript line starts with the MM:SS time it was said; consecutive short segments may share a line.
+
+Guidelines:
+- For action items: Make each item detailed and self-contained, so it can be understood without any other context
+- For key moments: Include timestamps (MM:SS) and focus on important decisions or revelations
+- For overall summary: Provide a concise but complete summary of the main points and outcomes
+- Note any important agreements or conclusions reached
+
+Respond with a valid JSON object in exactly this format:
+{json_format}
+
+IMPORTANT: Your response must be a valid JSON object and nothing else."""
+
+ANALYSIS_PROMPT_TEMPLATE = """{context_note}Transcript:
+{formatted_transcript}"""
+
+REDUCE_INSTRUCTIONS = """You are given analyses of consecutive parts of one conversation, in order.
+
+Merge them into a single analysis:
+- Combine duplicate or overlapping action items into one self-contained item each
+- Write one concise overall summary covering all parts
+
+Respond with a valid JSON object in exactly this format:
+{"action_items": ["item1", "item2"], "overall_summary": "summary text"}
+
+IMPORTANT: Your response must be a valid JSON object and nothing else."""
+
+ANALYSIS_SYSTEM_PROMPT = ANALYSIS_INSTRUCTIONS.format(json_format=ANALYSIS_JSON_FORMAT)
+
+# Changes whenever any prompt text changes, so cached analyses are invalidated
+PROMPT_VERSION = hashlib.sha256(
+    (ANALYSIS_SYSTEM_PROMPT + ANALYSIS_PROMPT_TEMPLATE + REDUCE_INSTRUCTIONS).encode()
+).hexdigest()[:12]
 
 class ConversationAnalyzer:
     """Analyzes transcribed conversations using OpenAI's GPT models.
@@ -17,25 +95,77 @@ class ConversationAnalyzer:
     - Key moments with their timestamps
     
     It uses GPT-4o to analyze the text and structure the results in a consistent format.
+    Given a small_model, short memos are routed to it instead (see route).
+    The transcript is compacted (see compact_transcript) and sent after a
+    fixed system prompt, so requests share a prefix; it is too short for
+    the provider's prompt cache on its own (see ANALYSIS_INSTRUCTIONS).
+    Long transcripts are analyzed map-reduce style: windows in parallel, then
+    a cheap merge call. analyze_transcript_async does the same over an
+    AsyncOpenAI client paced by a shared RateLimitScheduler.
+    
+    Given an on_item callback, the completion is streamed and each action
+    item, key moment and the summary are passed to the callback as soon as
+    they have been generated.
     """
 
-    def __init__(self, client: OpenAI):
+    def __init__(self, client: "OpenAI", max_window_tokens: int = 12000,
+                 max_workers: int = 4, reduce_model: str = "gpt-4o-mini",
+                 model: str = "gpt-4o", temperature: float = 0.3,
+                 async_client: "AsyncOpenAI | None" = None,
+                 scheduler: RateLimitScheduler | None = None, merge_seconds: float = 0.0,
+                 small_model: str | None = None, small_max_tokens: int = 1000,
+                 small_max_segments: int = 60):
         """Initialize the analyzer with an OpenAI client.
         
         Args:
             client: An initialized OpenAI client object
+            max_window_tokens: Approximate transcript tokens per analysis call;
+                longer transcripts are analyzed in map-reduce mode
+            max_workers: Maximum number of windows analyzed at the same time
+            reduce_model: Model used to merge the per-window results
+            model: Model used to analyze the transcript (or each window)
+            temperature: Sampling temperature for all analysis calls
+            async_client: Client used by analyze_transcript_async
+            scheduler: Rate limiter shared with other async API users
+            merge_seconds: Short segments starting within this many seconds
+                are merged onto one prompt line (see compact_transcript)
+            small_model: Model for transcripts within both small_max_tokens
+                and small_max_segments, or None to use model for every memo
+            small_max_tokens: Longest transcript, in approximate tokens, sent
+                to small_model
+            small_max_segments: Most transcript segments sent to small_model
         """
         self.client = client
+        self.model = model
+        self.temperature = temperature
+        self.max_window_tokens = max_window_tokens
+        self.max_workers = max_workers
+        self.reduce_model = reduce_model
+        self.async_client = async_client
+        self.scheduler = scheduler
+        self.merge_seconds = merge_seconds
+        self.small_model = small_model
+        self.small_max_tokens = small_max_tokens
+        self.small_max_segments = small_max_segments
 
-    def analyze_transcript(self, formatted_transcript: str) -> dict:
+    def analyze_transcript(self, formatted_transcript: str, on_item: ItemCallback | None = None) -> dict:
         """Analyze a formatted transcript and extract key information.
         
         Uses GPT-4o to analyze the transcript and extract structured information
         about the conversation, including action items, key moments, and a
-        summary.
+        summary. Transcripts longer than max_window_tokens are split on segment
+        boundaries, the windows are analyzed concurrently, and a reduce step
+        merges the partial results into the same schema.
+        
+        With on_item, completions are streamed and parsed as they arrive. In
+        map-reduce mode key moments are passed on as each window produces
+        them, and the action items and summary once the reduce step has
+        merged them.
         
         Args:
             formatted_transcript: The transcript text with timestamps
+            on_item: Called with (field, value) for each result item as soon
+                as it is complete
         
         Returns:
             dict: Analysis results containing:
@@ -46,46 +176,280 @@ class ConversationAnalyzer:
         Raises:
             Exception: If the OpenAI API call fails
         """
-        print("Analyzing conversation...")
-        json_format = '''
-        {
-            "action_items": ["item1", "item2"],
-            "overall_summary": "summary text",
-            "key_moments": [
-                {"timestamp": "MM:SS", "summary": "moment description"}
-            ]
-        }
-        '''
+        tier, model, windows = self.route(formatted_transcript)
+        print(f"Analyzing conversation with {model} ({tier} tier)...")
+        with span("analyze", windows=len(windows), **_size_attributes(formatted_transcript, tier)):
+            if tier != TIER_MAP_REDUCE:
+                result = self._analyze_window("\n".join(windows), on_item=on_item, model=model)
+                return _with_tier(result, tier, model)
+        
+            print(f"Analyzing {len(windows)} transcript windows with up to {self.max_workers} workers...")
+            on_moment = _only_moments(on_item)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                partial_results = list(executor.map(
+                    lambda window, note: self._analyze_window(window, note, on_moment),
+                    windows, _window_notes(len(windows))
+                ))
+            result = self._reduce(partial_results)
+            emit_items(result, on_item, ('action_items', 'overall_summary'))
+            return _with_tier(result, tier, model)
+
+    async def analyze_transcript_async(self, formatted_transcript: str,
+                                       on_item: ItemCallback | None = None) -> dict:
+        """Analyze a formatted transcript over the async client.
+        
+        Behaves like analyze_transcript, but windows are analyzed concurrently
+        on the event loop and every request goes through the scheduler.
+        
+        Args:
+            formatted_transcript: The transcript text with timestamps
+            on_item: Called with (field, value) for each result item as soon
+                as it is complete, as in analyze_transcript
+        
+        Returns:
+            dict: Analysis results in the same schema as analyze_transcript
+        
+        Raises:
+            ValueError: If the analyzer has no async client
+            Exception: If the OpenAI API call fails
+        """
+        if self.async_client is None:
+            raise ValueError("analyze_transcript_async requires an async_client")
+        tier, model, windows = self.route(formatted_transcript)
+        print(f"Analyzing conversation with {model} ({tier} tier)...")
+        with span("analyze", windows=len(windows), **_size_attributes(formatted_transcript, tier)):
+            if tier != TIER_MAP_REDUCE:
+                request = self._window_request("\n".join(windows), model=model)
+                result = await self._analyze_window_async(request, on_item)
+                return _with_tier(result, tier, model)
+        
+            print(f"Analyzing {len(windows)} transcript windows...")
+            on_moment = _only_moments(on_item)
+            partial_results = await asyncio.gather(*(
+                self._analyze_window_async(self._window_request(window, note), on_moment)
+                for window, note in zip(windows, _window_notes(len(windows)))
+            ))
+            response = await self._create_async(self._reduce_request(partial_results))
+            result = self._apply_reduce(self._merge_partials(partial_results), response)
+            emit_items(result, on_item, ('action_items', 'overall_summary'))
+            return _with_tier(result, tier, model)
+
+    async def _analyze_window_async(self, request: dict, on_item: ItemCallback | None = None) -> dict:
+        """Run one window's request over the async client, streaming it when on_item is given."""
+        if on_item is None:
+            return self._window_result(await self._create_async(request))
+        parser = IncrementalJSONParser()
+        with span("analysis.request", model=request['model']) as current:
+            stream = await self._submit_async(_streaming(request))
+            async for chunk in stream:
+                _emit_events(parser.feed(_chunk_text(chunk)), on_item)
+                _record_usage(current, chunk)
+        return _streamed_result(parser)
+
+    def _create(self, request: dict):
+        """Send a chat completion request, recording its token usage."""
+        with span("analysis.request", model=request['model']) as current:
+            response = self.client.chat.completions.create(**request)
+            _record_usage(current, response)
+            return response
+
+    async def _create_async(self, request: dict):
+        """Send a chat completion request through the scheduler."""
+        with span("analysis.request", model=request['model']) as current:
+            response = await self._submit_async(request)
+            _record_usage(current, response)
+            return response
+
+    async def _submit_async(self, request: dict):
+        """Make a chat completion call, paced and retried by the scheduler if there is one."""
+        tokens = sum(estimate_tokens(message['content']) for message in request['messages'])
+        tokens += EXPECTED_COMPLETION_TOKENS
+
+        def call():
+            return self.async_client.chat.completions.create(**request)
+        if self.scheduler is None:
+            return await call()
+        return await self.scheduler.submit(call, tokens)
+
+    def cache_key(self, formatted_transcript: str) -> str:
+        """Return the analysis cache key for a transcript under this configuration.
+        
+        The key covers the transcript content, PROMPT_VERSION, the models the
+        transcript is routed to, the temperature and merge_seconds, so
+        changing any of them misses the cache.
+        """
+        return analysis_cache_key(
+            formatted_transcript, self.model, self.reduce_model, self.temperature, self.merge_seconds,
+            self.small_model, self.small_max_tokens, self.small_max_segments
+        )
+
+    def route(self, formatted_transcript: str) -> tuple[str, str, list[str]]:
+        """Choose the model tier for a transcript.
+        
+        Transcripts that need more than one window are analyzed map-reduce
+        style; otherwise short ones (see is_short_transcript) go to
+        small_model if there is one, and the rest to model.
         
-        analysis_prompt = f"""
-        Analyze this timestamped conversation transcript and provide:
-        1. Action items that need to be taken
-        2. Overall conversation summary
-        3. Key moments with their timestamps
+        Returns:
+            tuple: (tier, model for the transcript or its windows, windows)
+        """
+        windows = self.split_windows(formatted_transcript)
+        if len(windows) > 1:
+            return TIER_MAP_REDUCE, self.model, windows
+        if self.small_model and is_short_transcript(
+            formatted_transcript, self.small_max_tokens, self.small_max_segments
+        ):
+            return TIER_SMALL, self.small_model, windows
+        return TIER_STANDARD, self.model, windows
+
+    def split_windows(self, formatted_transcript: str) -> list[str]:
+        """Compact a formatted transcript and split it into analysis windows."""
+        compacted = compact_transcript(formatted_transcript, self.merge_seconds, self.max_window_tokens)
+        return split_transcript_windows(compacted, self.max_window_tokens)
+
+    def window_requests(self, formatted_transcript: str) -> tuple[str, str, list[dict]]:
+        """Route a transcript and build the chat completion arguments for its windows.
         
-        Guidelines:
-        - For action items: Make each item detailed and self-contained, so it can be understood without any other context
-        - For key moments: Include timestamps [MM:SS] and focus on important decisions or revelations
-        - For overall summary: Provide a concise but complete summary of the main points and outcomes
-        - Note any important agreements or conclusions reached
+        For sending the analysis somewhere other than the chat endpoint,
+        such as the Batch API; combine_windows turns the parsed responses
+        into the final analysis.
         
-        Transcript:
-        {formatted_transcript}
+        Returns:
+            tuple: (tier, model, one request per window)
+        """
+        tier, model, windows = self.route(formatted_transcript)
+        if tier != TIER_MAP_REDUCE:
+            return tier, model, [self._window_request("\n".join(windows), model=model)]
+        return tier, model, [
+            self._window_request(window, note) for window, note in zip(windows, _window_notes(len(windows)))
+        ]
+
+    def combine_windows(self, tier: str, model: str, partial_results: list[dict], reduce_response=None) -> dict:
+        """Combine window results from window_requests into the final analysis.
         
-        Respond with a valid JSON object in exactly this format:
-        {json_format}
+        Args:
+            tier: The tier window_requests chose
+            model: The model window_requests chose
+            partial_results: Parsed analysis of each window, in order
+            reduce_response: Response to the reduce request for these windows,
+                or None to keep the concatenated window results
         
-        IMPORTANT: Your response must be a valid JSON object and nothing else.
+        Returns:
+            dict: Analysis results in the same schema as analyze_transcript
         """
+        if len(partial_results) == 1:
+            return _with_tier(partial_results[0], tier, model)
+        merged = self._merge_partials(partial_results)
+        if reduce_response is not None:
+            merged = self._apply_reduce(merged, reduce_response)
+        return _with_tier(merged, tier, model)
 
-        response = self.client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": analysis_prompt}],
-            temperature=0.3
+    def _analyze_window(self, formatted_transcript: str, context_note: str = "",
+                        on_item: ItemCallback | None = None, model: str | None = None) -> dict:
+        """Run the analysis prompt over a single transcript window."""
+        request = self._window_request(formatted_transcript, context_note, model)
+        if on_item is None:
+            return self._window_result(self._create(request))
+        
+        parser = IncrementalJSONParser()
+        with span("analysis.request", model=request['model']) as current:
+            for chunk in self.client.chat.completions.create(**_streaming(request)):
+                _emit_events(parser.feed(_chunk_text(chunk)), on_item)
+                _record_usage(current, chunk)
+        return _streamed_result(parser)
+
+    def _window_request(self, formatted_transcript: str, context_note: str = "",
+                        model: str | None = None) -> dict:
+        """Build the chat completion arguments for analyzing one transcript window (with self.model by default)."""
+        analysis_prompt = ANALYSIS_PROMPT_TEMPLATE.format(
+            context_note=f"{context_note}\n\n" if context_note else "",
+            formatted_transcript=formatted_transcript
+        )
+        return {
+            'model': model or self.model,
+            'messages': [
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": analysis_prompt}
+            ],
+            'temperature': self.temperature
+        }
+
+    def _window_result(self, response) -> dict:
+        """Parse a window's analysis, falling back to an empty result on bad JSON or no response."""
+        if response is None:
+            return _error_result()
+        try:
+            return self._parse_response(response)
+        except Exception as e:
+            print(f"Error parsing analysis results: {e}")
+            return _error_result()
+
+    def _reduce(self, partial_results: list[dict]) -> dict:
+        """Merge per-window analyses into a single result.
+        
+        Key moments are concatenated in timestamp order. Action items and the
+        overall summary are consolidated by one call to the cheaper
+        reduce_model; if that call's output can't be parsed, the action items
+        are kept as-is and the window summaries are joined.
+        
+        Args:
+            partial_results: Analysis dicts for consecutive transcript windows
+        
+        Returns:
+            dict: Merged analysis in the same schema as analyze_transcript
+        """
+        response = self._create(self._reduce_request(partial_results))
+        return self._apply_reduce(self._merge_partials(partial_results), response)
+
+    def _merge_partials(self, partial_results: list[dict]) -> dict:
+        """Concatenate window results, ordering key moments by timestamp.
+        
+        Moments without a readable timestamp (missing, or "N/A") are kept
+        after the timed ones, in the order the windows returned them.
+        """
+        key_moments = sorted(
+            (moment for result in partial_results for moment in result.get('key_moments', [])),
+            key=_moment_sort_key
         )
+        return {
+            "action_items": [item for result in partial_results for item in result.get('action_items', [])],
+            "overall_summary": " ".join(result.get('overall_summary', '') for result in partial_results).strip(),
+            "key_moments": key_moments
+        }
         
+    def _reduce_request(self, partial_results: list[dict]) -> dict:
+        """Build the chat completion arguments for the reduce step."""
+        partial_summaries = [
+            {"action_items": result.get('action_items', []), "overall_summary": result.get('overall_summary', '')}
+            for result in partial_results
+        ]
+        return {
+            'model': self.reduce_model,
+            'messages': [
+                {"role": "system", "content": REDUCE_INSTRUCTIONS},
+                {"role": "user", "content": json.dumps(partial_summaries, ensure_ascii=False)}
+            ],
+            'temperature': self.temperature
+        }
+        
+    def _apply_reduce(self, merged: dict, response) -> dict:
+        """Replace the merged action items and summary with the reduce step's output."""
+        try:
+            reduced = self._parse_response(response)
+            merged["action_items"] = reduced["action_items"]
+            merged["overall_summary"] = reduced["overall_summary"]
+        except Exception as e:
+            print(f"Error parsing merged results, keeping window results: {e}")
+        return merged
+
+    def _parse_response(self, response) -> dict:
+        """Extract the JSON object from a chat completion response.
+        
+        Raises:
+            Exception: If the response content isn't valid JSON
+        """
+        content = response.choices[0].message.content.strip()
         try:
-            content = response.choices[0].message.content.strip()
             # Remove markdown code block if present
             if content.startswith('```json'):
                 content = content[7:]  # Remove ```json prefix
@@ -94,11 +458,318 @@ class ConversationAnalyzer:
             content = content.strip()
             print(f"Raw response: {content}")  # Debug line
             return json.loads(content)
-        except Exception as e:
-            print(f"Error parsing analysis results: {e}")
+        except Exception:
             print(f"Raw content: {content}")  # Debug line
-            return {
-                "action_items": [],
-                "overall_summary": "Error analyzing transcript",
-                "key_moments": []
-            }
+            raise
+
+class RollingAnalysis:
+    """Analyzes transcript chunks while the rest of a recording is transcribed.
+    
+    Pass add_chunk as the transcriber's on_chunk callback. Chunks are held
+    until the ones received so far need more than one analysis window, so a
+    memo that fits one window is still analyzed in a single call, routed by
+    size like any other. Once the transcript is known to need map-reduce,
+    each chunk is split into windows that are analyzed in the background as
+    soon as it lands; finish() waits for the last windows and runs the
+    reduce step, so only that merge call waits for transcription to end.
+    
+    The ConversationAnalyzer is looked up when the first chunk arrives, so
+    a run served from the transcript cache never builds an API client.
+    """
+
+    def __init__(self, get_analyzer: Callable[[], ConversationAnalyzer], on_item: ItemCallback | None = None):
+        """Initialize an empty rolling analysis.
+        
+        Args:
+            get_analyzer: Returns the ConversationAnalyzer that runs the windows
+            on_item: Called with (field, value) for each result item, as in
+                ConversationAnalyzer.analyze_transcript
+        """
+        self.get_analyzer = get_analyzer
+        self.on_item = on_item
+        self._analyzer = None
+        self._executor = None
+        self._chunks = {}
+        self._windows = {}
+
+    @property
+    def started(self) -> bool:
+        """Whether any chunk has been added."""
+        return bool(self._chunks)
+
+    def add_chunk(self, index: int, count: int, chunk_transcript: str) -> None:
+        """Add a transcribed chunk (chunks may arrive in any order).
+        
+        Args:
+            index: Position of the chunk in the recording, from 0
+            count: Number of chunks in the recording
+            chunk_transcript: The chunk's formatted transcript, with
+                timestamps relative to the whole recording
+        """
+        if self._analyzer is None:
+            self._analyzer = self.get_analyzer()
+        self._chunks[index] = chunk_transcript
+        if self._windows:
+            self._submit(index, count, chunk_transcript)
+        elif count > 1 and len(self._analyzer.split_windows(self._transcript())) > 1:
+            # The transcript won't fit one window, so start on every chunk received so far
+            self._executor = ThreadPoolExecutor(max_workers=self._analyzer.max_workers)
+            self._on_moment = _only_moments(self.on_item)
+            for received_index, received in sorted(self._chunks.items()):
+                self._submit(received_index, count, received)
+
+    def _submit(self, index: int, count: int, chunk_transcript: str) -> None:
+        """Analyze the windows of one chunk in the background."""
+        note = f"This is part {index + 1} of {count} of a longer conversation."
+        for window_index, window in enumerate(self._analyzer.split_windows(chunk_transcript)):
+            self._windows[(index, window_index)] = self._executor.submit(
+                self._analyzer._analyze_window, window, note, self._on_moment
+            )
+
+    def _transcript(self) -> str:
+        """The chunks received so far, joined in recording order."""
+        return "\n".join(self._chunks[index] for index in sorted(self._chunks))
+
+    def finish(self) -> dict:
+        """Analyze the transcript, or wait for its windows and merge them.
+        
+        Returns:
+            dict: Analysis results in the same schema as analyze_transcript
+        
+        Raises:
+            ValueError: If no chunk was added
+        """
+        if not self._chunks:
+            raise ValueError("No transcript chunks were added")
+        if not self._windows:
+            return self._analyzer.analyze_transcript(self._transcript(), self.on_item)
+        print(f"Merging {len(self._windows)} transcript windows analyzed during transcription...")
+        with span("analyze", windows=len(self._windows), tier=TIER_MAP_REDUCE, overlapped=True):
+            partial_results = [self._windows[key].result() for key in sorted(self._windows)]
+            result = self._analyzer._reduce(partial_results)
+            emit_items(result, self.on_item, ('action_items', 'overall_summary'))
+            return _with_tier(result, TIER_MAP_REDUCE, self._analyzer.model)
+
+    def close(self) -> None:
+        """Stop the background windows; queued ones are cancelled."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+def analysis_cache_key(formatted_transcript: str, model: str, reduce_model: str,
+                       temperature: float, merge_seconds: float = 0.0, small_model: str | None = None,
+                       small_max_tokens: int = 0, small_max_segments: int = 0) -> str:
+    """Return the analysis cache key for a transcript analyzed with these settings.
+    
+    The key covers the transcript content, PROMPT_VERSION, the models the
+    transcript is routed to (small_model for short transcripts, otherwise
+    model and reduce_model), the temperature and the segment merging of the
+    compact transcript encoding. Moving a routing threshold only changes
+    the keys of the transcripts that change tier.
+    """
+    version = f"{PROMPT_VERSION}+merge{merge_seconds:g}" if merge_seconds else PROMPT_VERSION
+    if small_model and is_short_transcript(formatted_transcript, small_max_tokens, small_max_segments):
+        models = small_model
+    else:
+        models = f"{model}+{reduce_model}"
+    return get_analysis_cache_key(formatted_transcript, version, models, temperature)
+
+def is_short_transcript(formatted_transcript: str, max_tokens: int, max_segments: int) -> bool:
+    """Whether a transcript is within both the token and the segment limit of the small tier."""
+    tokens, segments = transcript_size(formatted_transcript)
+    return tokens <= max_tokens and segments <= max_segments
+
+def transcript_size(formatted_transcript: str) -> tuple[int, int]:
+    """Return a formatted transcript's approximate token count and its number of segments (lines)."""
+    segments = sum(1 for line in formatted_transcript.splitlines() if line.strip())
+    return estimate_tokens(formatted_transcript), segments
+
+def emit_items(results: dict, on_item: ItemCallback | None, fields: tuple = STREAMED_FIELDS) -> None:
+    """Pass the items of a finished analysis to on_item, as streaming would have.
+    
+    Args:
+        results: Analysis results
+        on_item: Item callback, or None to do nothing
+        fields: Which of action_items, key_moments and overall_summary to emit
+    """
+    if on_item is None:
+        return
+    for field in fields:
+        if field == 'overall_summary':
+            on_item(field, results.get(field, ''))
+        else:
+            for item in results.get(field, []):
+                on_item(field, item)
+
+def _emit_events(events: list, on_item: ItemCallback) -> None:
+    """Pass the parser events for result items to on_item."""
+    for path, value in events:
+        if len(path) == 2 and path[0] in ('action_items', 'key_moments'):
+            on_item(path[0], value)
+        elif path == ('overall_summary',):
+            on_item('overall_summary', value)
+
+def _only_moments(on_item: ItemCallback | None) -> ItemCallback | None:
+    """Wrap on_item to pass on only key moments, one call at a time.
+    
+    Used for map-reduce windows, whose action items and summaries aren't
+    final until the reduce step; windows run concurrently, hence the lock.
+    """
+    if on_item is None:
+        return None
+    lock = Lock()
+
+    def on_moment(field: str, value) -> None:
+        if field == 'key_moments':
+            with lock:
+                on_item(field, value)
+    return on_moment
+
+def _streaming(request: dict) -> dict:
+    """Turn chat completion arguments into a streaming request that reports usage."""
+    return {**request, 'stream': True, 'stream_options': {'include_usage': True}}
+
+def _chunk_text(chunk) -> str:
+    """Return the text a streamed chunk adds (the usage chunk has no choices)."""
+    if not chunk.choices:
+        return ""
+    return chunk.choices[0].delta.content or ""
+
+def _streamed_result(parser: IncrementalJSONParser) -> dict:
+    """Return a streamed analysis, falling back to an empty result on bad JSON."""
+    try:
+        return parser.result()
+    except Exception as e:
+        print(f"Error parsing analysis results: {e}")
+        print(f"Raw content: {parser.text}")
+        return _error_result()
+
+def _moment_sort_key(moment) -> tuple[bool, float]:
+    """Sort key placing key moments by timestamp, untimed ones last."""
+    try:
+        return (False, parse_timestamp(moment['timestamp']))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return (True, 0.0)
+
+def _error_result() -> dict:
+    """Return the empty result used when an analysis can't be parsed."""
+    return {
+        "action_items": [],
+        "overall_summary": ANALYSIS_ERROR_SUMMARY,
+        "key_moments": []
+    }
+
+def _record_usage(current, response) -> None:
+    """Record the prompt and completion tokens a chat completion used.
+    
+    Prompt tokens served from the provider's prompt cache are recorded as
+    cached_prompt_tokens and the rest as uncached_prompt_tokens. Prompts
+    under 1024 tokens are never cached, so for them cached_prompt_tokens
+    is always 0.
+    """
+    usage = getattr(response, 'usage', None)
+    for name in ('prompt_tokens', 'completion_tokens'):
+        value = getattr(usage, name, None)
+        if isinstance(value, int):
+            current.set(**{name: value})
+    prompt_tokens = getattr(usage, 'prompt_tokens', None)
+    cached_tokens = getattr(getattr(usage, 'prompt_tokens_details', None), 'cached_tokens', None)
+    if isinstance(prompt_tokens, int):
+        cached_tokens = cached_tokens if isinstance(cached_tokens, int) else 0
+        current.set(cached_prompt_tokens=cached_tokens, uncached_prompt_tokens=prompt_tokens - cached_tokens)
+
+def _with_tier(result: dict, tier: str, model: str | None) -> dict:
+    """Record the model tier and the (window) model that produced an analysis."""
+    return {**result, 'model_tier': tier, 'analysis_model': model}
+
+def _size_attributes(formatted_transcript: str, tier: str) -> dict:
+    """Span attributes for tuning the routing cutoffs: tier, transcript tokens and segments."""
+    tokens, segments = transcript_size(formatted_transcript)
+    return {'tier': tier, 'transcript_tokens': tokens, 'segments': segments}
+
+def _window_notes(count: int) -> list[str]:
+    """Return the prompt note telling the model which part of the conversation it sees."""
+    return [f"This is part {index} of {count} of a longer conversation." for index in range(1, count + 1)]
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the token count of text (about 4 characters per token)."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def compact_transcript(formatted_transcript: str, merge_seconds: float = 0.0,
+                       max_tokens: int | None = None) -> str:
+    """Encode a formatted transcript in fewer tokens for the analysis prompt.
+    
+    Runs of whitespace are collapsed, the brackets around each timestamp are
+    dropped and consecutive segments that start within merge_seconds of a
+    line's first segment are joined onto that line, which keeps the first
+    timestamp. If the result is over max_tokens but merging more coarsely
+    (doubling merge_seconds, up to MAX_MERGE_SECONDS) brings it within
+    budget, the finest such merge is used, so a transcript just over the
+    window budget is analyzed in one call instead of map-reduce.
+    
+    Args:
+        formatted_transcript: The transcript text with one "[MM:SS] text" segment per line
+        merge_seconds: Span of the segments merged onto one line; 0 keeps
+            one line per segment
+        max_tokens: Approximate token budget to merge towards, or None
+    
+    Returns:
+        str: The transcript as "MM:SS text" lines
+    """
+    segments = []
+    for line in formatted_transcript.splitlines():
+        text = " ".join(line.split())
+        match = SEGMENT_LINE.match(text)
+        if match:
+            if match.group(2):
+                segments.append((match.group(1), parse_timestamp(match.group(1)), match.group(2)))
+        elif text:
+            segments.append((None, None, text))
+    compacted = "\n".join(_merge_segments(segments, merge_seconds))
+    if merge_seconds <= 0 or max_tokens is None or estimate_tokens(compacted) <= max_tokens:
+        return compacted
+    while merge_seconds < MAX_MERGE_SECONDS:
+        merge_seconds = min(merge_seconds * 2, MAX_MERGE_SECONDS)
+        widened = "\n".join(_merge_segments(segments, merge_seconds))
+        if estimate_tokens(widened) <= max_tokens:
+            return widened
+    return compacted
+
+def _merge_segments(segments: list[tuple], merge_seconds: float) -> list[str]:
+    """Join consecutive (timestamp, seconds, text) segments into lines spanning under merge_seconds."""
+    lines, line_start = [], None
+    for timestamp, seconds, text in segments:
+        if line_start is not None and seconds is not None and seconds - line_start < merge_seconds:
+            lines[-1] += " " + text
+        elif timestamp is None:
+            lines.append(text)
+            line_start = None
+        else:
+            lines.append(f"{timestamp} {text}")
+            line_start = seconds
+    return lines
+
+def split_transcript_windows(formatted_transcript: str, max_tokens: int) -> list[str]:
+    """Split a formatted transcript into windows on segment (line) boundaries.
+    
+    Each window holds as many consecutive segments as fit in max_tokens; a
+    single segment longer than the budget gets a window of its own.
+    
+    Args:
+        formatted_transcript: The transcript text with one timestamped segment per line
+        max_tokens: Approximate token budget per window
+    
+    Returns:
+        list: Transcript windows, in order
+    """
+    windows = []
+    current, current_tokens = [], 0
+    for line in formatted_transcript.splitlines():
+        line_tokens = estimate_tokens(line)
+        if current and current_tokens + line_tokens > max_tokens:
+            windows.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += line_tokens
+    if current:
+        windows.append("\n".join(current))
+    return windows
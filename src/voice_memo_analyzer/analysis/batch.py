@@ -0,0 +1,186 @@
+"""Conversation analysis through the OpenAI Batch API.
+
+For backfills that don't need interactive latency, BatchAnalysis writes
+the chat completion requests for many transcripts to one JSONL file,
+submits it as a batch job, polls until the job is done and parses the
+output into the same analyses analyze_transcript returns. Batch requests
+cost half as much and don't count against the interactive rate limits, in
+exchange for finishing within the completion window instead of seconds.
+
+Transcripts analyzed map-reduce style take a second batch for the reduce
+steps, submitted once their windows are back.
+"""
+
+import hashlib
+import json
+import time
+from typing import TYPE_CHECKING
+from ..utils.cache import clear_batch_job, get_batch_job, save_batch_job
+from ..utils.instrumentation import span
+from .analyzer import ConversationAnalyzer
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+FINISHED_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+class BatchAnalysis:
+    """Analyzes many transcripts in Batch API jobs.
+    
+    Each transcript is routed and split into windows exactly as
+    ConversationAnalyzer.analyze_transcript would, so the results (and
+    their cache keys) are interchangeable with interactive ones.
+    """
+
+    def __init__(self, analyzer: ConversationAnalyzer, poll_seconds: float = 60.0,
+                 completion_window: str = "24h"):
+        """Initialize with the analyzer whose client, models and prompts are used.
+        
+        Args:
+            analyzer: Builds the requests and parses the responses
+            poll_seconds: Seconds between batch status checks
+            completion_window: How long the provider may take to run a batch
+        """
+        self.analyzer = analyzer
+        self.poll_seconds = poll_seconds
+        self.completion_window = completion_window
+
+    @property
+    def client(self) -> "OpenAI":
+        """The analyzer's OpenAI client."""
+        return self.analyzer.client
+
+    def analyze(self, transcripts: dict[str, str]) -> dict[str, dict]:
+        """Analyze formatted transcripts in one batch (two if any need a reduce step).
+        
+        Args:
+            transcripts: Formatted transcripts by any unique identifier
+        
+        Returns:
+            dict: Analysis results by the same identifiers, in the schema of
+            analyze_transcript; a transcript whose request failed gets the
+            error result, whose overall_summary is ANALYSIS_ERROR_SUMMARY
+        
+        Raises:
+            RuntimeError: If a batch fails, expires or is cancelled
+        """
+        plans = {key: self.analyzer.window_requests(transcript) for key, transcript in transcripts.items()}
+        ids = {key: str(number) for number, key in enumerate(plans)}
+        requests = {
+            f"{ids[key]}-{index}": request
+            for key, (_, _, window_requests) in plans.items()
+            for index, request in enumerate(window_requests)
+        }
+        print(f"Analyzing {len(plans)} transcripts in a batch of {len(requests)} requests...")
+        responses = self.run(requests)
+        partial_results = {
+            key: [self.analyzer._window_result(responses.get(f"{ids[key]}-{index}"))
+                  for index in range(len(window_requests))]
+            for key, (_, _, window_requests) in plans.items()
+        }
+        
+        reduce_requests = {
+            ids[key]: self.analyzer._reduce_request(results)
+            for key, results in partial_results.items() if len(results) > 1
+        }
+        reduced = {}
+        if reduce_requests:
+            print(f"Merging {len(reduce_requests)} map-reduce analyses in a second batch...")
+            reduced = self.run(reduce_requests)
+        return {
+            key: self.analyzer.combine_windows(tier, model, partial_results[key], reduced.get(ids[key]))
+            for key, (tier, model, _) in plans.items()
+        }
+
+    def run(self, requests: dict[str, dict]) -> dict:
+        """Submit chat completion requests as one batch and wait for the responses.
+        
+        The batch ID is saved in the cache under the hash of its input, so
+        if this process stops while waiting, running the same requests again
+        waits for the submitted batch instead of paying for a second one.
+        
+        Args:
+            requests: Chat completion arguments by custom ID
+        
+        Returns:
+            dict: ChatCompletion responses by custom ID; requests that
+            failed are missing
+        
+        Raises:
+            RuntimeError: If the batch fails, expires or is cancelled
+        """
+        payload = batch_jsonl(requests)
+        input_hash = hashlib.sha256(payload).hexdigest()
+        with span("analysis.batch", requests=len(requests), bytes_sent=len(payload)) as current:
+            submitted = get_batch_job(input_hash)
+            if submitted is None:
+                input_file = self.client.files.create(file=("analysis_batch.jsonl", payload), purpose="batch")
+                batch = self.client.batches.create(
+                    input_file_id=input_file.id, endpoint=BATCH_ENDPOINT, completion_window=self.completion_window
+                )
+                save_batch_job(input_hash, batch.id, len(requests))
+                print(f"Submitted batch {batch.id}")
+            else:
+                batch = self.client.batches.retrieve(submitted['batch_id'])
+                print(f"Waiting for batch {batch.id}, submitted {submitted['submitted']}")
+            
+            batch = self._wait(batch)
+            if batch.status != "completed":
+                clear_batch_job(input_hash)
+                raise RuntimeError(f"Batch {batch.id} {batch.status}")
+            responses = {}
+            if batch.output_file_id:
+                responses = parse_batch_output(self.client.files.content(batch.output_file_id).text)
+            clear_batch_job(input_hash)
+            if len(responses) < len(requests):
+                print(f"{len(requests) - len(responses)} of {len(requests)} batch requests failed")
+            current.set(failed=len(requests) - len(responses), **_usage_totals(responses.values()))
+            return responses
+
+    def _wait(self, batch):
+        """Poll a batch until it has finished, printing its progress."""
+        while batch.status not in FINISHED_STATUSES:
+            counts = batch.request_counts
+            done = f", {counts.completed + counts.failed} of {counts.total} requests done" if counts else ""
+            print(f"Batch {batch.id} is {batch.status}{done}")
+            time.sleep(self.poll_seconds)
+            batch = self.client.batches.retrieve(batch.id)
+        return batch
+
+def batch_jsonl(requests: dict[str, dict]) -> bytes:
+    """Encode chat completion arguments as a Batch API input file, one request per line."""
+    return "".join(
+        json.dumps({'custom_id': custom_id, 'method': "POST", 'url': BATCH_ENDPOINT, 'body': request}) + "\n"
+        for custom_id, request in requests.items()
+    ).encode()
+
+def parse_batch_output(text: str) -> dict:
+    """Parse a Batch API output file into ChatCompletion responses by custom ID.
+    
+    Lines whose request failed are left out.
+    """
+    from openai.types.chat import ChatCompletion
+    
+    responses = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get('response') or {}
+        if response.get('status_code') == 200:
+            responses[record['custom_id']] = ChatCompletion.model_validate(response['body'])
+    return responses
+
+def _usage_totals(responses) -> dict:
+    """Sum the prompt, cached prompt and completion tokens of batch responses."""
+    totals = {'prompt_tokens': 0, 'cached_prompt_tokens': 0, 'completion_tokens': 0}
+    for response in responses:
+        usage = response.usage
+        if usage is None:
+            continue
+        totals['prompt_tokens'] += usage.prompt_tokens
+        totals['completion_tokens'] += usage.completion_tokens
+        details = usage.prompt_tokens_details
+        totals['cached_prompt_tokens'] += (details.cached_tokens or 0) if details else 0
+    return totals
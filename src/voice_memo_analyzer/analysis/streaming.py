@@ -0,0 +1,160 @@
+"""Incremental parsing of a streamed JSON analysis.
+
+The analysis prompt asks for one JSON object whose values are a summary
+string and arrays of action items and key moments. IncrementalJSONParser is
+fed the completion text as it arrives and reports each top-level value, and
+each element of a top-level array, as soon as its closing character has
+been received, so items can be shown while the model is still generating.
+"""
+
+import json
+
+class IncrementalJSONParser:
+    """Finds complete values in a JSON object that is still being received.
+    
+    Anything before the first '{' (such as a ```json code fence) and after
+    the matching '}' is ignored.
+    
+        parser = IncrementalJSONParser()
+        for chunk in chunks:
+            for path, value in parser.feed(chunk):
+                ...  # path is ('action_items', 0), ('overall_summary',), ...
+        result = parser.result()
+    """
+
+    def __init__(self):
+        """Initialize an empty parser."""
+        self.text = ""
+        self._position = 0
+        self._object_start = None
+        self._object_end = None
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._key_start = None
+        self._key = None
+        self._index = 0
+        # Depth (1: top-level value, 2: array element) -> where its text starts
+        self._value_starts = {}
+        self._scalar_depth = None
+        self.error = None
+
+    @property
+    def done(self) -> bool:
+        """Whether the top-level object has been closed."""
+        return self._object_end is not None
+
+    def feed(self, chunk: str) -> list[tuple[tuple, object]]:
+        """Add received text and return the values it completed.
+        
+        Args:
+            chunk: The next piece of the completion
+        
+        Returns:
+            list: (path, value) pairs in document order, where path is
+            (key,) for a top-level value or (key, index) for an element of
+            a top-level array; once a value fails to parse, error is set
+            and nothing more is returned
+        """
+        self.text += chunk
+        events = []
+        if self.error is not None:
+            return events
+        text = self.text
+        try:
+            while self._position < len(text) and not self.done:
+                position = self._position
+                char = text[position]
+                self._position += 1
+            
+                if self._object_start is None:
+                    if char == "{":
+                        self._object_start = position
+                        self._stack.append(char)
+                        self._expect_key = True
+                    continue
+                
+                if self._in_string:
+                    if self._escape:
+                        self._escape = False
+                    elif char == "\\":
+                        self._escape = True
+                    elif char == '"':
+                        self._in_string = False
+                        if self._key_start is not None:
+                            self._key = json.loads(text[self._key_start:position + 1])
+                            self._key_start = None
+                            self._index = 0
+                        else:
+                            self._complete(len(self._stack), position + 1, events)
+                    continue
+                
+                depth = len(self._stack)
+                if self._scalar_depth is not None and (char in ",}]" or char.isspace()):
+                    self._complete(self._scalar_depth, position, events)
+                    self._scalar_depth = None
+                
+                if char == '"':
+                    self._in_string = True
+                    if depth == 1 and self._expect_key:
+                        self._key_start = position
+                    else:
+                        self._start(depth, position)
+                elif char in "{[":
+                    self._start(depth, position)
+                    self._stack.append(char)
+                elif char in "}]":
+                    self._stack.pop()
+                    self._complete(len(self._stack), position + 1, events)
+                    if not self._stack:
+                        self._object_end = position + 1
+                elif depth == 1 and char == ":":
+                    self._expect_key = False
+                elif depth == 1 and char == ",":
+                    self._expect_key = True
+                elif not char.isspace() and char not in ",:" and self._scalar_depth is None:
+                    if self._start(depth, position):
+                        self._scalar_depth = depth
+        except json.JSONDecodeError as e:
+            # A malformed value (say an unquoted 01:23): report nothing more
+            # and let result() fail, as a non-streamed response would
+            self.error = e
+        return events
+
+    def _tracked(self, depth: int) -> bool:
+        """Whether a value starting at this depth is reported."""
+        if depth == 1:
+            return not self._expect_key
+        return depth == 2 and self._stack[1] == "["
+
+    def _start(self, depth: int, position: int) -> bool:
+        """Remember where a reported value starts; return whether it is reported."""
+        if self._tracked(depth) and depth not in self._value_starts:
+            self._value_starts[depth] = position
+            return True
+        return False
+
+    def _complete(self, depth: int, end: int, events: list) -> None:
+        """Report the value at depth that ends at end, if it is being tracked."""
+        start = self._value_starts.pop(depth, None)
+        if start is None:
+            return
+        value = json.loads(self.text[start:end])
+        if depth == 1:
+            events.append(((self._key,), value))
+        else:
+            events.append(((self._key, self._index), value))
+            self._index += 1
+
+    def result(self) -> dict:
+        """Parse the complete object.
+        
+        Raises:
+            ValueError: If the object hasn't been closed or isn't valid JSON
+        """
+        if self.error is not None:
+            raise ValueError(f"Malformed JSON in streamed response: {self.error}")
+        if not self.done:
+            raise ValueError("Incomplete JSON object in streamed response")
+        return json.loads(self.text[self._object_start:self._object_end])
@@ -4,17 +4,43 @@ This module contains the main VoiceMemoAnalyzer class that coordinates the entir
 analysis process, from audio conversion to transcription and analysis.
 """
 
+import asyncio
 import json
+import tempfile
+from functools import cached_property
 from pathlib import Path
-from openai import OpenAI
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING
 
-from .config import TRANSCRIPT_DIR, RESULTS_DIR
-from .utils.audio import prepare_audio_file
-from .utils.cache import get_file_hash, get_from_cache, save_to_cache
+from .config import (
+    TRANSCRIPT_DIR, RESULTS_DIR, TRANSCRIPTION_CHUNK_SECONDS, TRANSCRIPTION_WORKERS, TRIM_SILENCE,
+    ENCODING_PROFILE, ANALYSIS_WINDOW_TOKENS, ANALYSIS_WORKERS, ANALYSIS_MODEL,
+    ANALYSIS_REDUCE_MODEL, ANALYSIS_TEMPERATURE, CACHE_MAX_BYTES, CACHE_MAX_AGE_DAYS,
+    OPENAI_REQUESTS_PER_MINUTE, OPENAI_TOKENS_PER_MINUTE, OPENAI_MAX_RETRIES, OPENAI_MAX_CONNECTIONS,
+    SEMANTIC_SEARCH, SEMANTIC_INDEX_DIR, EMBEDDING_MODEL, OVERLAP_ANALYSIS, RESUMABLE_TRANSCRIPTION,
+    ANALYSIS_MERGE_SECONDS, ANALYSIS_SMALL_MODEL, ANALYSIS_SMALL_MAX_TOKENS, ANALYSIS_SMALL_MAX_SEGMENTS,
+    FINGERPRINT_REUSE, FINGERPRINT_MIN_MATCHES, FINGERPRINT_MIN_COVERAGE
+)
+from .utils.audio import decode_to_pcm, get_encoding_profile, prepare_audio_file
+from .utils.cache import (
+    get_file_hash, get_from_cache, get_cached_transcript, save_to_cache, get_flight,
+    get_analysis_from_cache, save_analysis_to_cache, track_file, prune_cache
+)
+from .utils.instrumentation import span
 from .utils.markdown import format_results_as_markdown
-from .transcription.transcriber import Transcriber
-from .analysis.analyzer import ConversationAnalyzer
+from .utils.scheduler import RateLimitScheduler, create_async_client
+from .utils.search import get_search_index
+from .utils.singleflight import atomic_write_text
+from .transcription.model import CompactTranscript
+from .transcription.reuse import TranscriptReuse, plan_reuse, write_gap_audio
+from .transcription.transcriber import ChunkCallback, Transcriber
+from .analysis.analyzer import (
+    ConversationAnalyzer, RollingAnalysis, ANALYSIS_ERROR_SUMMARY, ItemCallback, analysis_cache_key, emit_items
+)
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+    from .utils.fingerprint import Fingerprint
+    from .utils.semantic import SemanticIndex
 
 class VoiceMemoAnalyzer:
     """Main class for analyzing voice memos.
@@ -29,32 +55,136 @@ class VoiceMemoAnalyzer:
     uses caching to avoid reprocessing the same audio files multiple times.
     """
 
-    def __init__(self):
-        """Initialize the analyzer with OpenAI client and required components.
+    def __init__(self, trim_silence: bool = TRIM_SILENCE, encoding_profile: str = ENCODING_PROFILE,
+                 semantic_search: bool = SEMANTIC_SEARCH, overlap_analysis: bool = OVERLAP_ANALYSIS,
+                 reuse_near_duplicates: bool = FINGERPRINT_REUSE):
+        """Initialize the analyzer settings.
         
-        Sets up the OpenAI client using credentials from .env file and
-        initializes the transcriber and analyzer components.
+        The OpenAI clients (using credentials from the .env file), the
+        transcriber and the analyzer components are created on first use.
+        The async client and its rate-limit scheduler are shared by every
+        async job.
+        
+        Args:
+            trim_silence: Detect speech and upload only the speech regions,
+                mapping timestamps back to the original recording
+            encoding_profile: Name of the ENCODING_PROFILES entry used to
+                prepare audio for upload
+            semantic_search: Add each memo's segments, key moments and
+                action items to the semantic index after analysis
+            overlap_analysis: Analyze each transcribed chunk of a long
+                recording while the remaining chunks are still transcribing
+            reuse_near_duplicates: Fingerprint each recording before
+                transcribing it and reuse the transcript of an earlier
+                recording of the same audio, transcribing only the parts
+                it doesn't cover
         
         Raises:
-            ValueError: If OPENAI_API_KEY is not found in environment variables
+            ValueError: If the encoding profile is unknown
         """
+        get_encoding_profile(encoding_profile)
+        self.trim_silence = trim_silence
+        self.encoding_profile = encoding_profile
+        self.semantic_search = semantic_search
+        self.overlap_analysis = overlap_analysis
+        self.reuse_near_duplicates = reuse_near_duplicates
+        self.analysis_model = ANALYSIS_MODEL
+        self.reduce_model = ANALYSIS_REDUCE_MODEL
+        self.temperature = ANALYSIS_TEMPERATURE
+        self.merge_seconds = ANALYSIS_MERGE_SECONDS
+        self.small_model = ANALYSIS_SMALL_MODEL
+        self.small_max_tokens = ANALYSIS_SMALL_MAX_TOKENS
+        self.small_max_segments = ANALYSIS_SMALL_MAX_SEGMENTS
+    
+    # The clients and the components that use them are built on first use, so
+    # a run served entirely from the cache never imports or configures openai.
+
+    @cached_property
+    def client(self) -> "OpenAI":
+        """The OpenAI client, created from the .env credentials on first use."""
+        from dotenv import load_dotenv
+        from openai import OpenAI
+        load_dotenv()
+        return OpenAI()
+
+    @cached_property
+    def async_client(self) -> "AsyncOpenAI":
+        """The pooled AsyncOpenAI client shared by every async job."""
+        from dotenv import load_dotenv
         load_dotenv()
-        self.client = OpenAI()
-        self.transcriber = Transcriber(self.client)
-        self.analyzer = ConversationAnalyzer(self.client)
+        return create_async_client(max_connections=OPENAI_MAX_CONNECTIONS)
+
+    @cached_property
+    def scheduler(self) -> RateLimitScheduler:
+        """The rate-limit scheduler shared by every async job."""
+        return RateLimitScheduler(
+            requests_per_minute=OPENAI_REQUESTS_PER_MINUTE,
+            tokens_per_minute=OPENAI_TOKENS_PER_MINUTE,
+            max_retries=OPENAI_MAX_RETRIES
+        )
 
-    def analyze_audio(self, file_path: str | Path) -> dict:
+    @cached_property
+    def transcriber(self) -> Transcriber:
+        """The Transcriber, wired to the shared clients and scheduler."""
+        return Transcriber(
+            self.client,
+            chunk_seconds=TRANSCRIPTION_CHUNK_SECONDS,
+            max_workers=TRANSCRIPTION_WORKERS,
+            async_client=self.async_client,
+            scheduler=self.scheduler,
+            checkpoint=RESUMABLE_TRANSCRIPTION
+        )
+
+    @cached_property
+    def analyzer(self) -> ConversationAnalyzer:
+        """The ConversationAnalyzer, wired to the shared clients and scheduler."""
+        return ConversationAnalyzer(
+            self.client,
+            max_window_tokens=ANALYSIS_WINDOW_TOKENS,
+            max_workers=ANALYSIS_WORKERS,
+            reduce_model=self.reduce_model,
+            model=self.analysis_model,
+            temperature=self.temperature,
+            async_client=self.async_client,
+            scheduler=self.scheduler,
+            merge_seconds=self.merge_seconds,
+            small_model=self.small_model,
+            small_max_tokens=self.small_max_tokens,
+            small_max_segments=self.small_max_segments
+        )
+
+    @cached_property
+    def semantic_index(self) -> "SemanticIndex":
+        """The semantic index, embedding with the OpenAI client."""
+        from .utils.semantic import SemanticIndex, openai_embedder
+        return SemanticIndex(SEMANTIC_INDEX_DIR, openai_embedder(self.client, EMBEDDING_MODEL), EMBEDDING_MODEL)
+
+    def analysis_cache_key(self, formatted_transcript: str) -> str:
+        """Return the analysis cache key for a transcript, without building any client."""
+        return analysis_cache_key(
+            formatted_transcript, self.analysis_model, self.reduce_model, self.temperature, self.merge_seconds,
+            self.small_model, self.small_max_tokens, self.small_max_segments
+        )
+
+    def analyze_audio(self, file_path: str | Path, reanalyze: bool = False,
+                      on_item: ItemCallback | None = None) -> dict:
         """Analyze an audio file and return structured results.
         
         Processes an audio file through the following steps:
         1. Converts to MP3 if needed
         2. Checks cache for existing results
-        3. Transcribes audio if not cached
-        4. Analyzes transcript for key information
+        3. Transcribes audio if not cached; with overlap_analysis, each
+           chunk is analyzed as soon as it is transcribed
+        4. Analyzes transcript for key information, unless an analysis of the
+           same transcript with the same prompt and model settings is cached
         5. Saves results in both JSON and Markdown formats
         
         Args:
             file_path: Path to the audio file (m4a or mp3)
+            reanalyze: Ignore any cached analysis and call the model again
+            on_item: Called with (field, value) for each action item, key
+                moment and the summary as soon as it is available; the
+                analysis is streamed when this is given
         
         Returns:
             dict: Analysis results containing:
@@ -72,38 +202,18 @@ class VoiceMemoAnalyzer:
         file_path = Path(file_path)
         original_filename = file_path.name
 
-        # Convert or copy audio file if needed
-        original_path, mp3_path = prepare_audio_file(file_path)
+        # Hash once; the same hash names the staged audio and keys the cache
+        file_hash = get_file_hash(file_path)
+        
+        # Convert or stage audio file if needed
+        original_path, mp3_path = prepare_audio_file(file_path, self.encoding_profile, file_hash)
         
+        rolling = RollingAnalysis(lambda: self.analyzer, on_item) if self.overlap_analysis else None
         try:
-            # Check for cached transcript
-            transcript_path, cached_data = get_from_cache(original_path)
-            
-            if cached_data:
-                raw_transcript = cached_data['transcript']
-                formatted_transcript = cached_data['formatted_transcript']
-            else:
-                # Transcribe the audio
-                raw_transcript, formatted_transcript = self.transcriber.transcribe(mp3_path)
-
-                # Save transcript and update cache
-                transcript_filename = f"{Path(original_filename).stem}.txt"
-                transcript_path = TRANSCRIPT_DIR / transcript_filename
-                transcript_path.write_text(formatted_transcript)
-                
-                # Update cache
-                cache_data = {
-                    'transcript_path': str(transcript_path),
-                    'mp3_path': str(mp3_path),
-                    'transcript': raw_transcript,
-                    'formatted_transcript': formatted_transcript,
-                    'original_filename': original_filename
-                }
-                save_to_cache(cache_data, get_file_hash(original_path))
-                print(f"Transcript saved to: {transcript_path}")
-
-            # Analyze the transcript
-            analysis_results = self.analyzer.analyze_transcript(formatted_transcript)
+            raw_transcript, formatted_transcript = self.get_transcript(
+                original_path, mp3_path, file_hash, rolling.add_chunk if rolling else None
+            )
+            analysis_results = self.get_analysis(formatted_transcript, reanalyze, on_item, rolling)
             
             # Combine all results
             results = {
@@ -112,26 +222,442 @@ class VoiceMemoAnalyzer:
                 **analysis_results
             }
             
+            self.save_results(results, original_filename)
+            self.index_semantic(file_hash, original_filename, results)
+            return results
+            
+        except Exception as e:
+            print(f"Error processing file: {e}")
+            return {"error": str(e)}
+        finally:
+            if rolling is not None:
+                rolling.close()
+
+    async def analyze_audio_async(self, file_path: str | Path, reanalyze: bool = False,
+                                  on_item: ItemCallback | None = None) -> dict:
+        """Analyze an audio file using the async client.
+        
+        Runs the same steps as analyze_audio, with API calls made on the event
+        loop through the shared scheduler and blocking file and ffmpeg work
+        moved to threads, so many memos can be in flight at once.
+        
+        Args:
+            file_path: Path to the audio file (m4a or mp3)
+            reanalyze: Ignore any cached analysis and call the model again
+            on_item: Called with each result item as soon as it is available
+        
+        Returns:
+            dict: Analysis results, as returned by analyze_audio
+        """
+        file_path = Path(file_path)
+        original_filename = file_path.name
+        file_hash = await asyncio.to_thread(get_file_hash, file_path)
+        original_path, mp3_path = await asyncio.to_thread(
+            prepare_audio_file, file_path, self.encoding_profile, file_hash
+        )
+        
+        try:
+            cached_transcript = await asyncio.to_thread(self._cached_transcript, original_path, file_hash)
+            if cached_transcript:
+                raw_transcript, formatted_transcript = cached_transcript
+            else:
+                async def transcribe() -> tuple[str, str]:
+                    transcript = await self._transcribe_async(mp3_path, file_hash)
+                    await asyncio.to_thread(
+                        self._save_transcript, original_path, mp3_path, file_hash,
+                        transcript.raw_text, transcript.format(), transcript
+                    )
+                    return transcript.raw_text, transcript.format()
+                (raw_transcript, formatted_transcript), _ = await get_flight().run_async(
+                    f"transcript:{file_hash}", transcribe,
+                    lambda: self._cached_transcript(original_path, file_hash)
+                )
+            
+            analysis_key = self.analysis_cache_key(formatted_transcript)
+            analysis_results = None if reanalyze else await asyncio.to_thread(get_analysis_from_cache, analysis_key)
+            if analysis_results is None:
+                async def analyze() -> dict:
+                    results = await self.analyzer.analyze_transcript_async(formatted_transcript, on_item)
+                    if results.get('overall_summary') != ANALYSIS_ERROR_SUMMARY:
+                        await asyncio.to_thread(save_analysis_to_cache, results, analysis_key)
+                    return results
+                analysis_results, computed = await get_flight().run_async(
+                    f"analysis:{analysis_key}", analyze,
+                    None if reanalyze else lambda: get_analysis_from_cache(analysis_key)
+                )
+                if not computed:
+                    emit_items(analysis_results, on_item)
+            else:
+                emit_items(analysis_results, on_item)
+            
+            results = {
+                'transcript': raw_transcript,
+                'formatted_transcript': formatted_transcript,
+                **analysis_results
+            }
+            await asyncio.to_thread(self.save_results, results, original_filename)
+            await asyncio.to_thread(self.index_semantic, file_hash, original_filename, results)
+            return results
+        
+        except Exception as e:
+            print(f"Error processing file: {e}")
+            return {"error": str(e)}
+
+    def get_cached_results(self, file_path: str | Path, file_hash: str | None = None) -> dict | None:
+        """Return the cached results for an audio file, or None on any cache miss.
+        
+        Only the cache store is consulted: nothing is converted, uploaded or
+        written, and no OpenAI client is created.
+        
+        Args:
+            file_path: Path to the original audio file
+            file_hash: Content hash of the file, looked up if not given
+        
+        Returns:
+            dict: Results in the same shape as analyze_audio, or None if the
+            transcript or its analysis isn't cached
+        """
+        _, cached_data = get_from_cache(Path(file_path), file_hash)
+        if not cached_data:
+            return None
+        analysis_results = get_analysis_from_cache(
+            self.analysis_cache_key(cached_data['formatted_transcript'])
+        )
+        if analysis_results is None:
+            return None
+        return {
+            'transcript': cached_data['transcript'],
+            'formatted_transcript': cached_data['formatted_transcript'],
+            **analysis_results
+        }
+
+    def get_transcript(self, original_path: Path, mp3_path: Path, file_hash: str,
+                       on_chunk: ChunkCallback | None = None) -> tuple[str, str]:
+        """Return the transcript for an audio file, transcribing it on a cache miss.
+        
+        If another caller, in this process or another one, is already
+        transcribing the same audio, this waits for and reuses its transcript.
+        
+        Args:
+            original_path: Path to the original audio file
+            mp3_path: Path to the prepared audio that is uploaded for transcription
+            file_hash: Content hash of the original audio file
+            on_chunk: Called with each chunk's formatted transcript as it is
+                transcribed (not called when the transcript is cached)
+        
+        Returns:
+            tuple: (raw_transcript, formatted_transcript)
+        """
+        # Check for cached transcript
+        cached_transcript = self._cached_transcript(original_path, file_hash)
+        
+        if cached_transcript:
+            return cached_transcript
+        
+        def transcribe() -> tuple[str, str]:
+            transcript = self._transcribe(mp3_path, on_chunk, file_hash)
+            raw_transcript, formatted_transcript = transcript.raw_text, transcript.format()
+            self._save_transcript(
+                original_path, mp3_path, file_hash, raw_transcript, formatted_transcript, transcript
+            )
+            return raw_transcript, formatted_transcript
+        
+        # Transcribe the audio, unless someone else already is
+        transcript, _ = get_flight().run(
+            f"transcript:{file_hash}", transcribe, lambda: self._cached_transcript(original_path, file_hash)
+        )
+        return transcript
+
+    def _cached_transcript(self, original_path: Path, file_hash: str) -> tuple[str, str] | None:
+        """Return the cached (raw, formatted) transcript, or None on a cache miss."""
+        _, cached_data = get_from_cache(original_path, file_hash)
+        if not cached_data:
+            return None
+        return cached_data['transcript'], cached_data['formatted_transcript']
+        
+    def get_timings(self, file_path: str | Path, file_hash: str | None = None) -> CompactTranscript | None:
+        """Load the word and segment timings saved with a cached transcript.
+        
+        Args:
+            file_path: Path to the original audio file
+            file_hash: Content hash of the file, looked up if not given
+        
+        Returns:
+            CompactTranscript: The timings, or None if the transcript isn't
+            cached or was cached before timings were kept
+        """
+        if file_hash is None:
+            file_hash = get_file_hash(Path(file_path))
+        _, cached_data = get_from_cache(Path(file_path), file_hash)
+        return self._load_timings(file_hash, cached_data)
+
+    def _timings_path(self, file_hash: str) -> Path:
+        """Where the timings of a recording are saved, named by its content hash.
+        
+        Recordings that share a filename get separate sidecars, so one
+        memo's timings can never be loaded for another.
+        """
+        return TRANSCRIPT_DIR / f"{file_hash}.timings"
+
+    def _load_timings(self, file_hash: str, cached_data: dict | None) -> CompactTranscript | None:
+        """Load the timings sidecar recorded in a transcript's cache entry.
+        
+        Entries written before sidecars were named by content hash point at
+        a file another recording of the same name may have overwritten, so
+        they are treated as having no timings.
+        """
+        timings_path = self._timings_path(file_hash)
+        if (cached_data or {}).get('timings_path') != str(timings_path) or not timings_path.exists():
+            return None
+        return CompactTranscript.load(timings_path)
+
+    def _transcribe(self, mp3_path: Path, on_chunk: ChunkCallback | None = None,
+                    file_hash: str | None = None) -> CompactTranscript:
+        """Transcribe the prepared audio, reusing a near-duplicate's transcript when possible.
+        
+        With reuse_near_duplicates on, the audio is fingerprinted first. If
+        an earlier recording of the same audio is found, its transcript is
+        reused and only the stretches it doesn't cover are uploaded. Either
+        way the fingerprint is then indexed under file_hash.
+        """
+        decoded = self._fingerprint(mp3_path) if self.reuse_near_duplicates and file_hash else None
+        reuse = self._find_reuse(decoded[1], file_hash) if decoded is not None else None
+        if reuse is None:
+            transcript = self._transcribe_audio(mp3_path, on_chunk)
+        else:
+            with tempfile.TemporaryDirectory() as gap_dir:
+                gap_responses = [
+                    self.transcriber.transcribe_compact(path).to_response()
+                    for path in write_gap_audio(decoded[0], reuse.gaps, Path(gap_dir))
+                ]
+            transcript = reuse.merge(gap_responses)
+            if on_chunk is not None:
+                on_chunk(0, 1, transcript.format())
+        if decoded is not None:
+            self._index_fingerprint(file_hash, decoded[1])
+        return transcript
+
+    def _transcribe_audio(self, mp3_path: Path, on_chunk: ChunkCallback | None = None) -> CompactTranscript:
+        """Transcribe the prepared audio, uploading only its speech when trimming is on."""
+        if not self.trim_silence:
+            return self.transcriber.transcribe_compact(mp3_path, on_chunk=on_chunk)
+        from .utils.vad import trim_to_speech
+        with tempfile.TemporaryDirectory() as trim_dir:
+            upload_path, offset_map = trim_to_speech(mp3_path, Path(trim_dir))
+            return self.transcriber.transcribe_compact(upload_path, offset_map=offset_map, on_chunk=on_chunk)
+
+    async def _transcribe_async(self, mp3_path: Path, file_hash: str | None = None) -> CompactTranscript:
+        """Async version of _transcribe; fingerprinting and index lookups run in a thread."""
+        decoded = None
+        if self.reuse_near_duplicates and file_hash:
+            decoded = await asyncio.to_thread(self._fingerprint, mp3_path)
+        reuse = await asyncio.to_thread(self._find_reuse, decoded[1], file_hash) if decoded is not None else None
+        if reuse is None:
+            transcript = await self._transcribe_audio_async(mp3_path)
+        else:
+            with tempfile.TemporaryDirectory() as gap_dir:
+                gap_paths = await asyncio.to_thread(
+                    write_gap_audio, decoded[0], reuse.gaps, Path(gap_dir)
+                )
+                gap_transcripts = await asyncio.gather(
+                    *(self.transcriber.transcribe_compact_async(path) for path in gap_paths)
+                )
+            transcript = reuse.merge([gap.to_response() for gap in gap_transcripts])
+        if decoded is not None:
+            await asyncio.to_thread(self._index_fingerprint, file_hash, decoded[1])
+        return transcript
+
+    async def _transcribe_audio_async(self, mp3_path: Path) -> CompactTranscript:
+        """Async version of _transcribe_audio; decoding and trimming run in a thread."""
+        if not self.trim_silence:
+            return await self.transcriber.transcribe_compact_async(mp3_path)
+        from .utils.vad import trim_to_speech
+        with tempfile.TemporaryDirectory() as trim_dir:
+            upload_path, offset_map = await asyncio.to_thread(trim_to_speech, mp3_path, Path(trim_dir))
+            return await self.transcriber.transcribe_compact_async(upload_path, offset_map=offset_map)
+
+    def _fingerprint(self, mp3_path: Path) -> "tuple[bytes, Fingerprint] | None":
+        """Decode and fingerprint the prepared audio.
+        
+        Returns:
+            tuple: (decoded PCM, fingerprint), or None if either step failed,
+            in which case the audio is simply transcribed
+        """
+        try:
+            from .utils.fingerprint import SAMPLE_RATE, fingerprint_pcm
+            pcm = decode_to_pcm(mp3_path, SAMPLE_RATE)
+            return pcm, fingerprint_pcm(pcm)
+        except Exception as e:
+            print(f"Fingerprinting failed: {e}")
+            return None
+
+    def _find_reuse(self, fingerprint: "Fingerprint", file_hash: str) -> TranscriptReuse | None:
+        """Look up a near-duplicate of a recording whose timed transcript can be reused.
+        
+        Args:
+            fingerprint: The new recording's fingerprint
+            file_hash: Content hash of the new recording, skipped in the index
+        
+        Returns:
+            TranscriptReuse: What to reuse and what to transcribe, or None if
+            no indexed recording covers FINGERPRINT_MIN_COVERAGE of this one
+            or the lookup failed, in which case the audio is simply transcribed
+        """
+        try:
+            from .utils.fingerprint import get_fingerprint_index
+        
+            with span("fingerprint.match", hit=False) as current:
+                index = get_fingerprint_index()
+                match = index.best_match(fingerprint, min_matches=FINGERPRINT_MIN_MATCHES, exclude=file_hash)
+                if match is None or match.end - match.start < FINGERPRINT_MIN_COVERAGE * fingerprint.duration:
+                    return None
+                cached = get_cached_transcript(match.file_hash)
+                timings = self._load_timings(match.file_hash, cached)
+                if timings is None:
+                    # The transcript was evicted (or predates timings), so the entry is no use
+                    index.remove(match.file_hash)
+                    return None
+                reuse = plan_reuse(timings, match, fingerprint.duration)
+                if reuse is None:
+                    return None
+                current.set(
+                    hit=True, matches=match.matches, reused_seconds=reuse.reused_seconds, gaps=len(reuse.gaps)
+                )
+        except Exception as e:
+            print(f"Fingerprint lookup failed: {e}")
+            return None
+        print(
+            f"Reusing the transcript of {cached['original_filename']} for {reuse.reused_seconds:.0f}s "
+            f"of {fingerprint.duration:.0f}s; transcribing {len(reuse.gaps)} uncovered stretches"
+        )
+        return reuse
+
+    def _index_fingerprint(self, file_hash: str, fingerprint: "Fingerprint") -> None:
+        """Add a transcribed recording's fingerprint to the index; failures are only reported."""
+        try:
+            from .utils.fingerprint import get_fingerprint_index
+            get_fingerprint_index().add(file_hash, fingerprint)
+        except Exception as e:
+            print(f"Fingerprint indexing failed: {e}")
+
+    def _save_transcript(self, original_path: Path, mp3_path: Path, file_hash: str,
+                         raw_transcript: str, formatted_transcript: str,
+                         transcript: CompactTranscript | None = None) -> None:
+        """Write the formatted transcript (and its timings sidecar) and cache it."""
+        original_filename = Path(original_path).name
+        transcript_filename = f"{Path(original_filename).stem}.txt"
+        transcript_path = TRANSCRIPT_DIR / transcript_filename
+        transcript_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(transcript_path, formatted_transcript)
+        
+        # Update cache
+        cache_data = {
+            'transcript_path': str(transcript_path),
+            'mp3_path': str(mp3_path),
+            'transcript': raw_transcript,
+            'formatted_transcript': formatted_transcript,
+            'original_filename': original_filename,
+            'encoding_profile': self.encoding_profile
+        }
+        if transcript is not None:
+            timings_path = self._timings_path(file_hash)
+            transcript.save(timings_path)
+            cache_data['timings_path'] = str(timings_path)
+            track_file(timings_path, "transcript")
+        save_to_cache(cache_data, file_hash)
+        get_search_index().index_transcript(
+            file_hash, original_filename, formatted_transcript, transcript_path
+        )
+        print(f"Transcript saved to: {transcript_path}")
+
+    def get_analysis(self, formatted_transcript: str, reanalyze: bool = False,
+                     on_item: ItemCallback | None = None, rolling: RollingAnalysis | None = None) -> dict:
+        """Analyze a transcript, reusing a cached analysis when possible.
+        
+        Args:
+            formatted_transcript: Transcript with [MM:SS] timestamps
+            reanalyze: Ignore any cached analysis and call the model again
+            on_item: Called with each result item as soon as it is available;
+                a cached analysis is replayed through it
+            rolling: Analysis already started on the transcript's chunks
+                during transcription; it is finished instead of analyzing
+                the transcript again
+        
+        Returns:
+            dict: Analysis results with action_items, overall_summary and key_moments
+        
+        If another caller is already analyzing the same transcript with the
+        same settings, this waits for its analysis and replays it to on_item.
+        """
+        analysis_key = self.analysis_cache_key(formatted_transcript)
+        analysis_results = None if reanalyze else get_analysis_from_cache(analysis_key)
+        if analysis_results is not None:
+            emit_items(analysis_results, on_item)
+            return analysis_results
+
+        def analyze() -> dict:
+            if rolling is not None and rolling.started:
+                results = rolling.finish()
+            else:
+                results = self.analyzer.analyze_transcript(formatted_transcript, on_item)
+            if results.get('overall_summary') != ANALYSIS_ERROR_SUMMARY:
+                save_analysis_to_cache(results, analysis_key)
+            return results
+        
+        analysis_results, computed = get_flight().run(
+            f"analysis:{analysis_key}", analyze,
+            None if reanalyze else lambda: get_analysis_from_cache(analysis_key)
+        )
+        if not computed:
+            emit_items(analysis_results, on_item)
+        return analysis_results
+
+    def save_results(self, results: dict, original_filename: str) -> None:
+        """Write the combined results as JSON and Markdown.
+        
+        Args:
+            results: Transcript and analysis results
+            original_filename: Name of the original audio file
+        """
+        with span("results.write") as current:
             # Save the analysis results
             analysis_filename = f"{Path(original_filename).stem}_analysis.json"
             analysis_path = TRANSCRIPT_DIR / analysis_filename
-            analysis_path.write_text(json.dumps(results, indent=2))
+            analysis_json = json.dumps(results, indent=2)
+            analysis_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(analysis_path, analysis_json)
+            track_file(analysis_path, "analysis")
             print(f"Analysis saved to: {analysis_path}")
-            
+        
             # Save markdown results
             markdown_content = format_results_as_markdown(results, original_filename)
             markdown_filename = f"{Path(original_filename).stem}_analysis.md"
             markdown_path = RESULTS_DIR / markdown_filename
-            markdown_path.write_text(markdown_content)
+            markdown_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(markdown_path, markdown_content)
             print(f"Markdown results saved to: {markdown_path}")
-            
-            return results
-            
+            current.set(bytes_written=len(analysis_json.encode()) + len(markdown_content.encode()))
+        
+        if CACHE_MAX_BYTES is not None or CACHE_MAX_AGE_DAYS is not None:
+            prune_cache(max_bytes=CACHE_MAX_BYTES, max_age_days=CACHE_MAX_AGE_DAYS)
+
+    def index_semantic(self, file_hash: str, original_filename: str, results: dict) -> None:
+        """Add a memo to the semantic index when semantic search is on.
+        
+        Indexing failures are reported but don't fail the analysis, whose
+        results are already saved.
+        """
+        if not self.semantic_search:
+            return
+        try:
+            with span("semantic.index") as current:
+                current.set(items=self.semantic_index.index_memo(
+                    file_hash, original_filename, results['formatted_transcript'], results
+                ))
         except Exception as e:
-            print(f"Error processing file: {e}")
-            return {"error": str(e)}
+            print(f"Semantic indexing failed: {e}")
 
-    def display_results(self, results: dict) -> None:
+    def display_results(self, results: dict, streamed: bool = False) -> None:
         """Display analysis results in a formatted way.
         
         Prints the analysis results to the console in a structured format,
@@ -145,6 +671,8 @@ class VoiceMemoAnalyzer:
                 - key_moments: List of important moments with timestamps
                 - formatted_transcript: Full transcript with timestamps
                 - error: Optional error message if processing failed
+            streamed: The analysis items were already shown by a
+                StreamingDisplay, so only the transcript is printed
         
         Returns:
             None
@@ -155,15 +683,48 @@ class VoiceMemoAnalyzer:
 
         print("\n=== Full Transcript ===")
         print(results['formatted_transcript'])
+        if streamed:
+            return
         
-        print("\n=== Key Moments ===")
+        print(f"\n=== {SECTION_TITLES['key_moments']} ===")
         for moment in results['key_moments']:
-            print(f"[{moment['timestamp']}] {moment['summary']}")
+            print(format_result_item('key_moments', moment))
         
-        print("\n=== Overall Summary ===")
-        print(results['overall_summary'])
+        print(f"\n=== {SECTION_TITLES['overall_summary']} ===")
+        print(format_result_item('overall_summary', results['overall_summary']))
 
-        print("\n=== Action Items ===")
+        print(f"\n=== {SECTION_TITLES['action_items']} ===")
         for item in results['action_items']:
-            print(f"• {item}")
+            print(format_result_item('action_items', item))
+
+SECTION_TITLES = {
+    'key_moments': "Key Moments",
+    'overall_summary': "Overall Summary",
+    'action_items': "Action Items"
+}
+
+def format_result_item(field: str, value) -> str:
+    """Format one action item, key moment or summary for the console."""
+    if field == 'key_moments':
+        return f"[{value['timestamp']}] {value['summary']}"
+    if field == 'action_items':
+        return f"• {value}"
+    return str(value)
+
+class StreamingDisplay:
+    """Prints analysis items as they stream in, in display_results' format.
+    
+    Pass an instance as on_item; a section header is printed whenever the
+    field changes.
+    """
+
+    def __init__(self):
+        """Initialize the display with no section open."""
+        self._field = None
 
+    def __call__(self, field: str, value) -> None:
+        """Print one item, opening its section first if needed."""
+        if field != self._field:
+            print(f"\n=== {SECTION_TITLES[field]} ===")
+            self._field = field
+        print(format_result_item(field, value))
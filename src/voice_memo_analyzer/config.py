@@ -10,7 +10,66 @@ TRANSCRIPT_DIR = DATA_DIR / "transcripts"
 CACHE_DIR = DATA_DIR / "cache"
 RESULTS_DIR = DATA_DIR / "results"
 
-# Ensure directories exist
+# Transcription settings
+ENCODING_PROFILE = "speech"  # archive, speech, opus or passthrough (see utils/audio.py)
+TRANSCRIPTION_CHUNK_SECONDS = 600  # Split recordings longer than this at silences
+TRANSCRIPTION_WORKERS = 4  # Chunks transcribed at the same time
+TRIM_SILENCE = False  # Upload only detected speech (needs numpy)
+RESUMABLE_TRANSCRIPTION = True  # Checkpoint each transcribed chunk so a failed run resumes where it stopped
+
+# Near-duplicate settings
+FINGERPRINT_REUSE = False  # Reuse transcripts of re-exported, re-encoded or trimmed copies of a memo (needs numpy)
+FINGERPRINT_INDEX_PATH = DATA_DIR / "fingerprints.sqlite3"  # Spectral peak hashes of every transcribed recording
+FINGERPRINT_MIN_MATCHES = 50  # Time-aligned hashes needed to call two recordings the same audio
+FINGERPRINT_MIN_COVERAGE = 0.5  # Fraction of a memo the match must span for its transcript to be reused
+
+# Analysis settings
+ANALYSIS_MODEL = "gpt-4o"
+ANALYSIS_REDUCE_MODEL = "gpt-4o-mini"  # Merges per-window results of long transcripts
+ANALYSIS_SMALL_MODEL = "gpt-4o-mini"  # Analyzes short memos; None sends every memo to ANALYSIS_MODEL
+ANALYSIS_SMALL_MAX_TOKENS = 1000  # Transcripts up to this many tokens (about five minutes of speech)...
+ANALYSIS_SMALL_MAX_SEGMENTS = 60  # ...and this many segments go to ANALYSIS_SMALL_MODEL
+ANALYSIS_TEMPERATURE = 0.3
+ANALYSIS_WINDOW_TOKENS = 12000  # Longer transcripts are analyzed map-reduce style
+ANALYSIS_MERGE_SECONDS = 15  # Segments this close are merged onto one prompt line; 0 keeps every segment
+ANALYSIS_WORKERS = 4  # Transcript windows analyzed at the same time
+OVERLAP_ANALYSIS = True  # Analyze each chunk of a transcript too long for one window while later chunks transcribe
+
+# Batch pipeline settings (workers per stage and memos queued between stages)
+BATCH_PREPARE_WORKERS = 2
+BATCH_TRANSCRIBE_WORKERS = 4
+BATCH_ANALYZE_WORKERS = 4
+BATCH_WRITE_WORKERS = 1
+BATCH_QUEUE_SIZE = 8
+BATCH_API_POLL_SECONDS = 60  # Status check interval for --batch --batch-api jobs
+
+# Async API settings, shared by every in-flight job
+OPENAI_REQUESTS_PER_MINUTE = 500
+OPENAI_TOKENS_PER_MINUTE = 30000
+OPENAI_MAX_RETRIES = 5  # Retries on 429/5xx with jittered exponential backoff
+OPENAI_MAX_CONNECTIONS = 20  # Size of the shared HTTP connection pool
+ASYNC_BATCH_CONCURRENCY = 8  # Memos processed at the same time by --batch --async
+
+# Watch-folder daemon settings
+WATCH_QUEUE_PATH = DATA_DIR / "watch_queue.sqlite3"  # Durable job queue
+WATCH_WORKERS = 2  # Memos processed at the same time
+WATCH_SETTLE_SECONDS = 5  # A file must be unchanged this long before it is queued
+WATCH_POLL_SECONDS = 2  # Scan interval when inotify isn't available
+WATCH_MAX_ATTEMPTS = 3  # Tries per memo before it is marked failed
+WATCH_RETRY_SECONDS = 60  # Wait before retrying a failed memo, doubled after each further failure
+METRICS_PORT = None  # Serve Prometheus metrics on this port while watching (None disables)
+
+# Cache eviction settings (None disables the limit)
+CACHE_MAX_BYTES = None  # Evict least-recently-used entries and files above this total size
+CACHE_MAX_AGE_DAYS = None  # Evict anything not used within this many days
+
+# Search settings
+SEARCH_INDEX_PATH = DATA_DIR / "search.sqlite3"  # Full-text index of every transcript segment
+SEMANTIC_INDEX_DIR = DATA_DIR / "semantic"  # Embedding matrix, id sidecar and item database
+SEMANTIC_SEARCH = False  # Embed segments, key moments and action items after each analysis (needs numpy)
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_BATCH_SIZE = 256  # Texts per embeddings API call
+SEMANTIC_COMPACT_FRACTION = 0.25  # Compact the embedding matrix once this share of its rows belong to replaced items (None to never)
+
+# Data directories, each created on first write rather than at import time
 REQUIRED_DIRS = [DATA_DIR, MP3_DIR, TRANSCRIPT_DIR, CACHE_DIR, RESULTS_DIR]
-for dir_path in REQUIRED_DIRS:
-    dir_path.mkdir(exist_ok=True)
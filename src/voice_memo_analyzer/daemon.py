@@ -0,0 +1,127 @@
+"""Watch-folder daemon that analyzes new voice memos as they appear.
+
+The daemon watches one directory, waits until a new or changed memo has
+stopped being written (its size and modification time are unchanged for
+settle_seconds), and records it in a durable JobQueue. A fixed number of
+worker threads take jobs from the queue and run them through
+VoiceMemoAnalyzer. Because the queue lives on disk, jobs interrupted by a
+crash or restart are picked up again and completed memos are not redone.
+"""
+
+import threading
+import time
+from pathlib import Path
+
+from .analyzer import VoiceMemoAnalyzer
+from .pipeline import AUDIO_SUFFIXES
+from .utils.job_queue import JobQueue
+from .utils.watcher import create_watcher, file_signature
+
+class WatchDaemon:
+    """Watches a directory and analyzes memos through a persistent queue."""
+
+    def __init__(self, analyzer: VoiceMemoAnalyzer, directory: Path, queue: JobQueue,
+                 workers: int = 2, settle_seconds: float = 5.0,
+                 poll_interval: float = 2.0, force_polling: bool = False):
+        """Initialize the daemon.
+        
+        Args:
+            analyzer: The VoiceMemoAnalyzer that processes each memo
+            directory: Directory to watch for m4a/mp3 files
+            queue: Durable queue the jobs are recorded in
+            workers: Memos processed at the same time
+            settle_seconds: How long a file must stay unchanged before it is queued
+            poll_interval: Seconds between scans when inotify isn't available
+            force_polling: Poll even when inotify is available
+        """
+        self.analyzer = analyzer
+        self.directory = Path(directory)
+        self.queue = queue
+        self.workers = workers
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.force_polling = force_polling
+        self._stop = threading.Event()
+        self._work_available = threading.Event()
+        # Files seen changing: path -> (last signature, when it last changed)
+        self._settling: dict[Path, tuple[tuple[int, int], float]] = {}
+
+    def run(self) -> None:
+        """Watch and process memos until stop() is called."""
+        resumed = self.queue.resume()
+        if resumed:
+            print(f"Resuming {resumed} interrupted jobs")
+        threads = [
+            threading.Thread(target=self._worker, name=f"watch-worker-{n}", daemon=True)
+            for n in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        
+        watcher = create_watcher(self.directory, self.poll_interval, self.force_polling)
+        print(f"Watching {self.directory} for new voice memos...")
+        try:
+            self._observe(self._audio_files(self.directory.iterdir()))
+            self._work_available.set()
+            while not self._stop.is_set():
+                self._observe(self._audio_files(watcher.wait(timeout=self.poll_interval)))
+                self._enqueue_settled()
+        finally:
+            watcher.close()
+            self._stop.set()
+            self._work_available.set()
+            for thread in threads:
+                thread.join()
+
+    def stop(self) -> None:
+        """Ask the daemon to stop; running jobs are finished first."""
+        self._stop.set()
+        self._work_available.set()
+
+    def _audio_files(self, paths) -> list[Path]:
+        """Keep only the m4a/mp3 files among paths."""
+        return [path for path in paths if Path(path).suffix.lower() in AUDIO_SUFFIXES]
+
+    def _observe(self, paths: list[Path]) -> None:
+        """Start (or restart) the settle timer for files that just changed."""
+        now = time.monotonic()
+        for path in paths:
+            signature = file_signature(path)
+            if signature is None:
+                self._settling.pop(path, None)
+            elif self._settling.get(path, (None,))[0] != signature:
+                self._settling[path] = (signature, now)
+
+    def _enqueue_settled(self) -> None:
+        """Queue files that haven't changed for settle_seconds."""
+        now = time.monotonic()
+        for path, (signature, changed_at) in list(self._settling.items()):
+            current = file_signature(path)
+            if current != signature:
+                # Still being written (or deleted); wait for it to settle again
+                self._observe([path])
+                continue
+            if now - changed_at >= self.settle_seconds:
+                del self._settling[path]
+                if self.queue.enqueue(path, *signature):
+                    print(f"Queued {path.name}")
+                    self._work_available.set()
+
+    def _worker(self) -> None:
+        """Process queued jobs until the daemon stops."""
+        while not self._stop.is_set():
+            path = self.queue.claim()
+            if path is None:
+                self._work_available.wait(timeout=self.poll_interval)
+                self._work_available.clear()
+                continue
+            try:
+                results = self.analyzer.analyze_audio(path)
+                error = results.get('error')
+            except Exception as e:
+                error = str(e)
+            self.queue.complete(path, error)
+            if error:
+                print(f"Failed to process {path.name}: {error}")
+            else:
+                print(f"Finished {path.name}")
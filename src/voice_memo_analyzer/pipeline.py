@@ -0,0 +1,337 @@
+"""Batch processing of many voice memos as a pipeline of concurrent stages.
+
+Each memo flows through four stages: preparing the audio (ffmpeg conversion
+and hashing), transcription, analysis, and writing the results. Every stage
+has its own worker threads and the stages are connected by bounded queues,
+so CPU-bound conversion of one memo overlaps with network-bound API calls
+for others.
+
+run_async_batch is the asyncio alternative: every memo runs through
+VoiceMemoAnalyzer.analyze_audio_async, sharing one pooled async client and
+rate-limit scheduler.
+
+BatchApiPipeline is for backfills that can wait: memos are prepared and
+transcribed as usual, but their analyses are submitted together as one
+Batch API job at half the price.
+"""
+
+import asyncio
+import glob
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .analyzer import VoiceMemoAnalyzer
+from .analysis.analyzer import ANALYSIS_ERROR_SUMMARY
+from .analysis.batch import BatchAnalysis
+from .utils.audio import prepare_audio_file
+from .utils.cache import get_analysis_from_cache, get_file_hash, save_analysis_to_cache
+
+AUDIO_SUFFIXES = {'.m4a', '.mp3'}
+
+# Marks the end of a stage's input queue
+_STOP = object()
+
+@dataclass
+class BatchResult:
+    """Outcome of processing one file in a batch."""
+    file_path: Path
+    success: bool
+    error: str | None = None
+    failed_stage: str | None = None
+    elapsed: float = 0.0
+
+@dataclass
+class _Job:
+    """A memo moving through the pipeline, accumulating each stage's output."""
+    index: int
+    file_path: Path
+    reanalyze: bool = False
+    started: float = field(default_factory=time.perf_counter)
+    original_path: Path | None = None
+    mp3_path: Path | None = None
+    file_hash: str | None = None
+    raw_transcript: str | None = None
+    formatted_transcript: str | None = None
+    results: dict | None = None
+
+def collect_audio_files(target: str | Path) -> list[Path]:
+    """List the audio files to process for a directory or glob pattern.
+    
+    Args:
+        target: A directory (its m4a/mp3 files are used) or a glob pattern
+    
+    Returns:
+        list: Matching audio files, sorted by path
+    """
+    target_path = Path(target)
+    if target_path.is_dir():
+        candidates = target_path.iterdir()
+    else:
+        candidates = (Path(match) for match in glob.glob(str(target), recursive=True))
+    return sorted(
+        path for path in candidates
+        if path.is_file() and path.suffix.lower() in AUDIO_SUFFIXES
+    )
+
+class BatchPipeline:
+    """Runs many memos through prepare -> transcribe -> analyze -> write stages.
+    
+    Each stage has its own thread pool size; a failure in any stage is
+    recorded for that memo and the rest of the batch keeps going.
+    """
+
+    def __init__(self, analyzer: VoiceMemoAnalyzer, prepare_workers: int = 2,
+                 transcribe_workers: int = 4, analyze_workers: int = 4,
+                 write_workers: int = 1, queue_size: int = 8):
+        """Initialize the pipeline.
+        
+        Args:
+            analyzer: The VoiceMemoAnalyzer whose components do the work
+            prepare_workers: Concurrent ffmpeg conversions / hashes
+            transcribe_workers: Concurrent transcription requests
+            analyze_workers: Concurrent analysis requests
+            write_workers: Concurrent result writers
+            queue_size: Maximum memos waiting between two stages
+        """
+        self.analyzer = analyzer
+        self.queue_size = queue_size
+        self.stages = [
+            ("prepare", self._prepare, prepare_workers),
+            ("transcribe", self._transcribe, transcribe_workers),
+            ("analyze", self._analyze, analyze_workers),
+            ("write", self._write, write_workers),
+        ]
+
+    def run(self, files: list[Path], reanalyze: bool = False) -> list[BatchResult]:
+        """Process files through all stages and wait for them to finish.
+        
+        Args:
+            files: Audio files to process
+            reanalyze: Ignore cached analyses and call the model again
+        
+        Returns:
+            list: One BatchResult per file, in the order given
+        """
+        outcomes: dict[int, BatchResult] = {}
+        outcomes_lock = threading.Lock()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        queues.append(None)  # The last stage has no downstream queue
+
+        def record(job: _Job, error: Exception | None = None, stage: str | None = None):
+            with outcomes_lock:
+                outcomes[job.index] = _outcome(job, error, stage)
+
+        def worker(name, func, inbox, outbox):
+            while True:
+                job = inbox.get()
+                if job is _STOP:
+                    return
+                try:
+                    func(job)
+                except Exception as e:
+                    print(f"Error in {name} stage for {job.file_path.name}: {e}")
+                    record(job, e, name)
+                    continue
+                if outbox is None:
+                    record(job)
+                else:
+                    outbox.put(job)
+        
+        stage_threads = []
+        for index, (name, func, workers) in enumerate(self.stages):
+            threads = [
+                threading.Thread(
+                    target=worker, args=(name, func, queues[index], queues[index + 1]),
+                    name=f"batch-{name}-{n}", daemon=True
+                )
+                for n in range(workers)
+            ]
+            for thread in threads:
+                thread.start()
+            stage_threads.append(threads)
+        
+        for index, file_path in enumerate(files):
+            queues[0].put(_Job(index=index, file_path=Path(file_path), reanalyze=reanalyze))
+        
+        # Shut stages down in order: a stage stops once everything upstream has drained
+        for index, threads in enumerate(stage_threads):
+            for _ in threads:
+                queues[index].put(_STOP)
+            for thread in threads:
+                thread.join()
+        
+        return [outcomes[index] for index in range(len(files))]
+
+    def _prepare(self, job: _Job) -> None:
+        """Hash the original file and convert or stage the audio."""
+        job.file_hash = get_file_hash(job.file_path)
+        job.original_path, job.mp3_path = prepare_audio_file(
+            job.file_path, self.analyzer.encoding_profile, job.file_hash
+        )
+
+    def _transcribe(self, job: _Job) -> None:
+        """Fetch the transcript from cache or transcribe the audio."""
+        job.raw_transcript, job.formatted_transcript = self.analyzer.get_transcript(
+            job.original_path, job.mp3_path, job.file_hash
+        )
+
+    def _analyze(self, job: _Job) -> None:
+        """Analyze the transcript and combine it with the analysis."""
+        analysis_results = self.analyzer.get_analysis(job.formatted_transcript, job.reanalyze)
+        job.results = {
+            'transcript': job.raw_transcript,
+            'formatted_transcript': job.formatted_transcript,
+            **analysis_results
+        }
+
+    def _write(self, job: _Job) -> None:
+        """Write the JSON and Markdown results and add the memo to the semantic index."""
+        self.analyzer.save_results(job.results, job.file_path.name)
+        self.analyzer.index_semantic(job.file_hash, job.file_path.name, job.results)
+
+class BatchApiPipeline(BatchPipeline):
+    """Runs the BatchPipeline stages, but analyzes through the Batch API.
+    
+    Memos with a cached analysis are written as they go. The rest are held
+    until every memo has been transcribed, analyzed together in one batch
+    job (see BatchAnalysis), then cached and written like any other result.
+    """
+
+    def __init__(self, analyzer: VoiceMemoAnalyzer, poll_seconds: float = 60.0, **workers):
+        """Initialize the pipeline.
+        
+        Args:
+            analyzer: The VoiceMemoAnalyzer whose components do the work
+            poll_seconds: Seconds between batch status checks
+            **workers: Stage worker counts and queue size, as for BatchPipeline
+        """
+        super().__init__(analyzer, **workers)
+        self.poll_seconds = poll_seconds
+        self._pending: list[_Job] = []
+        self._pending_lock = threading.Lock()
+
+    def run(self, files: list[Path], reanalyze: bool = False) -> list[BatchResult]:
+        """Process files through all stages, then analyze the uncached ones in a batch.
+        
+        Args:
+            files: Audio files to process
+            reanalyze: Ignore cached analyses and analyze every memo in the batch
+        
+        Returns:
+            list: One BatchResult per file, in the order given
+        """
+        self._pending = []
+        outcomes = super().run(files, reanalyze)
+        pending = sorted(self._pending, key=lambda job: job.index)
+        if pending:
+            self._analyze_pending(pending, outcomes)
+        return outcomes
+
+    def _analyze(self, job: _Job) -> None:
+        """Use a cached analysis, or hold the memo for the batch."""
+        cached = None
+        if not job.reanalyze:
+            cached = get_analysis_from_cache(self.analyzer.analysis_cache_key(job.formatted_transcript))
+        if cached is None:
+            with self._pending_lock:
+                self._pending.append(job)
+            return
+        job.results = {
+            'transcript': job.raw_transcript,
+            'formatted_transcript': job.formatted_transcript,
+            **cached
+        }
+
+    def _write(self, job: _Job) -> None:
+        """Write the results of memos that aren't waiting for the batch."""
+        if job.results is not None:
+            super()._write(job)
+
+    def _analyze_pending(self, jobs: list[_Job], outcomes: list[BatchResult]) -> None:
+        """Analyze the held memos in one batch, then cache and write their results."""
+        keys = {job.index: self.analyzer.analysis_cache_key(job.formatted_transcript) for job in jobs}
+        transcripts = {keys[job.index]: job.formatted_transcript for job in jobs}
+        batch = BatchAnalysis(self.analyzer.analyzer, poll_seconds=self.poll_seconds)
+        try:
+            analyses = batch.analyze(transcripts)
+        except Exception as e:
+            print(f"Error in analyze stage for the batch: {e}")
+            for job in jobs:
+                outcomes[job.index] = _outcome(job, e, "analyze")
+            return
+        
+        for job in jobs:
+            analysis = analyses[keys[job.index]]
+            if analysis.get('overall_summary') == ANALYSIS_ERROR_SUMMARY:
+                outcomes[job.index] = _outcome(job, RuntimeError("batch request failed"), "analyze")
+                continue
+            save_analysis_to_cache(analysis, keys[job.index])
+            job.results = {
+                'transcript': job.raw_transcript,
+                'formatted_transcript': job.formatted_transcript,
+                **analysis
+            }
+            try:
+                self._write(job)
+            except Exception as e:
+                print(f"Error in write stage for {job.file_path.name}: {e}")
+                outcomes[job.index] = _outcome(job, e, "write")
+                continue
+            outcomes[job.index] = _outcome(job)
+
+def _outcome(job: _Job, error: Exception | None = None, stage: str | None = None) -> BatchResult:
+    """Build a job's BatchResult, timed from when it entered the pipeline."""
+    return BatchResult(
+        file_path=job.file_path,
+        success=error is None,
+        error=str(error) if error else None,
+        failed_stage=stage,
+        elapsed=time.perf_counter() - job.started
+    )
+
+async def run_async_batch(analyzer: VoiceMemoAnalyzer, files: list[Path],
+                          reanalyze: bool = False, max_concurrency: int = 8) -> list[BatchResult]:
+    """Process files with the async analyzer, at most max_concurrency at a time.
+    
+    Args:
+        analyzer: The VoiceMemoAnalyzer whose async client and scheduler are shared
+        files: Audio files to process
+        reanalyze: Ignore cached analyses and call the model again
+        max_concurrency: Maximum memos in flight at once
+    
+    Returns:
+        list: One BatchResult per file, in the order given
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def process(file_path: Path) -> BatchResult:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                results = await analyzer.analyze_audio_async(file_path, reanalyze)
+                error = results.get('error')
+            except Exception as e:
+                error = str(e)
+            return BatchResult(
+                file_path=file_path,
+                success=error is None,
+                error=error,
+                elapsed=time.perf_counter() - started
+            )
+    
+    return list(await asyncio.gather(*(process(Path(path)) for path in files)))
+
+def format_batch_summary(results: list[BatchResult]) -> str:
+    """Format a per-file success/failure summary for a finished batch."""
+    succeeded = sum(result.success for result in results)
+    lines = [f"=== Batch Summary: {succeeded}/{len(results)} succeeded ==="]
+    for result in results:
+        if result.success:
+            lines.append(f"✓ {result.file_path.name} ({result.elapsed:.1f}s)")
+        else:
+            stage = f" in {result.failed_stage}" if result.failed_stage else ""
+            lines.append(f"✗ {result.file_path.name} ({result.elapsed:.1f}s) failed{stage}: {result.error}")
+    return "\n".join(lines)
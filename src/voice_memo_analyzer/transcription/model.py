@@ -0,0 +1,244 @@
+"""Compact, array-backed transcript with word and segment timings.
+
+Whisper returns start and end times for every word and segment. A
+CompactTranscript keeps them in typed arrays, with each word's and
+segment's text stored as offsets into one string buffer, so a long
+transcript costs a few bytes per word instead of a Python object per word.
+Times are sorted, so looking up the word at a moment or the text in a time
+range is a binary search.
+
+The transcript is saved as a binary sidecar next to the text transcript and
+can regenerate the formatted [MM:SS] output without calling the API again.
+"""
+
+import math
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from ..utils.formatting import format_timestamp, parse_timestamp, segment_field
+from ..utils.singleflight import atomic_write_bytes
+
+# magic, format version, segment count, word count, text length in bytes
+HEADER = struct.Struct("<4sHIIQ")
+MAGIC = b"VMTR"
+VERSION = 1
+
+@dataclass
+class TimedText:
+    """A word or segment and when it was spoken."""
+    start: float
+    end: float
+    text: str
+
+def _word_text(word) -> str:
+    """Read a word's text; Whisper calls the field 'word', some callers 'text'."""
+    names = word.keys() if isinstance(word, dict) else dir(word)
+    return str(segment_field(word, 'word' if 'word' in names else 'text'))
+
+class CompactTranscript:
+    """A transcript's text plus word and segment timings in typed arrays.
+    
+    The text buffer holds the raw transcript, then every segment's text,
+    then every word's text. Each offsets array has one more entry than
+    there are items, so item i spans text[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, text: str, segment_starts: array, segment_ends: array, segment_offsets: array,
+                 word_starts: array, word_ends: array, word_offsets: array):
+        """Initialize from prebuilt arrays; see from_response and load."""
+        self.text = text
+        self.segment_starts = segment_starts
+        self.segment_ends = segment_ends
+        self.segment_offsets = segment_offsets
+        self.word_starts = word_starts
+        self.word_ends = word_ends
+        self.word_offsets = word_offsets
+
+    @classmethod
+    def from_response(cls, response) -> "CompactTranscript":
+        """Build a compact transcript from a verbose_json Whisper response.
+        
+        Args:
+            response: Object with text, segments and (optionally) words, as
+                returned by Whisper or merged by the Transcriber
+        
+        Returns:
+            CompactTranscript: The transcript, with segments and words sorted by start time
+        """
+        parts = [response.text]
+        length = len(response.text)
+        segments = sorted(response.segments or [], key=lambda segment: segment_field(segment, 'start'))
+        words = sorted(getattr(response, 'words', None) or [], key=lambda word: segment_field(word, 'start'))
+        
+        arrays = []
+        for items, read_text in ((segments, lambda segment: str(segment_field(segment, 'text'))),
+                                 (words, _word_text)):
+            starts, ends, offsets = array('d'), array('d'), array('q', [length])
+            for item in items:
+                item_text = read_text(item)
+                starts.append(float(segment_field(item, 'start')))
+                ends.append(float(segment_field(item, 'end')))
+                parts.append(item_text)
+                length += len(item_text)
+                offsets.append(length)
+            arrays.extend((starts, ends, offsets))
+        return cls("".join(parts), *arrays)
+
+    @property
+    def raw_text(self) -> str:
+        """The plain transcript text, as Whisper returned it."""
+        return self.text[:self.segment_offsets[0]]
+
+    @property
+    def segment_count(self) -> int:
+        """Number of segments."""
+        return len(self.segment_starts)
+
+    @property
+    def word_count(self) -> int:
+        """Number of words with timings."""
+        return len(self.word_starts)
+
+    def segment(self, index: int) -> TimedText:
+        """Return segment number index."""
+        return TimedText(
+            self.segment_starts[index], self.segment_ends[index],
+            self.text[self.segment_offsets[index]:self.segment_offsets[index + 1]]
+        )
+
+    def word(self, index: int) -> TimedText:
+        """Return word number index."""
+        return TimedText(
+            self.word_starts[index], self.word_ends[index],
+            self.text[self.word_offsets[index]:self.word_offsets[index + 1]]
+        )
+
+    def format(self) -> str:
+        """Rebuild the transcript with [MM:SS] timestamps, one segment per line."""
+        return "\n".join(
+            f"[{format_timestamp(self.segment_starts[index])}] {self.segment(index).text}"
+            for index in range(self.segment_count)
+        )
+
+    def word_at(self, seconds: float) -> TimedText | None:
+        """Return the word being spoken at seconds, or None between words."""
+        index = bisect_right(self.word_starts, seconds) - 1
+        if index >= 0 and seconds <= self.word_ends[index]:
+            return self.word(index)
+        return None
+
+    def words_between(self, start: float, end: float) -> list[TimedText]:
+        """Return the words that overlap the time range [start, end)."""
+        first = bisect_right(self.word_ends, start)
+        last = bisect_left(self.word_starts, end)
+        return [self.word(index) for index in range(first, last)]
+
+    def text_between(self, start: float, end: float) -> str:
+        """Return the text spoken in [start, end), from words when available."""
+        if self.word_count:
+            return " ".join(word.text.strip() for word in self.words_between(start, end))
+        first = bisect_right(self.segment_ends, start)
+        last = bisect_left(self.segment_starts, end)
+        return " ".join(self.segment(index).text.strip() for index in range(first, last))
+
+    def to_response(self, start: float = 0.0, end: float = math.inf) -> SimpleNamespace:
+        """Return the segments and words inside [start, end] as a verbose_json-like response.
+        
+        Segments and words that are only partly inside are left out. The
+        result can be shifted and joined with merge_chunk_responses and
+        turned back into a transcript with from_response.
+        
+        Args:
+            start: Seconds where the range begins
+            end: Seconds where the range ends
+        
+        Returns:
+            SimpleNamespace: Object with text, segments and words; the text
+            is the raw transcript when every segment is inside the range
+        """
+        segments = [
+            self.segment(index)
+            for index in range(bisect_left(self.segment_starts, start), bisect_right(self.segment_starts, end))
+            if self.segment_ends[index] <= end
+        ]
+        words = [
+            self.word(index)
+            for index in range(bisect_left(self.word_starts, start), bisect_right(self.word_starts, end))
+            if self.word_ends[index] <= end
+        ]
+        if len(segments) == self.segment_count:
+            text = self.raw_text
+        else:
+            text = " ".join(segment.text.strip() for segment in segments)
+        return SimpleNamespace(
+            text=text,
+            segments=[{'start': item.start, 'end': item.end, 'text': item.text} for item in segments],
+            words=[{'start': item.start, 'end': item.end, 'word': item.text} for item in words]
+        )
+
+    def resolve_timestamp(self, timestamp: str) -> TimedText | None:
+        """Find the segment a formatted [MM:SS] timestamp refers to.
+        
+        Formatted timestamps drop the fraction of a second, so this is the
+        last segment that starts before the following second. It resolves
+        a key moment's timestamp to the exact span and text it points at.
+        
+        Args:
+            timestamp: An MM:SS or HH:MM:SS timestamp, e.g. from key_moments
+        
+        Returns:
+            TimedText: The segment, or None if the timestamp is before the first one
+        """
+        index = bisect_left(self.segment_starts, parse_timestamp(timestamp) + 1) - 1
+        return self.segment(index) if index >= 0 else None
+
+    def to_bytes(self) -> bytes:
+        """Serialize to the binary sidecar format (little-endian)."""
+        encoded_text = self.text.encode()
+        arrays = [
+            self.segment_starts, self.segment_ends, self.segment_offsets,
+            self.word_starts, self.word_ends, self.word_offsets
+        ]
+        if sys.byteorder == "big":
+            arrays = [array(values.typecode, values) for values in arrays]
+            for values in arrays:
+                values.byteswap()
+        header = HEADER.pack(MAGIC, VERSION, self.segment_count, self.word_count, len(encoded_text))
+        return b"".join([header, *(values.tobytes() for values in arrays), encoded_text])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CompactTranscript":
+        """Load a transcript serialized with to_bytes.
+        
+        Raises:
+            ValueError: If data isn't a compact transcript of a known version
+        """
+        magic, version, segment_count, word_count, text_length = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a compact transcript file (or an unsupported version)")
+        offset = HEADER.size
+        arrays = []
+        for typecode, count in (('d', segment_count), ('d', segment_count), ('q', segment_count + 1),
+                                ('d', word_count), ('d', word_count), ('q', word_count + 1)):
+            values = array(typecode)
+            size = values.itemsize * count
+            values.frombytes(data[offset:offset + size])
+            if sys.byteorder == "big":
+                values.byteswap()
+            arrays.append(values)
+            offset += size
+        text = data[offset:offset + text_length].decode()
+        return cls(text, *arrays)
+
+    def save(self, path: Path) -> None:
+        """Write the binary sidecar to path, atomically."""
+        atomic_write_bytes(path, self.to_bytes())
+
+    @classmethod
+    def load(cls, path: Path) -> "CompactTranscript":
+        """Read a binary sidecar written by save."""
+        return cls.from_bytes(Path(path).read_bytes())
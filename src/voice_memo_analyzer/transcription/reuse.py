@@ -0,0 +1,107 @@
+"""Reusing the transcript of a near-duplicate recording.
+
+When the fingerprint index finds that a new recording shares its audio with
+one that was already transcribed (a re-export, a re-encode or a trimmed
+copy), the old transcript's segments inside the shared stretch are moved
+onto the new recording's timeline. Only what the match doesn't cover, such
+as a few seconds at the start that the older copy had trimmed off, is sent
+to Whisper.
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+from ..utils.audio import encode_pcm_to_mp3
+from .model import CompactTranscript
+from .transcriber import merge_chunk_responses
+
+if TYPE_CHECKING:
+    from ..utils.fingerprint import FingerprintMatch
+
+MATCH_SLACK_SECONDS = 1.0  # The first and last aligned hashes can sit this far inside the shared stretch
+MIN_GAP_SECONDS = 1.0  # Uncovered stretches shorter than this aren't transcribed
+
+@dataclass
+class TranscriptReuse:
+    """The part of a new recording's transcript taken from a near-duplicate.
+    
+    reused holds the old transcript's segments and words, on the new
+    recording's timeline; gaps are the (start, end) seconds of the new
+    recording that still need transcribing.
+    """
+    reused: SimpleNamespace
+    gaps: list[tuple[float, float]]
+    reused_seconds: float
+
+    def merge(self, gap_responses: list) -> CompactTranscript:
+        """Join the reused part with the transcribed gaps.
+        
+        Args:
+            gap_responses: One response per gap, in the order of gaps, with
+                timestamps relative to the start of the gap
+        
+        Returns:
+            CompactTranscript: The new recording's full transcript
+        """
+        parts = [(self.reused.segments[0].start, self.reused, 0.0)]
+        parts.extend((start, response, start) for response, (start, _) in zip(gap_responses, self.gaps))
+        parts.sort(key=lambda part: part[0])
+        return CompactTranscript.from_response(
+            merge_chunk_responses([(response, offset) for _, response, offset in parts])
+        )
+
+def plan_reuse(transcript: CompactTranscript, match: "FingerprintMatch", duration: float,
+               min_gap: float = MIN_GAP_SECONDS) -> TranscriptReuse | None:
+    """Work out which of a near-duplicate's segments to reuse and what is left to transcribe.
+    
+    Segments of the old transcript that lie within the matched stretch are
+    shifted onto the new timeline. A segment cut by the edge of the match is
+    dropped and its audio is transcribed with the gap next to it. Otherwise,
+    when the match reaches the start or end of the new recording, nothing
+    before or after it is transcribed, so leading and trailing silence isn't
+    uploaded.
+    
+    Args:
+        transcript: The near-duplicate's transcript
+        match: Where the new recording lines up with the near-duplicate
+        duration: Length of the new recording in seconds
+        min_gap: Shortest uncovered stretch worth transcribing
+    
+    Returns:
+        TranscriptReuse: The reused segments and the gaps, or None if no
+        segment of the old transcript lies within the match
+    """
+    window_start = max(0.0, match.start - MATCH_SLACK_SECONDS)
+    window_end = min(duration, match.end + MATCH_SLACK_SECONDS)
+    clipped = transcript.to_response(window_start + match.offset, window_end + match.offset)
+    if not clipped.segments:
+        return None
+    reused = merge_chunk_responses([(clipped, -match.offset)])
+    gaps = []
+    if window_start > 0 or _cuts_segment(transcript, window_start + match.offset):
+        gaps.append((0.0, reused.segments[0].start))
+    if window_end < duration or _cuts_segment(transcript, window_end + match.offset):
+        gaps.append((reused.segments[-1].end, duration))
+    return TranscriptReuse(
+        reused, [(start, end) for start, end in gaps if end - start >= min_gap], window_end - window_start
+    )
+
+def _cuts_segment(transcript: CompactTranscript, seconds: float) -> bool:
+    """Whether a segment of transcript starts before seconds and ends after it."""
+    index = bisect_left(transcript.segment_starts, seconds) - 1
+    return index >= 0 and transcript.segment_ends[index] > seconds
+
+def write_gap_audio(pcm: bytes, gaps: list[tuple[float, float]], output_dir: Path,
+                    sample_rate: int = 16000) -> list[Path]:
+    """Encode each gap of decoded mono 16-bit PCM to its own MP3 for upload.
+    
+    Returns:
+        list: Path of each gap's audio, in the order of gaps
+    """
+    paths = []
+    for index, (start, end) in enumerate(gaps):
+        chunk = pcm[int(start * sample_rate) * 2:int(end * sample_rate) * 2]
+        paths.append(encode_pcm_to_mp3(chunk, Path(output_dir) / f"gap_{index}.mp3", sample_rate))
+    return paths
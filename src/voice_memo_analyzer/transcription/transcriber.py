@@ -1,12 +1,40 @@
 """Audio transcription module using OpenAI's Whisper model.
 
 This module handles the transcription of audio files using OpenAI's Whisper model,
-providing both raw transcripts and formatted versions with timestamps.
+providing both raw transcripts and formatted versions with timestamps. Long
+recordings can be split at silences and transcribed chunk by chunk in parallel.
 """
 
+import asyncio
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from openai import OpenAI
-from ..utils.formatting import format_transcript_with_timestamps
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Callable
+from ..utils.audio import get_audio_duration, split_audio_at_silence
+from ..utils.cache import (
+    clear_transcription_progress, compute_file_hash, get_chunk_from_cache,
+    save_chunk_to_cache, save_transcription_plan
+)
+from ..utils.formatting import segment_field
+from ..utils.instrumentation import span
+from ..utils.scheduler import RateLimitScheduler
+from .model import CompactTranscript
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+    from ..utils.vad import OffsetMap
+
+TRANSCRIPTION_PARAMS = {
+    'model': "whisper-1",
+    'response_format': "verbose_json",
+    'timestamp_granularities': ["word", "segment"],
+    'language': "en"
+}
+
+# Called with (chunk index, chunk count, formatted chunk transcript) as each chunk lands
+ChunkCallback = Callable[[int, int, str], None]
 
 class Transcriber:
     """Handles audio transcription using OpenAI's Whisper model.
@@ -14,17 +42,45 @@ class Transcriber:
     This class manages the transcription of audio files, providing both raw
     text output and a formatted version with timestamps. It uses OpenAI's
     Whisper model for high-quality transcription.
+    
+    When chunk_seconds is set, recordings longer than that are split at
+    silences near chunk_seconds boundaries and the chunks are transcribed
+    concurrently by up to max_workers threads.
+    
+    transcribe_async does the same over an AsyncOpenAI client, with every
+    request paced and retried by a shared RateLimitScheduler. The
+    transcribe_compact variants return a CompactTranscript that keeps the
+    word and segment timings Whisper returns.
+    
+    With checkpoint set, every chunk is saved to the cache as soon as it is
+    transcribed, keyed by the audio's hash and the chunk's bounds. If a run
+    fails part way, the next run over the same audio uploads only the
+    chunks that are missing.
     """
 
-    def __init__(self, client: OpenAI):
+    def __init__(self, client: "OpenAI", chunk_seconds: float | None = None,
+                 max_workers: int = 4, async_client: "AsyncOpenAI | None" = None,
+                 scheduler: RateLimitScheduler | None = None, checkpoint: bool = False):
         """Initialize the transcriber with an OpenAI client.
         
         Args:
             client: An initialized OpenAI client object
+            chunk_seconds: Target chunk length for long recordings, or None to
+                always upload the whole file in a single request
+            max_workers: Maximum number of chunks transcribed at the same time
+            async_client: Client used by transcribe_async
+            scheduler: Rate limiter shared with other async API users
+            checkpoint: Save each chunk of a long recording as it completes
+                and reuse saved chunks when the same audio is transcribed again
         """
         self.client = client
+        self.chunk_seconds = chunk_seconds
+        self.max_workers = max_workers
+        self.async_client = async_client
+        self.scheduler = scheduler
+        self.checkpoint = checkpoint
 
-    def transcribe(self, audio_file_path: Path) -> tuple[str, str]:
+    def transcribe(self, audio_file_path: Path, offset_map: "OffsetMap | None" = None) -> tuple[str, str]:
         """Transcribe an audio file using OpenAI's Whisper model.
         
         Takes an audio file and transcribes it using Whisper, then formats
@@ -33,12 +89,36 @@ class Transcriber:
         
         Args:
             audio_file_path: Path to the audio file to transcribe
+            offset_map: When the file is a speech-only trim of a longer
+                recording, maps its timestamps back to the original
         
         Returns:
             tuple: Contains:
                 - raw_transcript (str): Plain text transcript without timestamps
                 - formatted_transcript (str): Transcript with [MM:SS] timestamps
         
+        Raises:
+            FileNotFoundError: If the audio file doesn't exist
+            Exception: If there's an error during transcription
+        """
+        transcript = self.transcribe_compact(audio_file_path, offset_map)
+        return transcript.raw_text, transcript.format()
+
+    def transcribe_compact(self, audio_file_path: Path, offset_map: "OffsetMap | None" = None,
+                           on_chunk: ChunkCallback | None = None) -> CompactTranscript:
+        """Transcribe an audio file and keep its word and segment timings.
+        
+        Args:
+            audio_file_path: Path to the audio file to transcribe
+            offset_map: Maps timestamps of a speech-only trim back to the original
+            on_chunk: Called with each chunk's formatted transcript as soon as
+                it is transcribed, in completion order, so later stages can
+                start before the whole recording is done; an unchunked file
+                is reported as a single chunk
+        
+        Returns:
+            CompactTranscript: The transcript with its timings
+        
         Raises:
             FileNotFoundError: If the audio file doesn't exist
             Exception: If there's an error during transcription
@@ -46,19 +126,275 @@ class Transcriber:
         print("Transcribing audio...")
         
         try:
-            with open(audio_file_path, 'rb') as audio_file:
-                response = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="verbose_json",
-                    timestamp_granularities=["word", "segment"],
-                    language="en"
-                )
-            
-            raw_transcript = response.text
-            formatted_transcript = format_transcript_with_timestamps(response)
-            return raw_transcript, formatted_transcript
+            with span("transcribe"):
+                duration = get_audio_duration(audio_file_path) if self.chunk_seconds else 0.0
+                chunked = bool(self.chunk_seconds) and duration > self.chunk_seconds
+                if chunked:
+                    response = self._transcribe_chunked(audio_file_path, duration, on_chunk, offset_map)
+                else:
+                    response = self._transcribe_file(audio_file_path)
+            if offset_map is not None:
+                response = remap_response(response, offset_map)
+            transcript = CompactTranscript.from_response(response)
+            if on_chunk is not None and not chunked:
+                on_chunk(0, 1, transcript.format())
+            return transcript
             
         except Exception as e:
             print(f"Error transcribing audio: {e}")
             raise
+
+    def _transcribe_file(self, audio_file_path: Path):
+        """Send a single audio file to Whisper and return the verbose response."""
+        with span("transcribe.request", model=TRANSCRIPTION_PARAMS['model']) as current:
+            with open(audio_file_path, 'rb') as audio_file:
+                current.set(bytes_uploaded=os.fstat(audio_file.fileno()).st_size)
+                response = self.client.audio.transcriptions.create(file=audio_file, **TRANSCRIPTION_PARAMS)
+            _record_duration(current, response)
+            return response
+
+    def _transcribe_chunked(self, audio_file_path: Path, duration: float,
+                            on_chunk: ChunkCallback | None = None,
+                            offset_map: "OffsetMap | None" = None) -> SimpleNamespace:
+        """Split a long recording and transcribe its chunks concurrently.
+        
+        When a chunk fails, the chunks already in flight are still collected
+        (and checkpointed) before the first error is raised.
+        
+        Args:
+            audio_file_path: Path to the audio file to transcribe
+            duration: Length of the recording in seconds
+            on_chunk: Called with each chunk's formatted transcript as it lands
+            offset_map: Applied to the timestamps passed to on_chunk
+        
+        Returns:
+            SimpleNamespace: Response-like object with text, segments and words
+            whose timestamps are relative to the start of the full recording
+        """
+        with tempfile.TemporaryDirectory() as chunk_dir:
+            chunks = split_audio_at_silence(audio_file_path, Path(chunk_dir), self.chunk_seconds)
+            audio_hash, bounds, responses = self._load_checkpoints(audio_file_path, chunks, duration)
+            pending = [index for index, response in enumerate(responses) if response is None]
+            print(f"Transcribing {len(pending)} chunks with up to {self.max_workers} workers...")
+            if on_chunk is not None:
+                for index, response in enumerate(responses):
+                    if response is not None:
+                        on_chunk(index, len(chunks), chunk_transcript(response, chunks[index][1], offset_map))
+            errors = []
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(self._transcribe_file, chunks[index][0]): index for index in pending}
+                for future in as_completed(futures):
+                    index = futures[future]
+                    try:
+                        responses[index] = future.result()
+                    except Exception as e:
+                        errors.append(e)
+                        continue
+                    self._save_checkpoint(audio_hash, bounds[index], responses[index])
+                    if on_chunk is not None:
+                        on_chunk(index, len(chunks), chunk_transcript(responses[index], chunks[index][1], offset_map))
+        
+        return self._finish_chunks(audio_hash, responses, chunks, errors)
+
+    def _load_checkpoints(self, audio_file_path: Path, chunks: list[tuple[Path, float]],
+                          duration: float) -> tuple[str | None, list[tuple[float, float]], list]:
+        """Look up the chunks of this recording that an earlier run already transcribed.
+        
+        Returns:
+            tuple: (audio hash, or None when checkpointing is off; (start, end)
+            bounds of each chunk; cached response per chunk, None where missing)
+        """
+        bounds = chunk_bounds(chunks, duration)
+        if not self.checkpoint:
+            return None, bounds, [None] * len(chunks)
+        audio_hash = compute_file_hash(audio_file_path)
+        save_transcription_plan(audio_hash, Path(audio_file_path).name, bounds)
+        responses = []
+        for start, end in bounds:
+            cached = get_chunk_from_cache(audio_hash, start, end)
+            responses.append(response_from_dict(cached) if cached is not None else None)
+        resumed = sum(response is not None for response in responses)
+        if resumed:
+            print(f"Resuming transcription: {resumed} of {len(chunks)} chunks already done")
+        return audio_hash, bounds, responses
+
+    def _save_checkpoint(self, audio_hash: str | None, bound: tuple[float, float], response) -> None:
+        """Save one finished chunk, if checkpointing is on."""
+        if audio_hash is not None:
+            save_chunk_to_cache(audio_hash, *bound, response_to_dict(response))
+
+    def _finish_chunks(self, audio_hash: str | None, responses: list, chunks: list[tuple[Path, float]],
+                       errors: list[Exception]) -> SimpleNamespace:
+        """Merge the chunk responses, or raise the first chunk error.
+        
+        A complete transcription's checkpoints are dropped; after a failure
+        they are kept for the next run.
+        """
+        if errors:
+            if audio_hash is not None:
+                done = sum(response is not None for response in responses)
+                print(f"Saved {done} of {len(chunks)} chunks; rerun to transcribe only the rest")
+            raise errors[0]
+        if audio_hash is not None:
+            clear_transcription_progress(audio_hash)
+        return merge_chunk_responses(
+            [(response, offset) for response, (_, offset) in zip(responses, chunks)]
+        )
+
+    async def transcribe_async(self, audio_file_path: Path,
+                               offset_map: "OffsetMap | None" = None) -> tuple[str, str]:
+        """Transcribe an audio file over the async client.
+        
+        Behaves like transcribe, but chunks are uploaded concurrently on the
+        event loop and every request goes through the scheduler.
+        
+        Args:
+            audio_file_path: Path to the audio file to transcribe
+            offset_map: Maps timestamps of a speech-only trim back to the original
+        
+        Returns:
+            tuple: (raw_transcript, formatted_transcript)
+        
+        Raises:
+            ValueError: If the transcriber has no async client
+            Exception: If there's an error during transcription
+        """
+        transcript = await self.transcribe_compact_async(audio_file_path, offset_map)
+        return transcript.raw_text, transcript.format()
+
+    async def transcribe_compact_async(self, audio_file_path: Path,
+                                       offset_map: "OffsetMap | None" = None) -> CompactTranscript:
+        """Async version of transcribe_compact."""
+        if self.async_client is None:
+            raise ValueError("transcribe_async requires an async_client")
+        print("Transcribing audio...")
+        
+        try:
+            with span("transcribe"):
+                duration = await asyncio.to_thread(get_audio_duration, audio_file_path) if self.chunk_seconds else 0.0
+                if self.chunk_seconds and duration > self.chunk_seconds:
+                    response = await self._transcribe_chunked_async(audio_file_path, duration)
+                else:
+                    response = await self._transcribe_file_async(audio_file_path)
+            if offset_map is not None:
+                response = remap_response(response, offset_map)
+            return CompactTranscript.from_response(response)
+        
+        except Exception as e:
+            print(f"Error transcribing audio: {e}")
+            raise
+
+    async def _transcribe_chunked_async(self, audio_file_path: Path, duration: float) -> SimpleNamespace:
+        """Async version of _transcribe_chunked: chunks are uploaded concurrently on the event loop."""
+        with tempfile.TemporaryDirectory() as chunk_dir:
+            chunks = await asyncio.to_thread(
+                split_audio_at_silence, audio_file_path, Path(chunk_dir), self.chunk_seconds
+            )
+            audio_hash, bounds, responses = await asyncio.to_thread(
+                self._load_checkpoints, audio_file_path, chunks, duration
+            )
+
+            async def transcribe_chunk(index: int):
+                responses[index] = await self._transcribe_file_async(chunks[index][0])
+                self._save_checkpoint(audio_hash, bounds[index], responses[index])
+            results = await asyncio.gather(
+                *(transcribe_chunk(index) for index, response in enumerate(responses) if response is None),
+                return_exceptions=True
+            )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        return self._finish_chunks(audio_hash, responses, chunks, errors)
+
+    async def _transcribe_file_async(self, audio_file_path: Path):
+        """Upload a single audio file through the scheduler and return the verbose response."""
+        audio_file_path = Path(audio_file_path)
+        audio_bytes = await asyncio.to_thread(audio_file_path.read_bytes)
+
+        def call():
+            return self.async_client.audio.transcriptions.create(
+                file=(audio_file_path.name, audio_bytes), **TRANSCRIPTION_PARAMS
+            )
+        with span("transcribe.request", model=TRANSCRIPTION_PARAMS['model'],
+                  bytes_uploaded=len(audio_bytes)) as current:
+            if self.scheduler is None:
+                response = await call()
+            else:
+                response = await self.scheduler.submit(call)
+            _record_duration(current, response)
+            return response
+
+def _record_duration(current, response) -> None:
+    """Record the audio length Whisper reports for a verbose_json response."""
+    duration = getattr(response, 'duration', None)
+    if isinstance(duration, (int, float)):
+        current.set(audio_seconds=duration)
+
+def _retime(item, convert) -> SimpleNamespace:
+    """Copy a segment or word, passing its start and end through convert."""
+    names = item.keys() if isinstance(item, dict) else dir(item)
+    fields = {name: segment_field(item, name) for name in ('text', 'word') if name in names}
+    return SimpleNamespace(
+        start=convert(segment_field(item, 'start')),
+        end=convert(segment_field(item, 'end')),
+        **fields
+    )
+
+def _shift(item, offset: float) -> SimpleNamespace:
+    """Copy a segment or word, moving its start and end by offset seconds."""
+    return _retime(item, lambda seconds: seconds + offset)
+
+def remap_response(response, offset_map: "OffsetMap") -> SimpleNamespace:
+    """Map a response's timestamps from trimmed audio back to the original recording."""
+    return SimpleNamespace(
+        text=response.text,
+        segments=[_retime(segment, offset_map.to_original) for segment in response.segments or []],
+        words=[_retime(word, offset_map.to_original) for word in getattr(response, 'words', None) or []]
+    )
+
+def chunk_bounds(chunks: list[tuple[Path, float]], duration: float) -> list[tuple[float, float]]:
+    """Return the (start, end) seconds of each chunk; the last one ends at duration."""
+    starts = [offset for _, offset in chunks]
+    return list(zip(starts, starts[1:] + [duration]))
+
+def response_to_dict(response) -> dict:
+    """Convert a verbose_json response to plain JSON data for the cache."""
+    def item(value, text_field: str) -> dict:
+        names = value.keys() if isinstance(value, dict) else dir(value)
+        text_name = text_field if text_field in names else 'text'
+        return {
+            'start': segment_field(value, 'start'),
+            'end': segment_field(value, 'end'),
+            text_field: str(segment_field(value, text_name))
+        }
+    return {
+        'text': response.text,
+        'segments': [item(segment, 'text') for segment in response.segments or []],
+        'words': [item(word, 'word') for word in getattr(response, 'words', None) or []]
+    }
+
+def response_from_dict(data: dict) -> SimpleNamespace:
+    """Rebuild a response-like object saved with response_to_dict."""
+    return SimpleNamespace(text=data['text'], segments=data['segments'], words=data['words'])
+
+def chunk_transcript(response, offset: float, offset_map: "OffsetMap | None" = None) -> str:
+    """Format one chunk's response with timestamps relative to the whole recording."""
+    shifted = merge_chunk_responses([(response, offset)])
+    if offset_map is not None:
+        shifted = remap_response(shifted, offset_map)
+    return CompactTranscript.from_response(shifted).format()
+
+def merge_chunk_responses(chunk_responses: list[tuple[object, float]]) -> SimpleNamespace:
+    """Join per-chunk Whisper responses into one response-like object.
+    
+    Args:
+        chunk_responses: (response, offset_seconds) pairs in playback order
+    
+    Returns:
+        SimpleNamespace: Object with text, segments and words attributes, with
+        each chunk's offset added to its timestamps
+    """
+    texts, segments, words = [], [], []
+    for response, offset in chunk_responses:
+        texts.append(response.text.strip())
+        segments.extend(_shift(segment, offset) for segment in response.segments or [])
+        words.extend(_shift(word, offset) for word in getattr(response, 'words', None) or [])
+    return SimpleNamespace(text=" ".join(texts), segments=segments, words=words)
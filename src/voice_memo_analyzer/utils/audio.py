@@ -1,58 +1,259 @@
 """Audio file handling utilities."""
 
+import os
+import shutil
 import subprocess
 from pathlib import Path
-from ..config import MP3_DIR
+from ..config import MP3_DIR, ENCODING_PROFILE
+from .cache import get_file_hash, get_flight
+from .instrumentation import span
 
-def convert_m4a_to_mp3(input_path: Path) -> Path:
-    """Convert Voice Memo (m4a) to mp3 format using ffmpeg."""
+# ffmpeg encodings for the audio that is uploaded for transcription. Whisper
+# only needs mono 16 kHz speech, so the smaller profiles upload several times
+# less data than 'archive'; 'passthrough' uploads the original file unchanged.
+ENCODING_PROFILES = {
+    'archive': {
+        'suffix': '_converted.mp3',
+        'args': ['-acodec', 'libmp3lame', '-q:a', '2']
+    },
+    'speech': {
+        'suffix': '_speech.mp3',
+        'args': ['-ac', '1', '-ar', '16000', '-acodec', 'libmp3lame', '-b:a', '32k']
+    },
+    'opus': {
+        'suffix': '_speech.ogg',
+        'args': ['-ac', '1', '-ar', '16000', '-acodec', 'libopus', '-b:a', '24k', '-application', 'voip']
+    },
+    'passthrough': None
+}
+
+def get_encoding_profile(profile: str) -> dict | None:
+    """Look up an encoding profile by name.
+    
+    Raises:
+        ValueError: If the profile is unknown
+    """
+    if profile not in ENCODING_PROFILES:
+        raise ValueError(
+            f"Unknown encoding profile: {profile} (choose from {', '.join(ENCODING_PROFILES)})"
+        )
+    return ENCODING_PROFILES[profile]
+
+def convert_m4a_to_mp3(input_path: Path, profile: str = ENCODING_PROFILE,
+                       file_hash: str | None = None) -> Path:
+    """Convert Voice Memo (m4a) to an upload-ready file using ffmpeg.
+    
+    Conversions are stored by content hash and profile, so two recordings
+    with the same name never share a conversion and switching profiles never
+    reuses a conversion made with different settings. ffmpeg writes to a
+    temporary file that is renamed into place, and concurrent conversions
+    of the same file (in any process) run only once.
+    """
     input_path = Path(input_path)
-    output_filename = f"{input_path.stem}_converted.mp3"
+    settings = get_encoding_profile(profile)
+    if settings is None:
+        return input_path
+    file_hash = file_hash or get_file_hash(input_path)
+    output_filename = f"{file_hash}{settings['suffix']}"
     output_path = MP3_DIR / output_filename
     
-    # Check if converted file already exists
-    if output_path.exists():
-        print(f"Using existing converted file: {output_path}")
+    def existing() -> Path | None:
+        if output_path.exists():
+            print(f"Using existing converted file: {output_path}")
+            return output_path
+        return None
+
+    def convert() -> Path:
+        print(f"Converting {input_path.name} ({profile} profile)...")
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        # Keep the suffix so ffmpeg still picks the output format from it
+        partial_path = output_path.with_name(f".{output_path.stem}.{os.getpid()}.part{output_path.suffix}")
+        with span("audio.convert", profile=profile) as current:
+            try:
+                subprocess.run([
+                    'ffmpeg', '-i', str(input_path), *settings['args'], str(partial_path), '-y'
+                ], check=True, capture_output=True, text=True)
+                os.replace(partial_path, output_path)
+            except subprocess.CalledProcessError as e:
+                print(f"Error converting file: {e.stderr}")
+                raise
+            finally:
+                partial_path.unlink(missing_ok=True)
+            current.set(
+                bytes_read=input_path.stat().st_size,
+                bytes_written=output_path.stat().st_size if output_path.exists() else 0
+            )
         return output_path
     
-    print(f"Converting {input_path.name} to MP3...")
-    try:
-        subprocess.run([
-            'ffmpeg', '-i', str(input_path), '-acodec', 'libmp3lame',
-            '-q:a', '2', str(output_path), '-y'
-        ], check=True, capture_output=True, text=True)
-        return output_path
-    except subprocess.CalledProcessError as e:
-        print(f"Error converting file: {e.stderr}")
-        raise
+    # Check if converted file already exists
+    return existing() or get_flight().run(f"convert:{output_filename}", convert, existing)[0]
+
+def stage_file(source: Path, destination: Path) -> Path:
+    """Place source at destination without reading it into memory.
+    
+    Uses a hardlink when both are on the same filesystem, and otherwise a
+    streamed copy that is renamed into place once complete.
+    """
+    if destination.exists():
+        return destination
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    with span("audio.stage", method="link") as current:
+        try:
+            os.link(source, destination)
+        except FileExistsError:
+            pass
+        except OSError:
+            current.set(method="copy", bytes_written=os.stat(source).st_size)
+            partial_path = destination.with_name(f".{destination.name}.{os.getpid()}.part")
+            shutil.copyfile(source, partial_path)
+            os.replace(partial_path, destination)
+    return destination
 
-def prepare_audio_file(file_path: Path) -> tuple[Path, Path]:
+def prepare_audio_file(file_path: Path, profile: str = ENCODING_PROFILE,
+                       file_hash: str | None = None) -> tuple[Path, Path]:
     """Prepare audio file for processing, converting if necessary.
     
+    m4a files are always encoded with the given profile. mp3 files are
+    re-encoded by the compact profiles and staged as-is by 'archive'.
+    Everything in MP3_DIR is named by the original file's content hash.
+    
+    Args:
+        file_path: Path to the original audio file
+        profile: Name of the ENCODING_PROFILES entry to use
+        file_hash: Content hash of file_path, computed if not given
+    
     Returns:
         tuple: (original_path, mp3_path)
     """
     file_path = Path(file_path)
     mp3_file_path = None
     
-    if file_path.suffix.lower() == '.m4a':
-        mp3_file_path = convert_m4a_to_mp3(file_path)
-    elif file_path.suffix.lower() == '.mp3':
-        # If it's already an MP3, copy it to the mp3_conversions directory
-        output_filename = f"{file_path.stem}_copy.mp3"
-        output_path = MP3_DIR / output_filename
+    if file_path.suffix.lower() == '.m4a' or (
+        file_path.suffix.lower() == '.mp3' and profile not in ('archive', 'passthrough')
+    ):
+        mp3_file_path = convert_m4a_to_mp3(file_path, profile, file_hash)
+    elif file_path.suffix.lower() == '.mp3' and profile == 'archive':
+        # If it's already an MP3, stage it in the mp3_conversions directory
+        output_path = MP3_DIR / f"{file_hash or get_file_hash(file_path)}.mp3"
         
         # Check if the file is already in mp3_conversions directory
         if file_path != output_path:
             if output_path.exists():
                 print(f"Using existing copy: {output_path}")
-                mp3_file_path = output_path
             else:
-                print(f"Copying {file_path.name} to mp3_conversions directory...")
-                output_path.write_bytes(file_path.read_bytes())
-                mp3_file_path = output_path
+                print(f"Staging {file_path.name} in mp3_conversions directory...")
+            mp3_file_path = stage_file(file_path, output_path)
     
     if not mp3_file_path:
         mp3_file_path = file_path  # Use original path if no conversion needed
         
     return file_path, mp3_file_path
+
+def get_audio_duration(audio_path: Path) -> float:
+    """Return the duration of an audio file in seconds using ffprobe."""
+    result = subprocess.run([
+        'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+        '-of', 'default=noprint_wrappers=1:nokey=1', str(audio_path)
+    ], check=True, capture_output=True, text=True)
+    return float(result.stdout.strip())
+
+def detect_silences(audio_path: Path, noise_db: int = -35,
+                    min_silence: float = 0.5) -> list[tuple[float, float]]:
+    """Find silent stretches in an audio file using ffmpeg's silencedetect filter.
+    
+    Returns:
+        list: (silence_start, silence_end) pairs in seconds
+    """
+    result = subprocess.run([
+        'ffmpeg', '-i', str(audio_path), '-af',
+        f'silencedetect=noise={noise_db}dB:d={min_silence}', '-f', 'null', '-'
+    ], check=True, capture_output=True, text=True)
+    
+    silences = []
+    start = None
+    for line in result.stderr.splitlines():
+        if 'silence_start:' in line:
+            start = float(line.split('silence_start:')[1].split()[0])
+        elif 'silence_end:' in line and start is not None:
+            end = float(line.split('silence_end:')[1].split()[0])
+            silences.append((start, end))
+            start = None
+    return silences
+
+def choose_split_points(duration: float, silences: list[tuple[float, float]],
+                        chunk_seconds: float, search_window: float = 30.0) -> list[float]:
+    """Pick chunk boundaries near multiples of chunk_seconds, preferring silence.
+    
+    For each target boundary the midpoint of the closest silence within
+    search_window seconds is used; if there is none, the audio is cut at the
+    target itself.
+    
+    Returns:
+        list: Boundaries in seconds, starting at 0.0 and ending at duration
+    """
+    points = [0.0]
+    midpoints = [(start + end) / 2 for start, end in silences]
+    target = chunk_seconds
+    while target < duration - search_window:
+        candidates = [
+            m for m in midpoints
+            if abs(m - target) <= search_window and m > points[-1]
+        ]
+        cut = min(candidates, key=lambda m: abs(m - target)) if candidates else target
+        points.append(cut)
+        target = cut + chunk_seconds
+    points.append(duration)
+    return points
+
+def split_audio_at_silence(audio_path: Path, output_dir: Path,
+                           chunk_seconds: float = 600.0) -> list[tuple[Path, float]]:
+    """Split an audio file into chunks cut at silences near chunk_seconds boundaries.
+    
+    Returns:
+        list: (chunk_path, offset_seconds) pairs in playback order
+    """
+    audio_path = Path(audio_path)
+    duration = get_audio_duration(audio_path)
+    
+    with span("audio.split", audio_seconds=duration) as current:
+        points = choose_split_points(duration, detect_silences(audio_path), chunk_seconds)
+        chunks = []
+        for index, (start, end) in enumerate(zip(points, points[1:])):
+            chunk_path = Path(output_dir) / f"{audio_path.stem}_chunk{index:03d}{audio_path.suffix}"
+            try:
+                subprocess.run([
+                    'ffmpeg', '-ss', f'{start:.3f}', '-t', f'{end - start:.3f}',
+                    '-i', str(audio_path), '-c', 'copy', str(chunk_path), '-y'
+                ], check=True, capture_output=True, text=True)
+            except subprocess.CalledProcessError as e:
+                print(f"Error splitting file: {e.stderr}")
+                raise
+            chunks.append((chunk_path, start))
+        current.set(chunks=len(chunks))
+    return chunks
+
+def decode_to_pcm(audio_path: Path, sample_rate: int = 16000) -> bytes:
+    """Decode an audio file to mono 16-bit little-endian PCM using ffmpeg."""
+    with span("audio.decode") as current:
+        try:
+            result = subprocess.run([
+                'ffmpeg', '-i', str(audio_path), '-f', 's16le', '-acodec', 'pcm_s16le',
+                '-ac', '1', '-ar', str(sample_rate), '-'
+            ], check=True, capture_output=True)
+        except subprocess.CalledProcessError as e:
+            print(f"Error decoding file: {e.stderr.decode(errors='replace')}")
+            raise
+        current.set(audio_seconds=len(result.stdout) / 2 / sample_rate)
+    return result.stdout
+
+def encode_pcm_to_mp3(pcm: bytes, output_path: Path, sample_rate: int = 16000) -> Path:
+    """Encode mono 16-bit PCM to a compact speech-quality MP3 using ffmpeg."""
+    try:
+        subprocess.run([
+            'ffmpeg', '-f', 's16le', '-ar', str(sample_rate), '-ac', '1', '-i', '-',
+            '-acodec', 'libmp3lame', '-b:a', '32k', str(output_path), '-y'
+        ], input=pcm, check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        print(f"Error encoding file: {e.stderr.decode(errors='replace')}")
+        raise
+    return output_path
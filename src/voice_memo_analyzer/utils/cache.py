@@ -2,38 +2,267 @@
 
 import hashlib
 import json
+import mmap
+import os
+import threading
 from pathlib import Path
 from datetime import datetime
-from ..config import CACHE_DIR
+from ..config import CACHE_DIR, MP3_DIR, TRANSCRIPT_DIR
+from .cache_store import CacheStore
+from .instrumentation import span
+from .singleflight import SingleFlight
+
+CACHE_DB_FILENAME = "cache.sqlite3"
+
+_stores: dict[Path, CacheStore] = {}
+_stores_lock = threading.Lock()
+_flights: dict[Path, SingleFlight] = {}
+
+def get_store() -> CacheStore:
+    """Return the shared cache store for the current CACHE_DIR."""
+    db_path = CACHE_DIR / CACHE_DB_FILENAME
+    with _stores_lock:
+        if db_path not in _stores:
+            _stores[db_path] = CacheStore(db_path)
+        return _stores[db_path]
+
+def get_flight() -> SingleFlight:
+    """Return the shared single-flight coordinator, locking in CACHE_DIR/locks."""
+    lock_dir = CACHE_DIR / "locks"
+    with _stores_lock:
+        if lock_dir not in _flights:
+            _flights[lock_dir] = SingleFlight(lock_dir)
+        return _flights[lock_dir]
+
+def compute_file_hash(file_path: Path) -> str:
+    """Hash a file's full content with SHA-256 over a memory map."""
+    digest = hashlib.sha256()
+    with span("cache.hash") as current, open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        current.set(bytes_read=size)
+    return digest.hexdigest()
 
 def get_file_hash(file_path: Path) -> str:
-    """Generate a hash of the file content for caching."""
-    hash_md5 = hashlib.md5()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+    """Generate a hash of the file content for caching.
+    
+    The hash is remembered in the cache store keyed by the file's resolved
+    path, size, mtime and inode, so an unchanged file is never re-read.
+    """
+    file_path = Path(file_path)
+    path = str(file_path.resolve())
+    stat = os.stat(file_path)
+    signature = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+    
+    store = get_store()
+    file_hash = store.get_file_hash(path, *signature)
+    if file_hash is None:
+        file_hash = compute_file_hash(file_path)
+        store.put_file_hash(path, *signature, file_hash)
+    return file_hash
+
+def track_file(path: Path, kind: str) -> None:
+    """Track a generated file for cache stats and eviction.
+    
+    Only files inside the managed data directories are tracked, so a user's
+    original recording is never evicted.
+    """
+    path = Path(path).resolve()
+    managed = [directory.resolve() for directory in (MP3_DIR, TRANSCRIPT_DIR, CACHE_DIR)]
+    if any(path.is_relative_to(directory) for directory in managed):
+        get_store().track_file(path, kind)
 
 def save_to_cache(cache_data: dict, file_hash: str) -> None:
-    """Save data to cache file."""
-    cache_file = CACHE_DIR / f"{file_hash}.json"
+    """Save transcript data to the cache store."""
     cache_data['timestamp'] = datetime.now().isoformat()
-    cache_file.write_text(json.dumps(cache_data, indent=2))
+    get_store().put(f"transcript:{file_hash}", "transcript", cache_data)
+    track_file(cache_data['transcript_path'], "transcript")
+    track_file(cache_data['mp3_path'], "audio")
 
-def get_from_cache(file_path: Path) -> tuple[Path | None, dict | None]:
+def get_from_cache(file_path: Path, file_hash: str | None = None) -> tuple[Path | None, dict | None]:
     """Get cached data if it exists.
     
+    Args:
+        file_path: Path to the original audio file
+        file_hash: Precomputed content hash, to avoid hashing the file again
+    
     Returns:
         tuple: (transcript_path, cache_data) or (None, None) if not found
     """
-    file_hash = get_file_hash(file_path)
-    cache_file = CACHE_DIR / f"{file_hash}.json"
+    if file_hash is None:
+        file_hash = get_file_hash(file_path)
+    store = get_store()
     
-    if cache_file.exists():
-        print("Found cached transcript...")
-        cache_data = json.loads(cache_file.read_text())
-        transcript_path = Path(cache_data['transcript_path'])
-        if transcript_path.exists():
-            print(f"Using cached transcript: {transcript_path}")
-            return transcript_path, cache_data
+    with span("cache.transcript", hit=False) as current:
+        cache_data = store.get(f"transcript:{file_hash}")
+        
+        if cache_data:
+            print("Found cached transcript...")
+            transcript_path = Path(cache_data['transcript_path'])
+            if transcript_path.exists():
+                print(f"Using cached transcript: {transcript_path}")
+                store.touch_file(transcript_path)
+                current.set(hit=True)
+                return transcript_path, cache_data
     return None, None
+
+def get_cached_transcript(file_hash: str) -> dict | None:
+    """Return the transcript data cached under a content hash, or None, without checking its files."""
+    return get_store().get(f"transcript:{file_hash}")
+
+def get_analysis_cache_key(formatted_transcript: str, prompt_version: str,
+                           model: str, temperature: float) -> str:
+    """Build the cache key for an analysis result.
+    
+    Returns:
+        str: Hash of (transcript hash, prompt version, model, temperature)
+    """
+    transcript_hash = hashlib.sha256(formatted_transcript.encode()).hexdigest()
+    key_source = json.dumps([transcript_hash, prompt_version, model, temperature])
+    return hashlib.sha256(key_source.encode()).hexdigest()
+
+def save_analysis_to_cache(analysis: dict, cache_key: str) -> None:
+    """Save analysis results to the analysis cache."""
+    get_store().put(f"analysis:{cache_key}", "analysis", analysis)
+
+def get_analysis_from_cache(cache_key: str) -> dict | None:
+    """Get cached analysis results if they exist.
+    
+    Returns:
+        dict: The cached analysis, or None if not found
+    """
+    with span("cache.analysis") as current:
+        analysis = get_store().get(f"analysis:{cache_key}")
+        current.set(hit=analysis is not None)
+    if analysis is not None:
+        print("Using cached analysis...")
+    return analysis
+
+def chunk_cache_key(audio_hash: str, start: float, end: float) -> str:
+    """Build the cache key for one transcribed chunk of a recording."""
+    return f"chunk:{audio_hash}:{start:.3f}-{end:.3f}"
+
+def save_transcription_plan(audio_hash: str, filename: str, bounds: list[tuple[float, float]]) -> None:
+    """Record how a recording is split so its progress can be reported.
+    
+    Args:
+        audio_hash: Content hash of the audio being transcribed
+        filename: Name of the audio file, shown in progress reports
+        bounds: (start, end) seconds of every chunk, in playback order
+    """
+    get_store().put(f"progress:{audio_hash}", "progress", {
+        'filename': filename,
+        'bounds': [list(bound) for bound in bounds],
+        'started': datetime.now().isoformat()
+    })
+
+def save_chunk_to_cache(audio_hash: str, start: float, end: float, response: dict) -> None:
+    """Checkpoint one transcribed chunk as soon as it completes."""
+    get_store().put(chunk_cache_key(audio_hash, start, end), "chunk", response)
+
+def get_chunk_from_cache(audio_hash: str, start: float, end: float) -> dict | None:
+    """Return a checkpointed chunk transcription, or None if it wasn't finished."""
+    return get_store().get(chunk_cache_key(audio_hash, start, end))
+
+def get_transcription_progress(audio_hash: str | None = None) -> list[dict]:
+    """Report how far unfinished chunked transcriptions got.
+    
+    Args:
+        audio_hash: Only report this recording, or None for every unfinished one
+    
+    Returns:
+        list: Dicts with 'audio_hash', 'filename', 'started', 'chunks' (the
+        total), 'done' and 'pending' (the (start, end) bounds still missing)
+    """
+    store = get_store()
+    prefix = f"progress:{audio_hash}" if audio_hash else "progress:"
+    progress = []
+    for key in store.keys("progress", prefix):
+        plan = store.get(key)
+        if plan is None:
+            continue
+        plan_hash = key.split(":", 1)[1]
+        done = set(store.keys("chunk", f"chunk:{plan_hash}:"))
+        pending = [
+            tuple(bound) for bound in plan['bounds']
+            if chunk_cache_key(plan_hash, *bound) not in done
+        ]
+        progress.append({
+            'audio_hash': plan_hash,
+            'filename': plan['filename'],
+            'started': plan['started'],
+            'chunks': len(plan['bounds']),
+            'done': len(plan['bounds']) - len(pending),
+            'pending': pending
+        })
+    return progress
+
+def clear_transcription_progress(audio_hash: str) -> None:
+    """Drop a recording's plan and chunk checkpoints once its transcript is complete."""
+    store = get_store()
+    for key in store.keys("chunk", f"chunk:{audio_hash}:"):
+        store.delete(key)
+    store.delete(f"progress:{audio_hash}")
+
+def save_batch_job(input_hash: str, batch_id: str, requests: int) -> None:
+    """Remember a submitted Batch API job so a restarted run waits for it instead of resubmitting.
+    
+    Args:
+        input_hash: Hash of the batch's input file
+        batch_id: ID of the submitted batch
+        requests: Number of requests in the batch
+    """
+    get_store().put(f"batch:{input_hash}", "batch", {
+        'batch_id': batch_id,
+        'requests': requests,
+        'submitted': datetime.now().isoformat()
+    })
+
+def get_batch_job(input_hash: str) -> dict | None:
+    """Return the submitted batch for an input file, or None if there is none."""
+    return get_store().get(f"batch:{input_hash}")
+
+def get_batch_jobs() -> list[dict]:
+    """List the submitted batches that haven't been collected yet.
+    
+    Returns:
+        list: Dicts with 'input_hash', 'batch_id', 'requests' and 'submitted'
+    """
+    store = get_store()
+    jobs = []
+    for key in store.keys("batch", "batch:"):
+        job = store.get(key)
+        if job is not None:
+            jobs.append({'input_hash': key.split(":", 1)[1], **job})
+    return jobs
+
+def clear_batch_job(input_hash: str) -> None:
+    """Forget a batch once its results have been collected (or it has failed)."""
+    get_store().delete(f"batch:{input_hash}")
+
+def get_cache_stats() -> dict:
+    """Summarize cache entries and the files in the managed data directories."""
+    store = _scanned_store()
+    return store.stats()
+
+def prune_cache(max_bytes: int | None = None, max_age_days: float | None = None) -> dict:
+    """Evict cache entries and generated files by age and least-recent use.
+    
+    Args:
+        max_bytes: Total size the cache may occupy, or None for no size limit
+        max_age_days: Evict anything not used within this many days, or None
+    
+    Returns:
+        dict: Counts of evicted entries and files, and bytes freed
+    """
+    return _scanned_store().prune(max_bytes=max_bytes, max_age_days=max_age_days)
+
+def _scanned_store() -> CacheStore:
+    """Return the store after registering any untracked files in the data directories."""
+    store = get_store()
+    for directory, kind in ((MP3_DIR, "audio"), (TRANSCRIPT_DIR, "transcript"), (CACHE_DIR, "cache")):
+        if directory.exists():
+            store.scan_directory(directory, kind)
+    return store
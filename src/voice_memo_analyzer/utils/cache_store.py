@@ -0,0 +1,234 @@
+"""SQLite-backed cache store with size and age based eviction.
+
+All cache entries (transcripts, analyses, file hashes) live in one SQLite
+database in WAL mode, and every generated file in the data directories is
+tracked with its size and last access time so the cache can be pruned by
+least-recent use, total size or age.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE INDEX IF NOT EXISTS files_last_access ON files (last_access);
+"""
+
+# Files in the data directories that are never tracked or evicted
+UNTRACKED_NAMES = {".gitkeep"}
+
+# Entry kinds that record unfinished work rather than cached results, so
+# they are never evicted (chunk checkpoints are kept while their plan is)
+PINNED_KINDS = ("batch", "progress")
+
+class CacheStore:
+    """A single SQLite database holding cache entries and tracked files.
+    
+    Each thread gets its own connection; WAL mode lets readers and a writer
+    (including ones in other processes) work at the same time.
+    """
+
+    def __init__(self, db_path: Path):
+        """Open (creating if needed) the store at db_path.
+        
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str, touch: bool = True) -> dict | None:
+        """Return the entry stored under key.
+        
+        Args:
+            key: The entry's key
+            touch: Mark the entry as recently used; bulk readers such as
+                reindexing pass False so they don't reset every entry's age
+        """
+        connection = self._connect()
+        row = connection.execute("SELECT data FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if touch:
+            connection.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key: str, kind: str, data: dict) -> None:
+        """Store data under key, replacing any existing entry."""
+        payload = json.dumps(data)
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO entries (key, kind, data, size, created_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, kind, payload, len(payload.encode()), now, now)
+        )
+
+    def delete(self, key: str) -> None:
+        """Remove the entry stored under key, if any."""
+        self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def keys(self, kind: str, prefix: str = "") -> list[str]:
+        """List the keys of one kind of entry, optionally filtered by prefix."""
+        rows = self._connect().execute(
+            "SELECT key FROM entries WHERE kind = ? AND substr(key, 1, ?) = ? ORDER BY key",
+            (kind, len(prefix), prefix)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def track_file(self, path: Path, kind: str) -> None:
+        """Record a generated file so it is counted and can be evicted."""
+        path = Path(path)
+        if not path.exists():
+            return
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO files (path, kind, size, created_at, last_access) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET size = excluded.size, last_access = excluded.last_access",
+            (str(path.resolve()), kind, path.stat().st_size, now, now)
+        )
+
+    def touch_file(self, path: Path) -> None:
+        """Mark a tracked file as recently used."""
+        self._connect().execute(
+            "UPDATE files SET last_access = ? WHERE path = ?",
+            (time.time(), str(Path(path).resolve()))
+        )
+
+    def scan_directory(self, directory: Path, kind: str) -> None:
+        """Start tracking files in directory that the store doesn't know about.
+        
+        Files created before the store existed are registered with their
+        modification time as the last access time.
+        """
+        connection = self._connect()
+        known = {row[0] for row in connection.execute("SELECT path FROM files")}
+        excluded = {self.db_path.name, f"{self.db_path.name}-wal", f"{self.db_path.name}-shm"}
+        for path in Path(directory).iterdir():
+            if not path.is_file() or path.name in UNTRACKED_NAMES or path.name in excluded:
+                continue
+            resolved = str(path.resolve())
+            if resolved not in known:
+                stat = path.stat()
+                connection.execute(
+                    "INSERT INTO files (path, kind, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (resolved, kind, stat.st_size, stat.st_mtime, stat.st_mtime)
+                )
+
+    def get_file_hash(self, path: str, size: int, mtime_ns: int, inode: int) -> str | None:
+        """Return the remembered hash for a file if its stat signature is unchanged."""
+        row = self._connect().execute(
+            "SELECT hash FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ? AND inode = ?",
+            (path, size, mtime_ns, inode)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put_file_hash(self, path: str, size: int, mtime_ns: int, inode: int, file_hash: str) -> None:
+        """Remember the hash of a file along with its stat signature."""
+        self._connect().execute(
+            "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, inode, hash) VALUES (?, ?, ?, ?, ?)",
+            (path, size, mtime_ns, inode, file_hash)
+        )
+
+    def stats(self) -> dict:
+        """Summarize the store.
+        
+        Returns:
+            dict: Per-kind 'count' and 'bytes' for entries and files, plus totals
+        """
+        connection = self._connect()
+        summary = {'entries': {}, 'files': {}}
+        for table in ('entries', 'files'):
+            for kind, count, size in connection.execute(
+                f"SELECT kind, COUNT(*), COALESCE(SUM(size), 0) FROM {table} GROUP BY kind ORDER BY kind"
+            ):
+                summary[table][kind] = {'count': count, 'bytes': size}
+        summary['total_bytes'] = sum(
+            item['bytes'] for table in ('entries', 'files') for item in summary[table].values()
+        )
+        return summary
+
+    def prune(self, max_bytes: int | None = None, max_age_days: float | None = None) -> dict:
+        """Evict entries and files by age, then least-recently-used until under max_bytes.
+        
+        Submitted batch jobs, transcription plans and the chunk checkpoints
+        of a plan that still exists are never evicted, though they count
+        towards the total size.
+        
+        Args:
+            max_bytes: Total size the entries and files may occupy, or None for no limit
+            max_age_days: Evict anything not accessed within this many days, or None
+        
+        Returns:
+            dict: 'entries' and 'files' evicted, and 'bytes' freed
+        """
+        connection = self._connect()
+        evicted = {'entries': 0, 'files': 0, 'bytes': 0}
+        placeholders = ", ".join("?" * len(PINNED_KINDS))
+        candidates = connection.execute(
+            "SELECT 'entries', key, size, last_access FROM entries "
+            f"WHERE kind NOT IN ({placeholders}) AND NOT (kind = 'chunk' AND EXISTS ("
+            "    SELECT 1 FROM entries AS plans WHERE plans.key = "
+            "    'progress:' || substr(entries.key, 7, instr(substr(entries.key, 7), ':') - 1)"
+            ")) "
+            "UNION ALL SELECT 'files', path, size, last_access FROM files "
+            "ORDER BY last_access",
+            PINNED_KINDS
+        ).fetchall()
+        total = connection.execute(
+            "SELECT (SELECT COALESCE(SUM(size), 0) FROM entries) + (SELECT COALESCE(SUM(size), 0) FROM files)"
+        ).fetchone()[0]
+        cutoff = time.time() - max_age_days * 86400 if max_age_days is not None else None
+        
+        for table, key, size, last_access in candidates:
+            expired = cutoff is not None and last_access < cutoff
+            oversize = max_bytes is not None and total > max_bytes
+            if not expired and not oversize:
+                # Everything after this is newer and the total only shrinks
+                break
+            if table == 'files':
+                Path(key).unlink(missing_ok=True)
+                connection.execute("DELETE FROM files WHERE path = ?", (key,))
+            else:
+                connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+            evicted[table] += 1
+            evicted['bytes'] += size
+            total -= size
+        return evicted
@@ -0,0 +1,310 @@
+"""Acoustic fingerprints for finding near-duplicate recordings.
+
+The content hash changes whenever a memo is re-exported, re-encoded or
+trimmed, even though the audio is the same. A fingerprint survives those
+edits: the loudest local peaks of the spectrogram are found with vectorized
+NumPy over decoded PCM, and each peak is paired with a few that follow it
+into hashes of (frequency, frequency, time apart). Two copies of a recording
+share many hashes, and for the shared stretch the hashes line up at one
+fixed time offset, which is what a match is scored on.
+
+Hashes are stored in a SQLite index keyed by hash, so a lookup reads only
+the postings of the hashes a recording contains. Requires numpy.
+"""
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ..config import FINGERPRINT_INDEX_PATH
+from .instrumentation import span
+
+SAMPLE_RATE = 16000
+FFT_SIZE = 1024  # 64 ms analysis window
+HOP_LENGTH = 512  # 32 ms between frames
+FRAME_SECONDS = HOP_LENGTH / SAMPLE_RATE
+FREQUENCY_BINS = 512  # Bins kept (up to 8 kHz), so a bin fits in 9 bits
+PEAK_FRAMES = 5  # A peak is the loudest point within this many frames...
+PEAK_BINS = 10  # ...and this many bins on either side
+PEAK_THRESHOLD_DB = 20.0  # Peaks must be this much louder than the block's median
+FAN_OUT = 5  # Later peaks each peak is paired with
+MAX_PAIR_FRAMES = 63  # Pairs at most this far apart (about 2 s), so the gap fits in 6 bits
+BLOCK_FRAMES = 4096  # Frames transformed at a time, bounding memory on long recordings
+ALIGN_TOLERANCE = 1  # Frames a re-encoded copy's peaks may drift
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    id INTEGER PRIMARY KEY,
+    file_hash TEXT NOT NULL UNIQUE,
+    duration REAL NOT NULL,
+    hashes INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hashes (
+    hash INTEGER NOT NULL,
+    recording INTEGER NOT NULL,
+    frame INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS hashes_hash ON hashes (hash, recording, frame);
+CREATE INDEX IF NOT EXISTS hashes_recording ON hashes (recording);
+CREATE TEMP TABLE IF NOT EXISTS query (hash INTEGER NOT NULL, frame INTEGER NOT NULL);
+"""
+
+@dataclass
+class Fingerprint:
+    """A recording's peak-pair hashes and the frame each pair starts at."""
+    hashes: np.ndarray
+    frames: np.ndarray
+    duration: float
+
+@dataclass
+class FingerprintMatch:
+    """An indexed recording that shares a stretch of audio with the query.
+    
+    A moment t seconds into the query is at t + offset in the matched
+    recording. start and end bound, in the query's seconds, the stretch
+    whose hashes line up at that offset.
+    """
+    file_hash: str
+    offset: float
+    start: float
+    end: float
+    matches: int
+
+def spectral_peaks(samples: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Find the spectrogram peaks of mono 16 kHz samples.
+    
+    The spectrogram is computed BLOCK_FRAMES at a time, with enough frames
+    of overlap that a peak near a block edge sees its whole neighborhood.
+    
+    Args:
+        samples: Mono samples as int16 or float
+    
+    Returns:
+        tuple: (frame, frequency bin) of each peak, ordered by frame
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    if len(samples) < FFT_SIZE:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    windows = sliding_window_view(samples, FFT_SIZE)[::HOP_LENGTH]
+    taper = np.hanning(FFT_SIZE).astype(np.float32)
+    
+    frames, bins = [], []
+    for block_start in range(0, len(windows), BLOCK_FRAMES):
+        first = max(0, block_start - PEAK_FRAMES)
+        last = min(len(windows), block_start + BLOCK_FRAMES + PEAK_FRAMES)
+        spectrum = np.abs(np.fft.rfft(windows[first:last] * taper, axis=1))[:, :FREQUENCY_BINS]
+        level = 20 * np.log10(spectrum + 1e-6)
+        
+        # Separable maximum filter: over time, then over frequency
+        padded = np.pad(level, ((PEAK_FRAMES, PEAK_FRAMES), (0, 0)), constant_values=-np.inf)
+        neighborhood = sliding_window_view(padded, 2 * PEAK_FRAMES + 1, axis=0).max(axis=-1)
+        padded = np.pad(neighborhood, ((0, 0), (PEAK_BINS, PEAK_BINS)), constant_values=-np.inf)
+        neighborhood = sliding_window_view(padded, 2 * PEAK_BINS + 1, axis=1).max(axis=-1)
+        
+        peaks = (level == neighborhood) & (level > np.median(level) + PEAK_THRESHOLD_DB)
+        peak_frames, peak_bins = np.nonzero(peaks)
+        peak_frames += first
+        inside = (peak_frames >= block_start) & (peak_frames < block_start + BLOCK_FRAMES)
+        frames.append(peak_frames[inside])
+        bins.append(peak_bins[inside])
+    return np.concatenate(frames), np.concatenate(bins)
+
+def hash_peaks(frames: np.ndarray, bins: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Pair each peak with the next FAN_OUT peaks and hash each pair.
+    
+    A hash packs the two frequency bins and the frames between the peaks,
+    so it is the same wherever in a recording the pair occurs.
+    
+    Args:
+        frames: Frame of each peak, ordered by frame
+        bins: Frequency bin of each peak
+    
+    Returns:
+        tuple: (hashes, frame of each pair's first peak)
+    """
+    hashes, anchors = [], []
+    for step in range(1, FAN_OUT + 1):
+        gaps = frames[step:] - frames[:-step]
+        paired = (gaps > 0) & (gaps <= MAX_PAIR_FRAMES)
+        hashes.append((bins[:-step][paired] << 15) | (bins[step:][paired] << 6) | gaps[paired])
+        anchors.append(frames[:-step][paired])
+    if not hashes:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(hashes).astype(np.int64), np.concatenate(anchors).astype(np.int64)
+
+def fingerprint_pcm(pcm: bytes) -> Fingerprint:
+    """Fingerprint mono 16-bit PCM at SAMPLE_RATE, as decode_to_pcm returns it."""
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    with span("fingerprint", audio_seconds=len(samples) / SAMPLE_RATE) as current:
+        hashes, frames = hash_peaks(*spectral_peaks(samples))
+        current.set(hashes=len(hashes))
+    return Fingerprint(hashes, frames, len(samples) / SAMPLE_RATE)
+
+def align_matches(deltas: np.ndarray) -> tuple[int, np.ndarray]:
+    """Find the frame offset the most matching hashes agree on.
+    
+    Args:
+        deltas: For each matching hash, its frame in the indexed recording
+            minus its frame in the query
+    
+    Returns:
+        tuple: (offset in frames, mask of the matches within
+        ALIGN_TOLERANCE frames of it)
+    """
+    low = int(deltas.min())
+    counts = np.bincount(deltas - low)
+    counts = np.convolve(counts, np.ones(2 * ALIGN_TOLERANCE + 1, dtype=np.int64), mode='same')
+    offset = int(np.argmax(counts)) + low
+    return offset, np.abs(deltas - offset) <= ALIGN_TOLERANCE
+
+class FingerprintIndex:
+    """A SQLite index from peak-pair hash to the recordings and frames it occurs at.
+    
+    Like SearchIndex, each thread gets its own connection to a WAL-mode
+    database.
+    """
+
+    def __init__(self, db_path: Path):
+        """Open (creating if needed) the index at db_path.
+        
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def add(self, file_hash: str, fingerprint: Fingerprint) -> None:
+        """Add or replace one recording's fingerprint.
+        
+        Args:
+            file_hash: Content hash of the original audio, identifying the recording
+            fingerprint: The recording's fingerprint
+        """
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._delete(connection, file_hash)
+            recording = connection.execute(
+                "INSERT INTO recordings (file_hash, duration, hashes, indexed_at) VALUES (?, ?, ?, ?)",
+                (file_hash, fingerprint.duration, len(fingerprint.hashes), time.time())
+            ).lastrowid
+            connection.executemany(
+                "INSERT INTO hashes (hash, recording, frame) VALUES (?, ?, ?)",
+                zip(fingerprint.hashes.tolist(), [recording] * len(fingerprint.hashes), fingerprint.frames.tolist())
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def remove(self, file_hash: str) -> None:
+        """Drop a recording from the index."""
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._delete(connection, file_hash)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _delete(connection: sqlite3.Connection, file_hash: str) -> None:
+        """Delete a recording and its hashes inside the caller's transaction."""
+        row = connection.execute("SELECT id FROM recordings WHERE file_hash = ?", (file_hash,)).fetchone()
+        if row is not None:
+            connection.execute("DELETE FROM hashes WHERE recording = ?", row)
+            connection.execute("DELETE FROM recordings WHERE id = ?", row)
+
+    def best_match(self, fingerprint: Fingerprint, min_matches: int = 50,
+                   exclude: str | None = None, candidates: int = 5) -> FingerprintMatch | None:
+        """Find the indexed recording that shares the longest aligned stretch with fingerprint.
+        
+        The recordings sharing the most hashes are scored by how many of
+        those hashes agree on a single time offset; hashes shared by chance
+        are spread over many offsets.
+        
+        Args:
+            fingerprint: Fingerprint of the recording to look up
+            min_matches: Aligned hashes needed to count as a match
+            exclude: Content hash of a recording to skip (usually the query's own)
+            candidates: Recordings with the most shared hashes that are scored
+        
+        Returns:
+            FingerprintMatch: The best match, or None if no recording has
+            min_matches aligned hashes
+        """
+        if not len(fingerprint.hashes):
+            return None
+        connection = self._connect()
+        connection.execute("BEGIN")
+        try:
+            connection.execute("DELETE FROM query")
+            connection.executemany(
+                "INSERT INTO query (hash, frame) VALUES (?, ?)",
+                zip(fingerprint.hashes.tolist(), fingerprint.frames.tolist())
+            )
+            shared = connection.execute(
+                "SELECT r.id, r.file_hash, COUNT(*) AS shared FROM query q "
+                "JOIN hashes h ON h.hash = q.hash JOIN recordings r ON r.id = h.recording "
+                "WHERE r.file_hash != ? GROUP BY r.id HAVING shared >= ? ORDER BY shared DESC LIMIT ?",
+                (exclude or "", min_matches, candidates)
+            ).fetchall()
+            best = None
+            for recording, file_hash, _ in shared:
+                pairs = np.array(connection.execute(
+                    "SELECT h.frame - q.frame, q.frame FROM query q "
+                    "JOIN hashes h ON h.hash = q.hash WHERE h.recording = ?",
+                    (recording,)
+                ).fetchall(), dtype=np.int64)
+                offset, aligned = align_matches(pairs[:, 0])
+                matches = int(aligned.sum())
+                if matches >= min_matches and (best is None or matches > best.matches):
+                    query_frames = pairs[aligned, 1]
+                    best = FingerprintMatch(
+                        file_hash, offset * FRAME_SECONDS, int(query_frames.min()) * FRAME_SECONDS,
+                        int(query_frames.max()) * FRAME_SECONDS + FFT_SIZE / SAMPLE_RATE, matches
+                    )
+            connection.execute("DELETE FROM query")
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return best
+
+    def stats(self) -> dict:
+        """Return the number of recordings and hashes in the index."""
+        connection = self._connect()
+        return {
+            'recordings': connection.execute("SELECT COUNT(*) FROM recordings").fetchone()[0],
+            'hashes': connection.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+        }
+
+_indexes: dict[Path, FingerprintIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_fingerprint_index() -> FingerprintIndex:
+    """Return the shared fingerprint index at FINGERPRINT_INDEX_PATH."""
+    with _indexes_lock:
+        if FINGERPRINT_INDEX_PATH not in _indexes:
+            _indexes[FINGERPRINT_INDEX_PATH] = FingerprintIndex(FINGERPRINT_INDEX_PATH)
+        return _indexes[FINGERPRINT_INDEX_PATH]
@@ -1,15 +1,41 @@
 """Utility functions for formatting transcripts and timestamps."""
 
+import re
+
+SEGMENT_LINE = re.compile(r"^\[(\d+(?::\d+)+)\]\s*(.*)$")
+
 def format_timestamp(seconds: float) -> str:
     """Convert seconds to MM:SS format."""
     minutes = int(seconds // 60)
     seconds = int(seconds % 60)
     return f"{minutes:02d}:{seconds:02d}"
 
+def parse_timestamp(timestamp: str) -> float:
+    """Convert an MM:SS (or HH:MM:SS) timestamp back to seconds."""
+    seconds = 0.0
+    for part in timestamp.strip("[] ").split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+def parse_segments(formatted_transcript: str) -> list[tuple[str, float, str]]:
+    """Split a formatted transcript into (timestamp, seconds, text) segments."""
+    segments = []
+    for line in formatted_transcript.splitlines():
+        match = SEGMENT_LINE.match(line.strip())
+        if match and match.group(2):
+            segments.append((match.group(1), parse_timestamp(match.group(1)), match.group(2)))
+    return segments
+
+def segment_field(segment, name: str):
+    """Read a field from a segment that may be an API object or a plain dict."""
+    if isinstance(segment, dict):
+        return segment[name]
+    return getattr(segment, name)
+
 def format_transcript_with_timestamps(response) -> str:
     """Format the transcript with timestamps from verbose JSON response."""
     formatted_lines = []
     for segment in response.segments:
-        start_time = format_timestamp(segment.start)
-        formatted_lines.append(f"[{start_time}] {segment.text}")
+        start_time = format_timestamp(segment_field(segment, 'start'))
+        formatted_lines.append(f"[{start_time}] {segment_field(segment, 'text')}")
     return "\n".join(formatted_lines)
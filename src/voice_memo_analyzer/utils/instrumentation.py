@@ -0,0 +1,231 @@
+"""Timing and resource instrumentation for the analysis stages.
+
+Each stage runs inside a span:
+
+    with span("audio.convert", profile="speech") as current:
+        ...
+        current.set(bytes_read=input_size)
+
+When a span ends it is passed to every hook registered with add_hook.
+Profiler collects spans for the --profile JSON report, and MetricsRegistry
+aggregates them into Prometheus counters that serve_metrics exposes over
+HTTP. Measurements use a shared vocabulary: bytes_read, bytes_written,
+bytes_uploaded, audio_seconds, prompt_tokens, completion_tokens and hit.
+"""
+
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+@dataclass
+class Span:
+    """One timed stage and the measurements recorded while it ran."""
+    name: str
+    parent: str | None = None
+    started: float = field(default_factory=time.time)
+    duration: float = 0.0
+    attributes: dict = field(default_factory=dict)
+    error: str | None = None
+
+    def set(self, **attributes) -> None:
+        """Record measurements, replacing earlier values with the same name."""
+        self.attributes.update(attributes)
+
+_hooks: list[Callable[[Span], None]] = []
+_hooks_lock = threading.Lock()
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+
+def add_hook(hook: Callable[[Span], None]) -> None:
+    """Call hook with every span that finishes, from any thread."""
+    with _hooks_lock:
+        _hooks.append(hook)
+
+def remove_hook(hook: Callable[[Span], None]) -> None:
+    """Stop calling a hook added with add_hook."""
+    with _hooks_lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """Time the enclosed block as a stage called name.
+    
+    Spans nest: a span started inside another records the outer one as its
+    parent, including across threads started with a copied context and
+    across awaits in the same task.
+    
+    Args:
+        name: Stage name, dotted by component (e.g. 'transcribe.request')
+        **attributes: Measurements known before the stage starts
+    
+    Yields:
+        Span: The span, for recording measurements with set()
+    """
+    parent = _current_span.get()
+    current = Span(name=name, parent=parent.name if parent else None, attributes=dict(attributes))
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration = time.perf_counter() - started
+        _current_span.reset(token)
+        with _hooks_lock:
+            hooks = list(_hooks)
+        for hook in hooks:
+            try:
+                hook(current)
+            except Exception as e:
+                print(f"Instrumentation hook failed: {e}")
+
+def _numeric(value) -> bool:
+    """Check whether an attribute value can be summed (bools count as 0/1)."""
+    return isinstance(value, (int, float))
+
+class Profiler:
+    """Collects spans while active and summarizes them per stage.
+    
+    Use as a context manager around the work to profile:
+    
+        with Profiler() as profiler:
+            analyzer.analyze_audio(path)
+        profiler.write(Path("profile.json"))
+    """
+
+    def __init__(self):
+        """Initialize an empty profiler."""
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, finished: Span) -> None:
+        """Hook entry point: record a finished span."""
+        with self._lock:
+            self.spans.append(finished)
+
+    def __enter__(self) -> "Profiler":
+        add_hook(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        remove_hook(self)
+
+    def report(self) -> dict:
+        """Summarize the recorded spans.
+        
+        Returns:
+            dict: 'stages' maps each stage name to its count, total and max
+            seconds, errors and summed numeric measurements (for 'hit', the
+            number of cache hits); 'spans' lists every span in finish order
+        """
+        with self._lock:
+            spans = list(self.spans)
+        stages = {}
+        for finished in spans:
+            stage = stages.setdefault(finished.name, {
+                'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0, 'errors': 0
+            })
+            stage['count'] += 1
+            stage['total_seconds'] += finished.duration
+            stage['max_seconds'] = max(stage['max_seconds'], finished.duration)
+            stage['errors'] += finished.error is not None
+            for name, value in finished.attributes.items():
+                if _numeric(value):
+                    stage[name] = stage.get(name, 0) + value
+        return {'stages': stages, 'spans': [asdict(finished) for finished in spans]}
+
+    def write(self, path: Path) -> None:
+        """Write the report as JSON."""
+        Path(path).write_text(json.dumps(self.report(), indent=2))
+
+class MetricsRegistry:
+    """Aggregates spans into cumulative Prometheus counters."""
+
+    def __init__(self, prefix: str = "voice_memo"):
+        """Initialize empty counters.
+        
+        Args:
+            prefix: Prefix for every metric name
+        """
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._runs: dict[str, int] = {}
+        self._seconds: dict[str, float] = {}
+        self._errors: dict[str, int] = {}
+        self._measurements: dict[tuple[str, str], float] = {}
+
+    def __call__(self, finished: Span) -> None:
+        """Hook entry point: add a finished span to the counters."""
+        with self._lock:
+            name = finished.name
+            self._runs[name] = self._runs.get(name, 0) + 1
+            self._seconds[name] = self._seconds.get(name, 0.0) + finished.duration
+            self._errors[name] = self._errors.get(name, 0) + (finished.error is not None)
+            for attribute, value in finished.attributes.items():
+                if _numeric(value):
+                    key = (name, attribute)
+                    self._measurements[key] = self._measurements.get(key, 0) + value
+
+    def render(self) -> str:
+        """Return the counters in the Prometheus text exposition format."""
+        prefix = self.prefix
+        lines = []
+        with self._lock:
+            for metric, help_text, values in (
+                ("stage_runs_total", "Stages completed", self._runs),
+                ("stage_seconds_total", "Wall time spent in each stage", self._seconds),
+                ("stage_errors_total", "Stages that raised an error", self._errors),
+            ):
+                lines.append(f"# HELP {prefix}_{metric} {help_text}")
+                lines.append(f"# TYPE {prefix}_{metric} counter")
+                for stage, value in sorted(values.items()):
+                    lines.append(f'{prefix}_{metric}{{stage="{stage}"}} {value}')
+            lines.append(f"# HELP {prefix}_stage_measurement_total Summed stage measurements (bytes, tokens, audio seconds, cache hits)")
+            lines.append(f"# TYPE {prefix}_stage_measurement_total counter")
+            for (stage, attribute), value in sorted(self._measurements.items()):
+                lines.append(
+                    f'{prefix}_stage_measurement_total{{stage="{stage}",measurement="{attribute}"}} {value}'
+                )
+        return "\n".join(lines) + "\n"
+
+def serve_metrics(registry: MetricsRegistry, port: int, host: str = "127.0.0.1") -> "ThreadingHTTPServer":
+    """Serve registry.render() at /metrics from a background thread.
+    
+    Args:
+        registry: The metrics to expose
+        port: TCP port to listen on (0 picks a free port)
+        host: Interface to bind
+    
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown() to stop it
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
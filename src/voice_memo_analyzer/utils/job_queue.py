@@ -0,0 +1,149 @@
+"""Durable SQLite job queue for the watch-folder daemon.
+
+Each audio file is one job, identified by its path and stat signature. Jobs
+survive restarts: anything left 'running' by a crash is put back to
+'pending' on startup (or marked 'failed' once it has crashed max_attempts
+times, so a memo that kills the process can't loop forever), and a file that was completed is not queued again
+unless its size or modification time changes. A job that fails is retried
+with exponential backoff: its queued_at is moved into the future, and only
+jobs whose queued_at has passed are claimed.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    queued_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, queued_at);
+"""
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+class JobQueue:
+    """A persistent queue of audio files waiting to be analyzed.
+    
+    Like CacheStore, each thread gets its own connection to a WAL-mode
+    database, so the watcher and the workers can use it concurrently.
+    """
+
+    def __init__(self, db_path: Path, max_attempts: int = 3, retry_seconds: float = 60.0):
+        """Open (creating if needed) the queue at db_path.
+        
+        Args:
+            db_path: Path to the SQLite database file
+            max_attempts: Times a job is tried before it is marked failed
+            retry_seconds: Wait before retrying a failed job, doubled after
+                each further failure
+        """
+        self.db_path = Path(db_path)
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self._local = threading.local()
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def enqueue(self, path: Path, size: int, mtime_ns: int) -> bool:
+        """Queue a file unless the same version is already queued, running or done.
+        
+        Args:
+            path: The audio file
+            size: Its size in bytes
+            mtime_ns: Its modification time in nanoseconds
+        
+        Returns:
+            bool: True if the file was (re)queued
+        """
+        now = time.time()
+        cursor = self._connect().execute(
+            "INSERT INTO jobs (path, size, mtime_ns, status, queued_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, "
+            "status = excluded.status, attempts = 0, error = NULL, "
+            "queued_at = excluded.queued_at, updated_at = excluded.updated_at "
+            "WHERE jobs.size != excluded.size OR jobs.mtime_ns != excluded.mtime_ns",
+            (str(Path(path).resolve()), size, mtime_ns, PENDING, now, now)
+        )
+        return cursor.rowcount > 0
+
+    def claim(self) -> Path | None:
+        """Mark the oldest pending job that is due as running and return its path, or None."""
+        now = time.time()
+        row = self._connect().execute(
+            "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? "
+            "WHERE path = (SELECT path FROM jobs WHERE status = ? AND queued_at <= ? "
+            "ORDER BY queued_at LIMIT 1) "
+            "RETURNING path",
+            (RUNNING, now, PENDING, now)
+        ).fetchone()
+        return Path(row[0]) if row else None
+
+    def complete(self, path: Path, error: str | None = None) -> None:
+        """Record a job's outcome.
+        
+        A failed job goes back to pending until it has used max_attempts,
+        due again retry_seconds * 2 ** (attempts - 1) from now.
+        """
+        connection = self._connect()
+        if error is None:
+            connection.execute(
+                "UPDATE jobs SET status = ?, error = NULL, updated_at = ? WHERE path = ?",
+                (DONE, time.time(), str(path))
+            )
+        else:
+            now = time.time()
+            connection.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "queued_at = ? + ? * (1 << (attempts - 1)), error = ?, updated_at = ? WHERE path = ?",
+                (self.max_attempts, FAILED, PENDING, now, self.retry_seconds, error, now, str(path))
+            )
+
+    def resume(self) -> int:
+        """Requeue jobs left running by a previous process and return how many.
+        
+        The interrupted run already counts as an attempt (claim counted it),
+        so a job that has used max_attempts is marked failed instead.
+        """
+        rows = self._connect().execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+            "error = CASE WHEN attempts >= ? THEN ? ELSE error END, updated_at = ? "
+            "WHERE status = ? RETURNING status",
+            (self.max_attempts, FAILED, PENDING, self.max_attempts, "interrupted", time.time(), RUNNING)
+        ).fetchall()
+        return sum(status == PENDING for status, in rows)
+
+    def counts(self) -> dict:
+        """Return the number of jobs in each status."""
+        rows = self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+        return {status: count for status, count in rows}
+
+    def status(self, path: Path) -> str | None:
+        """Return a job's status, or None if the file was never queued."""
+        row = self._connect().execute(
+            "SELECT status FROM jobs WHERE path = ?", (str(Path(path).resolve()),)
+        ).fetchone()
+        return row[0] if row else None
@@ -0,0 +1,144 @@
+"""Rate-limit-aware scheduling for asynchronous OpenAI API calls.
+
+All async API calls go through one RateLimitScheduler, which paces them with
+token buckets for requests per minute and tokens per minute and retries
+rate-limit and server errors with jittered exponential backoff. The shared
+AsyncOpenAI client reuses a single pooled set of HTTP connections.
+"""
+
+import asyncio
+import random
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, TypeVar
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """A token bucket that refills continuously at rate_per_minute.
+    
+    Callers reserve tokens up front; if the bucket goes negative they wait
+    until it has refilled to zero, so waiters are served in arrival order.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float | None = None):
+        """Initialize a full bucket.
+        
+        Args:
+            rate_per_minute: Tokens added per minute
+            capacity: Maximum burst size, defaults to one minute's worth
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float) -> float:
+        """Take amount tokens and return how many seconds to wait before using them."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= min(amount, self.capacity)
+        return max(0.0, -self.tokens / self.rate)
+
+    async def acquire(self, amount: float) -> None:
+        """Wait until amount tokens are available."""
+        delay = self.reserve(amount)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+def is_retryable(error: Exception) -> bool:
+    """Check whether an API error is worth retrying (429, 5xx, timeouts, dropped connections)."""
+    import openai
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    return getattr(error, "status_code", None) in RETRYABLE_STATUS_CODES
+
+def _retry_after(error: Exception) -> float | None:
+    """Return the server's Retry-After delay in seconds, if it sent one."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+class RateLimitScheduler:
+    """Paces and retries async API calls against shared RPM/TPM budgets.
+    
+    One scheduler should be shared by every component that talks to the
+    API, so transcription and analysis jobs draw from the same budgets.
+    """
+
+    def __init__(self, requests_per_minute: float = 500, tokens_per_minute: float = 30000,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+        """Initialize the scheduler.
+        
+        Args:
+            requests_per_minute: Request budget
+            tokens_per_minute: Token budget (prompt plus expected completion tokens)
+            max_retries: Retries after the first attempt before giving up
+            base_delay: Backoff delay for the first retry, doubled each retry
+            max_delay: Upper bound on a single backoff delay
+        """
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff_delay(self, attempt: int, error: Exception | None = None) -> float:
+        """Return the delay before retry number attempt (0-based), with full jitter."""
+        retry_after = _retry_after(error) if error is not None else None
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def submit(self, call: Callable[[], Awaitable[T]], tokens: int = 0) -> T:
+        """Run an API call within the budgets, retrying transient failures.
+        
+        Args:
+            call: Zero-argument function returning a fresh awaitable per attempt
+            tokens: Estimated tokens the call consumes
+        
+        Returns:
+            The call's result
+        
+        Raises:
+            Exception: The last error if the call isn't retryable or retries run out
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.requests.acquire(1)
+            if tokens:
+                await self.tokens.acquire(tokens)
+            try:
+                return await call()
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt, e)
+                print(f"API call failed ({e}); retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+
+def create_async_client(max_connections: int = 20) -> "AsyncOpenAI":
+    """Create an AsyncOpenAI client with one shared, bounded connection pool.
+    
+    The SDK's own retries are disabled because RateLimitScheduler handles them.
+    """
+    try:
+        import httpx
+    except ImportError:  # openai releases built on the httpx2 fork
+        import httpx2 as httpx
+    import openai
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+    
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    return AsyncOpenAI(
+        http_client=DefaultAsyncHttpxClient(limits=limits),
+        timeout=openai.Timeout(600.0, connect=10.0),
+        max_retries=0
+    )
@@ -0,0 +1,201 @@
+"""Full-text search over all transcripts with SQLite FTS5.
+
+Every transcript segment (one "[MM:SS] text" line) is a row in an FTS5
+index, so a query returns the matching memos with the timestamp of each
+matching segment and a highlighted snippet, ranked by BM25. The index is
+updated whenever a transcript is written and can be rebuilt from the
+transcript cache.
+"""
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from ..config import SEARCH_INDEX_PATH
+from .cache import get_store
+from .formatting import parse_segments
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memos (
+    file_hash TEXT PRIMARY KEY,
+    original_filename TEXT NOT NULL,
+    transcript_path TEXT,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    file_hash TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_file_hash ON segments (file_hash);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+    text, content='segments', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS segments_insert AFTER INSERT ON segments BEGIN
+    INSERT INTO segments_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS segments_delete AFTER DELETE ON segments BEGIN
+    INSERT INTO segments_fts (segments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+@dataclass
+class SearchHit:
+    """One matching transcript segment."""
+    file_hash: str
+    original_filename: str
+    timestamp: str
+    seconds: float
+    snippet: str
+    rank: float
+
+def build_match_query(query: str) -> str:
+    """Turn free text into an FTS5 query that matches all of its words.
+    
+    Each word is quoted so punctuation can't be read as query syntax; a
+    trailing * keeps its meaning as a prefix search.
+    """
+    terms = []
+    for word in query.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+class SearchIndex:
+    """An incremental FTS5 index of transcript segments.
+    
+    Like CacheStore, each thread gets its own connection to a WAL-mode
+    database.
+    """
+
+    def __init__(self, db_path: Path):
+        """Open (creating if needed) the index at db_path.
+        
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def index_transcript(self, file_hash: str, original_filename: str, formatted_transcript: str,
+                         transcript_path: Path | None = None) -> int:
+        """Add or replace one memo's segments in the index.
+        
+        Args:
+            file_hash: Content hash of the original audio, identifying the memo
+            original_filename: Name shown in search results
+            formatted_transcript: Transcript with one [MM:SS] segment per line
+            transcript_path: Where the transcript text file is stored
+        
+        Returns:
+            int: Number of segments indexed
+        """
+        segments = parse_segments(formatted_transcript)
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DELETE FROM segments WHERE file_hash = ?", (file_hash,))
+            connection.execute(
+                "INSERT OR REPLACE INTO memos (file_hash, original_filename, transcript_path, indexed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (file_hash, original_filename, str(transcript_path) if transcript_path else None, time.time())
+            )
+            connection.executemany(
+                "INSERT INTO segments (file_hash, timestamp, seconds, text) VALUES (?, ?, ?, ?)",
+                [(file_hash, timestamp, seconds, text) for timestamp, seconds, text in segments]
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return len(segments)
+
+    def remove(self, file_hash: str) -> None:
+        """Drop a memo and its segments from the index."""
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DELETE FROM segments WHERE file_hash = ?", (file_hash,))
+            connection.execute("DELETE FROM memos WHERE file_hash = ?", (file_hash,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def search(self, query: str, limit: int = 20) -> list[SearchHit]:
+        """Find the segments matching every word of query, best matches first.
+        
+        Args:
+            query: Words to search for; end a word with * for a prefix match
+            limit: Maximum number of segments to return
+        
+        Returns:
+            list: SearchHit for each matching segment, ranked by BM25
+        """
+        match_query = build_match_query(query)
+        if not match_query:
+            return []
+        rows = self._connect().execute(
+            "SELECT s.file_hash, m.original_filename, s.timestamp, s.seconds, "
+            "snippet(segments_fts, 0, '[', ']', '...', 16), bm25(segments_fts) AS rank "
+            "FROM segments_fts "
+            "JOIN segments s ON s.id = segments_fts.rowid "
+            "JOIN memos m ON m.file_hash = s.file_hash "
+            "WHERE segments_fts MATCH ? ORDER BY rank LIMIT ?",
+            (match_query, limit)
+        ).fetchall()
+        return [SearchHit(*row) for row in rows]
+
+    def stats(self) -> dict:
+        """Return the number of memos and segments in the index."""
+        connection = self._connect()
+        return {
+            'memos': connection.execute("SELECT COUNT(*) FROM memos").fetchone()[0],
+            'segments': connection.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        }
+
+_indexes: dict[Path, SearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_search_index() -> SearchIndex:
+    """Return the shared search index at SEARCH_INDEX_PATH."""
+    with _indexes_lock:
+        if SEARCH_INDEX_PATH not in _indexes:
+            _indexes[SEARCH_INDEX_PATH] = SearchIndex(SEARCH_INDEX_PATH)
+        return _indexes[SEARCH_INDEX_PATH]
+
+def reindex_from_cache(index: SearchIndex) -> int:
+    """Index every transcript in the transcript cache.
+    
+    Returns:
+        int: Number of memos indexed
+    """
+    store = get_store()
+    count = 0
+    for key in store.keys("transcript", "transcript:"):
+        data = store.get(key, touch=False)
+        if data:
+            index.index_transcript(
+                key.split(":", 1)[1], data['original_filename'],
+                data['formatted_transcript'], data.get('transcript_path')
+            )
+            count += 1
+    return count
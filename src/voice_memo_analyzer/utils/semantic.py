@@ -0,0 +1,437 @@
+"""Semantic search over transcript segments and analysis results.
+
+Transcript segments, key moments and action items are embedded in batches
+and appended to a float32 matrix on disk (vectors.f32), with a parallel
+int64 id sidecar (ids.i64) mapping each row to an item in a small SQLite
+database. Queries memory-map the matrix and score it in chunks with NumPy,
+so opening the index is instant and memory use stays bounded however many
+segments it holds. Requires numpy.
+
+Rows are L2-normalized when they are written, so cosine similarity is a
+single matrix-vector product. Re-indexing a memo deletes its items and
+leaves their rows behind as dead rows, which searches skip and compact()
+removes.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+import numpy as np
+
+from ..config import EMBEDDING_BATCH_SIZE, EMBEDDING_MODEL, SEMANTIC_COMPACT_FRACTION
+from .cache import get_store
+from .formatting import parse_timestamp
+from .search import parse_segments
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+EmbedFunction = Callable[[list[str]], "np.ndarray | list[list[float]]"]
+
+# Item ids are AUTOINCREMENT so a replaced item's id, whose row stays in the
+# matrix until it is compacted, is never given to a new item
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS memos (
+    file_hash TEXT PRIMARY KEY,
+    original_filename TEXT NOT NULL,
+    content_key TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_hash TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    timestamp TEXT,
+    seconds REAL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_file_hash ON items (file_hash);
+"""
+
+VECTORS_FILENAME = "vectors.f32"
+IDS_FILENAME = "ids.i64"
+ITEMS_FILENAME = "items.sqlite3"
+
+@dataclass
+class SemanticHit:
+    """One item similar to the query."""
+    file_hash: str
+    original_filename: str
+    kind: str
+    timestamp: str | None
+    seconds: float | None
+    text: str
+    score: float
+
+def openai_embedder(client: "OpenAI", model: str = EMBEDDING_MODEL) -> EmbedFunction:
+    """Return an embedding function that calls the OpenAI embeddings API.
+    
+    Args:
+        client: OpenAI client
+        model: Embedding model name
+    
+    Returns:
+        callable: Maps a batch of texts to one embedding per text
+    """
+    def embed(texts: list[str]) -> list[list[float]]:
+        response = client.embeddings.create(model=model, input=texts)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+    return embed
+
+def memo_items(formatted_transcript: str, analysis: dict | None = None) -> list[tuple]:
+    """List the searchable items of a memo.
+    
+    Args:
+        formatted_transcript: Transcript with one [MM:SS] segment per line
+        analysis: ConversationAnalyzer results, for key moments and action items
+    
+    Returns:
+        list: (kind, timestamp, seconds, text) for every segment, key moment
+        and action item; action items have no timestamp
+    """
+    items = [
+        ('segment', timestamp, seconds, text)
+        for timestamp, seconds, text in parse_segments(formatted_transcript)
+    ]
+    analysis = analysis or {}
+    for moment in analysis.get('key_moments', []):
+        timestamp = moment.get('timestamp')
+        try:
+            seconds = parse_timestamp(timestamp) if timestamp else None
+        except ValueError:
+            seconds = None
+        if moment.get('summary'):
+            items.append(('key_moment', timestamp, seconds, moment['summary']))
+    for action_item in analysis.get('action_items', []):
+        if action_item:
+            items.append(('action_item', None, None, str(action_item)))
+    return items
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length (zero rows are left as zeros)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def top_k(matrix: np.ndarray, query: np.ndarray, k: int,
+          chunk_rows: int = 65536) -> tuple[np.ndarray, np.ndarray]:
+    """Find the rows of matrix with the highest dot product with query.
+    
+    The matrix is scored chunk_rows rows at a time, keeping only the best k
+    of each chunk, so a memory-mapped matrix is never read into memory at once.
+    
+    Args:
+        matrix: (rows, dimensions) array, typically a memmap
+        query: (dimensions,) vector
+        k: Number of rows to return
+        chunk_rows: Rows scored per step
+    
+    Returns:
+        tuple: (row indices, scores), best first
+    """
+    best_rows = np.empty(0, dtype=np.int64)
+    best_scores = np.empty(0, dtype=np.float32)
+    for start in range(0, len(matrix), chunk_rows):
+        scores = np.asarray(matrix[start:start + chunk_rows]) @ query
+        if len(scores) > k:
+            keep = np.argpartition(-scores, k - 1)[:k]
+        else:
+            keep = np.arange(len(scores))
+        best_rows = np.concatenate([best_rows, keep + start])
+        best_scores = np.concatenate([best_scores, scores[keep]])
+        if len(best_scores) > k:
+            keep = np.argpartition(-best_scores, k - 1)[:k]
+            best_rows, best_scores = best_rows[keep], best_scores[keep]
+    order = np.argsort(-best_scores, kind="stable")
+    return best_rows[order], best_scores[order]
+
+class SemanticIndex:
+    """An append-only embedding index of transcript segments and analysis items.
+    
+    Writers serialize on the SQLite write lock. The number of committed rows
+    is stored in the database, so rows left behind by an interrupted write
+    are ignored by readers and overwritten by the next write. Rows of
+    replaced or removed items stay in the matrix until it is compacted,
+    which writers do once they make up compact_fraction of it.
+    """
+
+    def __init__(self, directory: Path, embed_fn: EmbedFunction, model: str = EMBEDDING_MODEL,
+                 batch_size: int = EMBEDDING_BATCH_SIZE,
+                 compact_fraction: float | None = SEMANTIC_COMPACT_FRACTION):
+        """Open (creating if needed) the index in directory.
+        
+        Args:
+            directory: Directory holding the matrix, id sidecar and item database
+            embed_fn: Maps a batch of texts to one embedding per text
+            model: Name of the embedding model, recorded so vectors from
+                different models are never mixed
+            batch_size: Texts sent to embed_fn per call
+            compact_fraction: Share of dead rows at which index_memo and
+                remove compact the matrix, or None to leave it to compact()
+        """
+        self.directory = Path(directory)
+        self.embed_fn = embed_fn
+        self.model = model
+        self.batch_size = batch_size
+        self.compact_fraction = compact_fraction
+        self.vectors_path = self.directory / VECTORS_FILENAME
+        self.ids_path = self.directory / IDS_FILENAME
+        self._local = threading.local()
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.directory / ITEMS_FILENAME, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def _meta(self, connection: sqlite3.Connection) -> tuple[int, int | None, str | None]:
+        """Return the committed (rows, dimensions, model)."""
+        meta = dict(connection.execute("SELECT name, value FROM meta"))
+        dimensions = meta.get('dimensions')
+        return int(meta.get('rows', 0)), int(dimensions) if dimensions else None, meta.get('model')
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Embed texts in batches of batch_size and return normalized float32 rows."""
+        batches = [
+            np.asarray(self.embed_fn(texts[start:start + self.batch_size]), dtype=np.float32)
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        return normalize_rows(np.concatenate(batches))
+
+    def index_memo(self, file_hash: str, original_filename: str, formatted_transcript: str,
+                   analysis: dict | None = None) -> int:
+        """Add or replace a memo's items in the index.
+        
+        A memo whose items haven't changed since it was last indexed is
+        skipped without calling the embedding function.
+        
+        Args:
+            file_hash: Content hash of the original audio, identifying the memo
+            original_filename: Name shown in search results
+            formatted_transcript: Transcript with one [MM:SS] segment per line
+            analysis: ConversationAnalyzer results, for key moments and action items
+        
+        Returns:
+            int: Number of items embedded (0 if the memo was already indexed)
+        
+        Raises:
+            ValueError: If the index was built with a different model or dimensions
+        """
+        items = memo_items(formatted_transcript, analysis)
+        content_key = hashlib.sha256(
+            json.dumps([self.model, items], sort_keys=True).encode()
+        ).hexdigest()
+        connection = self._connect()
+        row = connection.execute(
+            "SELECT content_key FROM memos WHERE file_hash = ?", (file_hash,)
+        ).fetchone()
+        if row and row[0] == content_key:
+            return 0
+        
+        # Embed before taking the write lock; API calls can be slow
+        vectors = self.embed([item[3] for item in items]) if items else None
+        
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows, dimensions, model = self._meta(connection)
+            if vectors is not None:
+                if dimensions is not None and (dimensions != vectors.shape[1] or model != self.model):
+                    raise ValueError(
+                        f"Index holds {dimensions}-dimensional {model} vectors, "
+                        f"got {vectors.shape[1]}-dimensional {self.model} vectors"
+                    )
+                dimensions = vectors.shape[1]
+            connection.execute("DELETE FROM items WHERE file_hash = ?", (file_hash,))
+            ids = [
+                connection.execute(
+                    "INSERT INTO items (file_hash, kind, timestamp, seconds, text) VALUES (?, ?, ?, ?, ?)",
+                    (file_hash, *item)
+                ).lastrowid
+                for item in items
+            ]
+            if vectors is not None:
+                self._append(rows, dimensions, vectors, np.asarray(ids, dtype=np.int64))
+                rows += len(ids)
+            connection.executemany("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", [
+                ('rows', str(rows)), ('dimensions', str(dimensions or '')), ('model', self.model)
+            ])
+            connection.execute(
+                "INSERT OR REPLACE INTO memos (file_hash, original_filename, content_key) VALUES (?, ?, ?)",
+                (file_hash, original_filename, content_key)
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        self._compact_if_sparse()
+        return len(items)
+
+    def _append(self, rows: int, dimensions: int, vectors: np.ndarray, ids: np.ndarray) -> None:
+        """Write vectors and ids after the first rows committed rows, durably."""
+        for path, data, row_bytes in (
+            (self.vectors_path, vectors, dimensions * 4),
+            (self.ids_path, ids, 8),
+        ):
+            with open(path, "ab") as f:
+                # Drop anything an interrupted write left past the committed rows
+                f.truncate(rows * row_bytes)
+                f.write(np.ascontiguousarray(data).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+    def remove(self, file_hash: str) -> None:
+        """Drop a memo's items; their rows stay in the matrix until it is compacted."""
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DELETE FROM items WHERE file_hash = ?", (file_hash,))
+            connection.execute("DELETE FROM memos WHERE file_hash = ?", (file_hash,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        self._compact_if_sparse()
+
+    def _compact_if_sparse(self) -> None:
+        """Compact the matrix once more than compact_fraction of its rows are dead."""
+        if self.compact_fraction is None:
+            return
+        stats = self.stats()
+        if stats['rows'] - stats['items'] > self.compact_fraction * stats['rows']:
+            self.compact()
+
+    def _matrix(self, rows: int, dimensions: int) -> tuple[np.ndarray, np.ndarray]:
+        """Memory-map the committed rows of the matrix and the id sidecar."""
+        vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, dimensions))
+        ids = np.memmap(self.ids_path, dtype=np.int64, mode="r", shape=(rows,))
+        return vectors, ids
+
+    def search(self, query: str, limit: int = 10) -> list[SemanticHit]:
+        """Find the items most similar in meaning to query.
+        
+        Args:
+            query: Free-text query
+            limit: Maximum number of items to return
+        
+        Returns:
+            list: SemanticHit for each item, most similar first
+        """
+        connection = self._connect()
+        while True:
+            rows, dimensions, _ = self._meta(connection)
+            if not rows or not query.strip():
+                return []
+            live = connection.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+            try:
+                vectors, ids = self._matrix(rows, dimensions)
+                break
+            except ValueError:
+                # Compacted since the row count was read; the files are shorter now
+                if self._meta(connection)[0] == rows:
+                    raise
+        query_vector = self.embed([query])[0]
+        # Over-fetch by the number of dead rows so at least limit live items remain
+        best_rows, scores = top_k(vectors, query_vector, limit + max(rows - live, 0))
+        best_ids = [int(item_id) for item_id in ids[best_rows]]
+        
+        found = {}
+        for start in range(0, len(best_ids), 500):
+            batch = best_ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            for row in connection.execute(
+                "SELECT i.id, i.file_hash, m.original_filename, i.kind, i.timestamp, i.seconds, i.text "
+                f"FROM items i JOIN memos m ON m.file_hash = i.file_hash WHERE i.id IN ({placeholders})",
+                batch
+            ):
+                found[row[0]] = row[1:]
+        hits = [
+            SemanticHit(*found[item_id], score=float(score))
+            for item_id, score in zip(best_ids, scores) if item_id in found
+        ]
+        return hits[:limit]
+
+    def compact(self) -> int:
+        """Rewrite the matrix without dead rows and return how many were dropped.
+        
+        The files are replaced rather than rewritten in place, so searches
+        holding the old memory maps finish on the old rows, and searches that
+        read the old row count retry with the new one.
+        """
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows, dimensions, _ = self._meta(connection)
+            if not rows:
+                connection.execute("COMMIT")
+                return 0
+            vectors, ids = self._matrix(rows, dimensions)
+            live_ids = np.fromiter(
+                (item_id for (item_id,) in connection.execute("SELECT id FROM items")), dtype=np.int64
+            )
+            keep = np.isin(ids, live_ids)
+            kept = int(keep.sum())
+            for path, data in ((self.vectors_path, vectors[keep]), (self.ids_path, ids[keep])):
+                temp_path = path.with_name(path.name + ".tmp")
+                with open(temp_path, "wb") as f:
+                    f.write(np.ascontiguousarray(data).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, path)
+            connection.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('rows', ?)", (str(kept),))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return rows - kept
+
+    def stats(self) -> dict:
+        """Return the number of memos, live items and matrix rows in the index."""
+        connection = self._connect()
+        rows, dimensions, model = self._meta(connection)
+        return {
+            'memos': connection.execute("SELECT COUNT(*) FROM memos").fetchone()[0],
+            'items': connection.execute("SELECT COUNT(*) FROM items").fetchone()[0],
+            'rows': rows,
+            'dimensions': dimensions,
+            'model': model
+        }
+
+def reindex_semantic_from_cache(index: SemanticIndex, analysis_cache_key: Callable[[str], str]) -> int:
+    """Index every cached transcript together with its cached analysis, if any.
+    
+    Memos already indexed with the same items are skipped without embedding.
+    
+    Args:
+        index: The semantic index to fill
+        analysis_cache_key: Returns the analysis cache key of a formatted
+            transcript, normally VoiceMemoAnalyzer.analysis_cache_key
+    
+    Returns:
+        int: Number of memos with cached transcripts
+    """
+    store = get_store()
+    count = 0
+    for key in store.keys("transcript", "transcript:"):
+        data = store.get(key, touch=False)
+        if not data:
+            continue
+        formatted_transcript = data['formatted_transcript']
+        analysis = store.get("analysis:" + analysis_cache_key(formatted_transcript), touch=False)
+        index.index_memo(key.split(":", 1)[1], data['original_filename'], formatted_transcript, analysis)
+        count += 1
+    return count
@@ -0,0 +1,181 @@
+"""Single-flight deduplication of identical work, within and across processes.
+
+When two callers start on the same memo at once (two batch workers, or a
+user run alongside the watch daemon), both would miss the cache and pay
+for the same conversion, upload and model calls. SingleFlight lets the
+first caller for a key do the work while later callers wait for it.
+Callers in the same process share a Future. Callers in other processes
+block on a lock file for the key, then find the first caller's result in
+the cache. A lock file is removed when its lock is released, so the lock
+directory only holds the keys being worked on.
+
+Files that other processes may read while they are written go through
+atomic_write_bytes or atomic_write_text, so a reader sees either the old
+file or the complete new one, never a partial write.
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import IO, Awaitable, Callable, TypeVar
+
+try:
+    import fcntl
+except ImportError:  # Windows: only callers in this process are coordinated
+    fcntl = None
+
+T = TypeVar('T')
+
+class SingleFlight:
+    """Runs at most one computation per key at a time.
+    
+    The first caller for a key becomes the leader: it takes the key's lock
+    file, checks lookup() in case another process finished the work while
+    it waited, and otherwise runs compute(). Callers that arrive while the
+    leader is running wait for its result, or its exception.
+    """
+
+    def __init__(self, lock_dir: Path):
+        """Initialize with the directory that holds the per-key lock files.
+        
+        Args:
+            lock_dir: Directory for lock files, shared by every process
+                that should be coordinated
+        """
+        self.lock_dir = Path(lock_dir)
+        self._flights: dict[str, Future] = {}
+        self._waiters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def waiters(self, key: str) -> int:
+        """Return how many callers in this process are waiting on key's in-flight computation."""
+        with self._lock:
+            return self._waiters.get(key, 0)
+
+    def run(self, key: str, compute: Callable[[], T],
+            lookup: Callable[[], T | None] | None = None) -> tuple[T, bool]:
+        """Return the result for key, computing it only if nobody else is.
+        
+        Args:
+            key: Identifies the work, e.g. "transcript:<content hash>"
+            compute: Does the work and stores its result where lookup finds it
+            lookup: Returns the stored result, or None if there isn't one yet
+        
+        Returns:
+            tuple: (result, computed), where computed is False when the
+            result came from another caller
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return future.result(), False
+        try:
+            lock_file = self._acquire(key)
+            try:
+                result = lookup() if lookup is not None else None
+                computed = result is None
+                if computed:
+                    result = compute()
+            finally:
+                self._release(lock_file)
+            future.set_result(result)
+            return result, computed
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._land(key)
+
+    async def run_async(self, key: str, compute: Callable[[], Awaitable[T]],
+                        lookup: Callable[[], T | None] | None = None) -> tuple[T, bool]:
+        """Async version of run; compute is a coroutine function.
+        
+        Waiting for the lock file and lookup run in a thread, so the event
+        loop keeps serving other memos.
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future), False
+        try:
+            lock_file = await asyncio.to_thread(self._acquire, key)
+            try:
+                result = await asyncio.to_thread(lookup) if lookup is not None else None
+                computed = result is None
+                if computed:
+                    result = await compute()
+            finally:
+                self._release(lock_file)
+            future.set_result(result)
+            return result, computed
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._land(key)
+
+    def _join(self, key: str) -> tuple[Future, bool]:
+        """Return the key's in-flight Future and whether this caller leads it."""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self._waiters[key] += 1
+                return future, False
+            future = self._flights[key] = Future()
+            self._waiters[key] = 0
+            return future, True
+
+    def _land(self, key: str) -> None:
+        """Forget the key's flight; later callers start a new one."""
+        with self._lock:
+            self._flights.pop(key, None)
+            self._waiters.pop(key, None)
+
+    def _acquire(self, key: str) -> IO | None:
+        """Block until this process holds the key's lock file.
+        
+        The holder unlinks the file before releasing it, so a lock taken on
+        a file that is no longer at the key's path is dropped and the path
+        opened again.
+        """
+        if fcntl is None:
+            return None
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        lock_path = self.lock_dir / f"{key.replace(':', '_')}.lock"
+        while True:
+            lock_file = open(lock_path, "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                current = os.stat(lock_path).st_ino
+            except FileNotFoundError:
+                current = None
+            except BaseException:
+                lock_file.close()
+                raise
+            if current == os.fstat(lock_file.fileno()).st_ino:
+                return lock_file
+            lock_file.close()
+
+    def _release(self, lock_file: IO | None) -> None:
+        """Remove and release a lock file taken by _acquire."""
+        if lock_file is not None:
+            Path(lock_file.name).unlink(missing_ok=True)
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write data to path through a temporary file renamed into place."""
+    path = Path(path)
+    fd, partial_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(partial_path, path)
+    except BaseException:
+        Path(partial_path).unlink(missing_ok=True)
+        raise
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Write UTF-8 text to path through a temporary file renamed into place."""
+    atomic_write_bytes(path, text.encode())
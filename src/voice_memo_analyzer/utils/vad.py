@@ -0,0 +1,134 @@
+"""Voice-activity detection used to trim silence before transcription.
+
+Speech is found with a vectorized energy / zero-crossing-rate detector over
+decoded PCM. Only the speech regions are sent to Whisper, and an OffsetMap
+translates timestamps in the trimmed audio back to the original recording.
+Requires numpy.
+"""
+
+import bisect
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .audio import decode_to_pcm, encode_pcm_to_mp3
+
+SAMPLE_RATE = 16000
+BLOCK_FRAMES = 4096  # Frames measured at a time, bounding memory on long recordings
+
+@dataclass
+class OffsetMap:
+    """Maps times in speech-only audio back to times in the original recording.
+    
+    regions holds the (start, end) seconds of each kept region of the
+    original recording, in order; the trimmed audio is those regions played
+    back to back.
+    """
+    regions: list[tuple[float, float]]
+
+    def __post_init__(self):
+        self._trimmed_starts = []
+        position = 0.0
+        for start, end in self.regions:
+            self._trimmed_starts.append(position)
+            position += end - start
+
+    def to_original(self, trimmed_seconds: float) -> float:
+        """Convert a time in the trimmed audio to the original recording's time."""
+        if not self.regions:
+            return trimmed_seconds
+        index = max(0, bisect.bisect_right(self._trimmed_starts, trimmed_seconds) - 1)
+        region_start, region_end = self.regions[index]
+        return min(region_start + trimmed_seconds - self._trimmed_starts[index], region_end)
+
+def detect_speech(samples: np.ndarray, sample_rate: int = SAMPLE_RATE, frame_ms: int = 30,
+                  threshold_db: float = 12.0, min_silence: float = 0.6,
+                  min_speech: float = 0.25, padding: float = 0.2) -> list[tuple[float, float]]:
+    """Find speech regions in mono PCM samples.
+    
+    A frame counts as speech when its energy is threshold_db above the
+    recording's noise floor (10th percentile frame energy), or when it is
+    half that loud and has a high zero-crossing rate (unvoiced consonants).
+    Frames are measured BLOCK_FRAMES at a time, so only the per-frame
+    energies and crossing rates of the whole recording are held at once.
+    Regions are padded, gaps shorter than min_silence are bridged, and
+    regions shorter than min_speech are dropped.
+    
+    Args:
+        samples: Mono samples as int16 or float
+        sample_rate: Samples per second
+        frame_ms: Analysis frame length in milliseconds
+        threshold_db: Energy above the noise floor that marks speech
+        min_silence: Shortest silence, in seconds, that splits two regions
+        min_speech: Shortest region, in seconds, that is kept
+        padding: Seconds of context kept on each side of a region
+    
+    Returns:
+        list: (start, end) seconds of each speech region
+    """
+    frame_length = int(sample_rate * frame_ms / 1000)
+    frame_count = len(samples) // frame_length
+    if frame_count == 0:
+        return []
+    energy_db = np.empty(frame_count, dtype=np.float32)
+    zero_crossings = np.empty(frame_count, dtype=np.float32)
+    for start in range(0, frame_count, BLOCK_FRAMES):
+        stop = min(frame_count, start + BLOCK_FRAMES)
+        frames = samples[start * frame_length:stop * frame_length].astype(np.float32).reshape(-1, frame_length)
+        energy_db[start:stop] = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+        zero_crossings[start:stop] = np.mean(np.abs(np.diff(np.signbit(frames).astype(np.int8), axis=1)), axis=1)
+    
+    noise_floor = np.percentile(energy_db, 10)
+    speech = (energy_db > noise_floor + threshold_db) | (
+        (energy_db > noise_floor + threshold_db / 2) & (zero_crossings > 0.25)
+    )
+    
+    # Pad regions and bridge short gaps by dilating the speech mask
+    frame_seconds = frame_length / sample_rate
+    pad_frames = int(round(padding / frame_seconds))
+    if pad_frames:
+        speech = np.convolve(speech, np.ones(2 * pad_frames + 1), mode='same') > 0
+    
+    edges = np.diff(np.concatenate(([0], speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1) * frame_seconds
+    ends = np.flatnonzero(edges == -1) * frame_seconds
+    
+    regions = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        if regions and start - regions[-1][1] < min_silence:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return [(start, end) for start, end in regions if end - start >= min_speech]
+
+def trim_to_speech(audio_path: Path, output_dir: Path,
+                   min_saving: float = 0.05) -> tuple[Path, OffsetMap | None]:
+    """Write a speech-only copy of an audio file for upload.
+    
+    Args:
+        audio_path: Audio file to trim
+        output_dir: Directory for the trimmed file
+        min_saving: Fraction of the recording that must be silence for
+            trimming to be worthwhile
+    
+    Returns:
+        tuple: (path_to_upload, offset_map); the original path and None when
+        there is too little silence to trim
+    """
+    audio_path = Path(audio_path)
+    samples = np.frombuffer(decode_to_pcm(audio_path, SAMPLE_RATE), dtype=np.int16)
+    duration = len(samples) / SAMPLE_RATE
+    regions = detect_speech(samples, SAMPLE_RATE)
+    
+    speech_seconds = sum(end - start for start, end in regions)
+    if not regions or duration == 0 or speech_seconds > duration * (1 - min_saving):
+        return audio_path, None
+    
+    print(f"Trimmed silence: uploading {speech_seconds:.0f}s of speech out of {duration:.0f}s")
+    speech = np.concatenate([
+        samples[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)] for start, end in regions
+    ])
+    output_path = Path(output_dir) / f"{audio_path.stem}_speech.mp3"
+    encode_pcm_to_mp3(speech.tobytes(), output_path, SAMPLE_RATE)
+    return output_path, OffsetMap(regions)
@@ -0,0 +1,130 @@
+"""Directory watchers for the watch-folder daemon.
+
+InotifyWatcher uses Linux inotify through ctypes, so changes are reported
+as soon as they happen without extra dependencies. PollingWatcher rescans
+the directory's stat signatures and works everywhere, including network
+and synced folders where inotify events are not delivered.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from pathlib import Path
+
+# inotify event flags (see <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+def file_signature(path: Path) -> tuple[int, int] | None:
+    """Return a file's (size, mtime_ns), or None if it no longer exists."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+class PollingWatcher:
+    """Reports files whose stat signature changed since the previous poll."""
+
+    def __init__(self, directory: Path, interval: float = 2.0):
+        """Initialize the watcher.
+        
+        Args:
+            directory: Directory to watch (not recursive)
+            interval: Seconds between scans
+        """
+        self.directory = Path(directory)
+        self.interval = interval
+        self._signatures = {}
+
+    def wait(self, timeout: float) -> set[Path]:
+        """Sleep for up to timeout seconds, then return files that changed."""
+        time.sleep(min(timeout, self.interval))
+        changed = set()
+        signatures = {}
+        for path in self.directory.iterdir():
+            signature = file_signature(path)
+            if signature is None or not path.is_file():
+                continue
+            signatures[path] = signature
+            if self._signatures.get(path) != signature:
+                changed.add(path)
+        self._signatures = signatures
+        return changed
+
+    def close(self) -> None:
+        """Release resources (nothing to do for polling)."""
+
+class InotifyWatcher:
+    """Reports files created, written or moved into a directory via inotify."""
+
+    def __init__(self, directory: Path):
+        """Start watching directory.
+        
+        Args:
+            directory: Directory to watch (not recursive)
+        
+        Raises:
+            OSError: If inotify is unavailable on this system
+        """
+        self.directory = Path(directory)
+        libc_name = ctypes.util.find_library("c")
+        libc = ctypes.CDLL(libc_name, use_errno=True) if libc_name else None
+        if libc is None or not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self._fd, os.fsencode(self.directory), WATCH_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(error, f"Cannot watch {self.directory}")
+
+    def wait(self, timeout: float) -> set[Path]:
+        """Block for up to timeout seconds and return files with new events."""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            _, _, _, name_length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+            if name:
+                changed.add(self.directory / os.fsdecode(name))
+        return changed
+
+    def close(self) -> None:
+        """Stop watching and close the inotify descriptor."""
+        os.close(self._fd)
+
+def create_watcher(directory: Path, poll_interval: float = 2.0,
+                   force_polling: bool = False) -> InotifyWatcher | PollingWatcher:
+    """Return an inotify watcher for directory, falling back to polling.
+    
+    Args:
+        directory: Directory to watch
+        poll_interval: Seconds between scans when polling
+        force_polling: Always poll, e.g. for network or synced folders
+    """
+    if not force_polling:
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError):
+            print("inotify unavailable, falling back to polling")
+    return PollingWatcher(directory, poll_interval)
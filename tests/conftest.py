@@ -5,6 +5,7 @@ import pytest
 from pathlib import Path
 from unittest.mock import Mock, MagicMock
 from openai import OpenAI
+from benchmarks.run import isolated_data_dir
 
 @pytest.fixture
 def mock_openai_client():
@@ -98,17 +99,15 @@ def test_mp3_file(tmp_path):
     mp3_file.write_bytes(b"mock mp3 content")
     return mp3_file
 
-@pytest.fixture
-def test_data_dirs(tmp_path):
-    """Create temporary test data directories."""
-    dirs = {
-        'cache': tmp_path / 'cache',
-        'mp3_conversions': tmp_path / 'mp3_conversions',
-        'transcripts': tmp_path / 'transcripts',
-        'results': tmp_path / 'results'
-    }
-    
-    for dir_path in dirs.values():
-        dir_path.mkdir(exist_ok=True)
-    
-    return dirs
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path):
+    """Point every data path setting at tmp_path / "data", so no test writes into data/."""
+    # Load the modules that import path settings by name, so each one is patched
+    import src.voice_memo_analyzer.analyzer
+    try:
+        import src.voice_memo_analyzer.utils.fingerprint
+    except ImportError:  # numpy isn't installed
+        pass
+    with isolated_data_dir(tmp_path / "data") as root:
+        yield root
+    
\ No newline at end of file
@@ -3,9 +3,10 @@
 import pytest
 import subprocess
 from pathlib import Path
+from types import SimpleNamespace
 from src.voice_memo_analyzer import VoiceMemoAnalyzer
+from src.voice_memo_analyzer.transcription.model import CompactTranscript
 from src.voice_memo_analyzer.utils import audio
-from src.voice_memo_analyzer import config
 
 def test_analyzer_initialization(mock_openai_client):
     """Test that the analyzer initializes correctly."""
@@ -14,26 +15,22 @@ def test_analyzer_initialization(mock_openai_client):
     assert analyzer.transcriber is not None
     assert analyzer.analyzer is not None
 
-def test_analyze_audio_success(mock_openai_client, test_audio_file, test_data_dirs, monkeypatch):
+def test_analyze_audio_success(mock_openai_client, test_audio_file, data_dir, monkeypatch):
     """Test successful audio analysis process."""
     # Setup
     analyzer = VoiceMemoAnalyzer()
     analyzer.client = mock_openai_client
     
     # Create test MP3 file and directory
-    mp3_dir = test_data_dirs['mp3_conversions']
+    mp3_dir = data_dir / 'mp3_conversions'
     mp3_dir.mkdir(parents=True, exist_ok=True)
     test_mp3_path = mp3_dir / 'test_memo_converted.mp3'
     test_mp3_path.write_bytes(b"mock mp3 content")
     
-    # Mock config directories
-    monkeypatch.setattr(config, 'MP3_DIR', mp3_dir)
-    monkeypatch.setattr(config, 'TRANSCRIPT_DIR', test_data_dirs['transcripts'])
-    monkeypatch.setattr(config, 'RESULTS_DIR', test_data_dirs['cache'])
-    
-    # Mock subprocess.run for ffmpeg
-    def mock_subprocess_run(*args, **kwargs):
-        return subprocess.CompletedProcess(args=[], returncode=0, stdout="", stderr="")
+    # Mock subprocess.run for ffmpeg, writing the output file it names
+    def mock_subprocess_run(command, **kwargs):
+        Path(command[-2]).write_bytes(b"mock mp3 content")
+        return subprocess.CompletedProcess(args=command, returncode=0, stdout="", stderr="")
     monkeypatch.setattr(subprocess, 'run', mock_subprocess_run)
     
     # Mock the audio preparation
@@ -42,12 +39,15 @@ def test_analyze_audio_success(mock_openai_client, test_audio_file, test_data_di
     monkeypatch.setattr(audio, 'prepare_audio_file', mock_prepare_audio)
     
     # Mock transcriber
-    def mock_transcribe(file_path):
-        return "Test transcript", "[00:00] Test transcript"
-    analyzer.transcriber.transcribe = mock_transcribe
+    def mock_transcribe(file_path, on_chunk=None):
+        return CompactTranscript.from_response(SimpleNamespace(
+            text="Test transcript",
+            segments=[{'start': 0.0, 'end': 1.0, 'text': 'Test transcript'}]
+        ))
+    analyzer.transcriber.transcribe_compact = mock_transcribe
     
     # Mock analyzer
-    def mock_analyze(transcript):
+    def mock_analyze(transcript, on_item=None):
         return {
             'action_items': ['Test action'],
             'overall_summary': 'Test summary',
@@ -55,14 +55,6 @@ def test_analyze_audio_success(mock_openai_client, test_audio_file, test_data_di
         }
     analyzer.analyzer.analyze_transcript = mock_analyze
     
-    # Create cache directory
-    cache_dir = test_data_dirs['cache']
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Create transcripts directory
-    transcripts_dir = test_data_dirs['transcripts']
-    transcripts_dir.mkdir(parents=True, exist_ok=True)
-    
     # Run analysis
     results = analyzer.analyze_audio(test_audio_file)
     
@@ -123,3 +115,108 @@ def test_display_results_error(capsys):
     
     assert 'Error:' in captured.out
     assert 'Test error' in captured.out
+
+def test_analyze_audio_uses_cached_analysis(test_audio_file, monkeypatch):
+    """Test that a cached analysis skips the model unless reanalyze is set."""
+    from src.voice_memo_analyzer import analyzer as analyzer_module
+    
+    monkeypatch.setattr(analyzer_module, 'prepare_audio_file', lambda path, profile, file_hash: (path, path))
+    monkeypatch.setattr(analyzer_module, 'get_from_cache', lambda path, file_hash: (
+        path, {'transcript': 'Cached', 'formatted_transcript': '[00:00] Cached'}
+    ))
+    cached_analysis = {
+        'action_items': ['Cached action'],
+        'overall_summary': 'Cached summary',
+        'key_moments': []
+    }
+    monkeypatch.setattr(analyzer_module, 'get_analysis_from_cache', lambda key: cached_analysis)
+    saved = []
+    monkeypatch.setattr(analyzer_module, 'save_analysis_to_cache', lambda data, key: saved.append(key))
+    
+    analyzer = VoiceMemoAnalyzer()
+    calls = []
+    def mock_analyze(transcript, on_item=None):
+        calls.append(transcript)
+        return {'action_items': [], 'overall_summary': 'Fresh summary', 'key_moments': []}
+    analyzer.analyzer.analyze_transcript = mock_analyze
+    
+    results = analyzer.analyze_audio(test_audio_file)
+    assert results['overall_summary'] == 'Cached summary'
+    assert calls == []
+    
+    results = analyzer.analyze_audio(test_audio_file, reanalyze=True)
+    assert results['overall_summary'] == 'Fresh summary'
+    assert calls == ['[00:00] Cached']
+    assert len(saved) == 1
+
+def test_get_cached_results_without_client(test_audio_file, monkeypatch):
+    """Test that cached results are served without creating an OpenAI client."""
+    from src.voice_memo_analyzer import analyzer as analyzer_module
+    
+    cached = {'transcript': 'Cached', 'formatted_transcript': '[00:00] Cached'}
+    monkeypatch.setattr(analyzer_module, 'get_from_cache', lambda path, file_hash: (path, cached))
+    analyses = {}
+    monkeypatch.setattr(analyzer_module, 'get_analysis_from_cache', lambda key: analyses.get(key))
+    analyzer = VoiceMemoAnalyzer()
+    
+    assert analyzer.get_cached_results(test_audio_file) is None
+    
+    analyses[analyzer.analysis_cache_key('[00:00] Cached')] = {
+        'action_items': [], 'overall_summary': 'Cached summary', 'key_moments': []
+    }
+    results = analyzer.get_cached_results(test_audio_file)
+    
+    assert results['overall_summary'] == 'Cached summary'
+    assert results['transcript'] == 'Cached'
+    assert 'client' not in vars(analyzer)
+    assert analyzer.analysis_cache_key('[00:00] Cached') == analyzer.analyzer.cache_key('[00:00] Cached')
+
+def test_timings_of_recordings_sharing_a_name_do_not_collide(data_dir):
+    """Test that timings sidecars are named by content hash, not by filename."""
+    from src.voice_memo_analyzer.utils import cache
+    
+    analyzer = VoiceMemoAnalyzer()
+    for file_hash, text in (("first", "Buy milk."), ("second", "Call the bank.")):
+        transcript = CompactTranscript.from_response(SimpleNamespace(
+            text=text, segments=[{'start': 0.0, 'end': 2.0, 'text': text}], words=[]
+        ))
+        analyzer._save_transcript(Path("memo.m4a"), Path("memo.mp3"), file_hash,
+                                  text, transcript.format(), transcript)
+    
+    assert analyzer.get_timings("memo.m4a", "first").raw_text == "Buy milk."
+    assert analyzer.get_timings("memo.m4a", "second").raw_text == "Call the bank."
+    # An entry pointing at a filename-based sidecar is not trusted
+    stale = cache.get_cached_transcript("first")
+    stale['timings_path'] = str(data_dir / "transcripts" / "memo.timings")
+    cache.save_to_cache(stale, "first")
+    assert analyzer.get_timings("memo.m4a", "first") is None
+
+def test_import_does_not_load_openai():
+    """Test that importing the CLI leaves openai and dotenv unimported."""
+    import sys
+    
+    result = subprocess.run(
+        [sys.executable, "-c",
+         "import sys, main; print(sorted({'openai', 'dotenv'} & set(sys.modules)))"],
+        cwd=Path(__file__).parent.parent, capture_output=True, text=True, check=True
+    )
+    
+    assert result.stdout.strip() == "[]"
+
+def test_cached_analysis_is_replayed_to_streaming_display(monkeypatch, capsys):
+    """Test that a cached analysis is shown through on_item like a streamed one."""
+    from src.voice_memo_analyzer import analyzer as analyzer_module
+    from src.voice_memo_analyzer.analyzer import StreamingDisplay
+    
+    monkeypatch.setattr(analyzer_module, 'get_analysis_from_cache', lambda key: {
+        'action_items': ['Send the deck'],
+        'overall_summary': 'Launch planning',
+        'key_moments': [{'timestamp': '00:15', 'summary': 'Agreed on Friday'}]
+    })
+    
+    VoiceMemoAnalyzer().get_analysis("[00:00] Cached", on_item=StreamingDisplay())
+    
+    output = capsys.readouterr().out
+    assert "=== Action Items ===\n• Send the deck" in output
+    assert "=== Key Moments ===\n[00:15] Agreed on Friday" in output
+    assert output.index("Launch planning") < output.index("Agreed on Friday")
@@ -0,0 +1,108 @@
+"""Tests for the audio handling utilities."""
+
+import subprocess
+from pathlib import Path
+import pytest
+from src.voice_memo_analyzer.utils import audio
+from src.voice_memo_analyzer.utils.audio import choose_split_points
+
+def test_choose_split_points_prefers_silence():
+    """Test that boundaries snap to the nearest silence within the window."""
+    silences = [(100.0, 101.0), (590.0, 592.0), (1210.0, 1212.0)]
+    
+    points = choose_split_points(1500.0, silences, chunk_seconds=600, search_window=30)
+    
+    assert points == [0.0, 591.0, 1211.0, 1500.0]
+
+def test_choose_split_points_without_silence():
+    """Test that boundaries fall back to fixed lengths when there is no silence."""
+    points = choose_split_points(1300.0, [], chunk_seconds=600, search_window=30)
+    
+    assert points == [0.0, 600.0, 1200.0, 1300.0]
+
+def test_choose_split_points_short_audio():
+    """Test that audio shorter than one chunk is not split."""
+    assert choose_split_points(120.0, [], chunk_seconds=600) == [0.0, 120.0]
+
+@pytest.fixture
+def ffmpeg_calls(monkeypatch):
+    """Record ffmpeg invocations instead of running them."""
+    calls = []
+    def mock_run(command, **kwargs):
+        calls.append(command)
+        Path(command[-2]).write_bytes(b"encoded")
+        return subprocess.CompletedProcess(args=command, returncode=0, stdout="", stderr="")
+    monkeypatch.setattr(audio.subprocess, 'run', mock_run)
+    return calls
+
+def test_convert_uses_profile_in_filename(tmp_path, ffmpeg_calls):
+    """Test that each profile gets its own conversion and encoder settings."""
+    memo = tmp_path / "memo.m4a"
+    memo.write_bytes(b"audio")
+    
+    speech_path = audio.convert_m4a_to_mp3(memo, "speech", "abc123")
+    archive_path = audio.convert_m4a_to_mp3(memo, "archive", "abc123")
+    
+    assert speech_path.name == "abc123_speech.mp3"
+    assert archive_path.name == "abc123_converted.mp3"
+    assert "-ac" in ffmpeg_calls[0] and "16000" in ffmpeg_calls[0]
+    assert "-q:a" in ffmpeg_calls[1]
+    
+    # A second conversion with the same profile reuses the file
+    assert audio.convert_m4a_to_mp3(memo, "speech", "abc123") == speech_path
+    assert len(ffmpeg_calls) == 2
+
+def test_prepare_audio_file_passthrough(tmp_path, ffmpeg_calls):
+    """Test that the passthrough profile uploads the original file."""
+    memo = tmp_path / "memo.m4a"
+    memo.write_bytes(b"audio")
+    
+    assert audio.prepare_audio_file(memo, "passthrough", "abc123") == (memo, memo)
+    assert ffmpeg_calls == []
+
+def test_prepare_audio_file_reencodes_mp3(tmp_path, ffmpeg_calls):
+    """Test that mp3 input is re-encoded by compact profiles and staged by archive."""
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    memo = source_dir / "memo.mp3"
+    memo.write_bytes(b"audio")
+    
+    assert audio.prepare_audio_file(memo, "speech", "abc123")[1].name == "abc123_speech.mp3"
+    _, staged = audio.prepare_audio_file(memo, "archive", "abc123")
+    assert staged.name == "abc123.mp3"
+    assert staged.read_bytes() == b"audio"
+    assert len(ffmpeg_calls) == 1
+
+def test_prepare_audio_file_same_name_different_content(tmp_path, ffmpeg_calls, monkeypatch):
+    """Test that recordings sharing a filename are staged separately."""
+    monkeypatch.setattr(audio, 'get_file_hash', lambda path: path.read_bytes().decode())
+    first_dir, second_dir = tmp_path / "a", tmp_path / "b"
+    first_dir.mkdir()
+    second_dir.mkdir()
+    (first_dir / "meeting.mp3").write_bytes(b"first")
+    (second_dir / "meeting.mp3").write_bytes(b"second")
+    
+    _, first = audio.prepare_audio_file(first_dir / "meeting.mp3", "archive")
+    _, second = audio.prepare_audio_file(second_dir / "meeting.mp3", "archive")
+    
+    assert first != second
+    assert first.read_bytes() == b"first"
+    assert second.read_bytes() == b"second"
+
+def test_stage_file_falls_back_to_copy(tmp_path, monkeypatch):
+    """Test staging across filesystems, where hardlinks aren't possible."""
+    def cross_device_link(source, destination):
+        raise OSError(18, "Invalid cross-device link")
+    monkeypatch.setattr(audio.os, 'link', cross_device_link)
+    source = tmp_path / "memo.mp3"
+    source.write_bytes(b"audio" * 1000)
+    
+    staged = audio.stage_file(source, tmp_path / "staged.mp3")
+    
+    assert staged.read_bytes() == source.read_bytes()
+    assert list(tmp_path.glob("*.part")) == []
+
+def test_unknown_profile():
+    """Test that an unknown profile name is rejected."""
+    with pytest.raises(ValueError, match="Unknown encoding profile"):
+        audio.get_encoding_profile("lossless")
@@ -0,0 +1,106 @@
+"""Tests for analysis through the Batch API, against the local fake server."""
+
+import hashlib
+import pytest
+from openai import OpenAI
+from benchmarks.fake_openai import FakeOpenAIServer
+from src.voice_memo_analyzer import pipeline
+from src.voice_memo_analyzer.analysis.analyzer import ANALYSIS_ERROR_SUMMARY, ConversationAnalyzer
+from src.voice_memo_analyzer.analysis.batch import BatchAnalysis, batch_jsonl
+from src.voice_memo_analyzer.pipeline import BatchApiPipeline
+from src.voice_memo_analyzer.utils import cache
+
+SHORT = "[00:00] Remember to buy milk."
+LONG = "\n".join(f"[00:{i * 5:02d}] " + "word " * 20 for i in range(10))
+
+@pytest.fixture
+def server():
+    """A fake server whose batches take a moment."""
+    with FakeOpenAIServer(latency=0.0, jitter=0.0, batch_seconds=0.1) as fake:
+        yield fake
+
+def make_analyzer(server):
+    client = OpenAI(base_url=server.base_url, api_key="fake", max_retries=0)
+    return ConversationAnalyzer(client, max_window_tokens=100, small_model="gpt-4o-mini")
+
+def test_batch_analysis_matches_interactive_routing(server):
+    """Test that short and map-reduce transcripts are analyzed in a window batch and a reduce batch."""
+    results = BatchAnalysis(make_analyzer(server), poll_seconds=0.05).analyze({'short': SHORT, 'long': LONG})
+    stats = server.stats()
+    
+    assert results['short']['model_tier'] == "small"
+    assert results['short']['action_items'] == ["Send the revised plan", "Confirm the budget"]
+    assert results['long']['model_tier'] == "map_reduce"
+    assert results['long']['key_moments'][0]['timestamp'] == "00:00"
+    assert results['long']['action_items'] == ["Send the revised plan", "Confirm the budget"]
+    assert stats['/v1/batches']['requests'] == 2
+    assert stats['/v1/batches/{id}']['requests'] >= 2
+    assert '/v1/chat/completions' not in stats
+    assert cache.get_batch_jobs() == []
+
+def test_failed_batch_requests_get_the_error_result(server):
+    """Test that a request missing from the output yields the error result."""
+    server.batch_failure_rate = 1.0
+    
+    results = BatchAnalysis(make_analyzer(server), poll_seconds=0.05).analyze({'short': SHORT})
+    
+    assert results['short']['overall_summary'] == ANALYSIS_ERROR_SUMMARY
+
+def test_submitted_batch_is_resumed(server):
+    """Test that a batch submitted by an earlier run is waited for, not submitted again."""
+    analysis = BatchAnalysis(make_analyzer(server), poll_seconds=0.05)
+    requests = {'0-0': analysis.analyzer.window_requests(SHORT)[2][0]}
+    client = analysis.client
+    input_file = client.files.create(file=("input.jsonl", batch_jsonl(requests)), purpose="batch")
+    batch = client.batches.create(input_file_id=input_file.id, endpoint="/v1/chat/completions",
+                                  completion_window="24h")
+    cache.save_batch_job(hashlib.sha256(batch_jsonl(requests)).hexdigest(), batch.id, 1)
+    
+    responses = analysis.run(requests)
+    
+    assert list(responses) == ['0-0']
+    assert server.stats()['/v1/batches']['requests'] == 1
+    assert cache.get_batch_jobs() == []
+
+class FakeMemoAnalyzer:
+    """Stands in for VoiceMemoAnalyzer, with a real ConversationAnalyzer for the batch."""
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        self.encoding_profile = "speech"
+        self.saved = {}
+        self.indexed = []
+
+    def get_transcript(self, original_path, mp3_path, file_hash):
+        return "raw", SHORT if original_path.stem != "meeting" else LONG
+
+    def analysis_cache_key(self, formatted_transcript):
+        return self.analyzer.cache_key(formatted_transcript)
+
+    def save_results(self, results, original_filename):
+        self.saved[original_filename] = results
+
+    def index_semantic(self, file_hash, original_filename, results):
+        self.indexed.append(file_hash)
+
+def test_batch_api_pipeline_caches_and_writes_results(server, tmp_path, monkeypatch):
+    """Test that uncached memos are analyzed in one batch, then cached and written."""
+    monkeypatch.setattr(pipeline, 'prepare_audio_file', lambda path, profile, file_hash: (path, path))
+    monkeypatch.setattr(pipeline, 'get_file_hash', lambda path: path.stem)
+    files = []
+    for name in ("note.m4a", "meeting.m4a"):
+        files.append(tmp_path / name)
+        files[-1].write_bytes(b"audio")
+    memo_analyzer = FakeMemoAnalyzer(make_analyzer(server))
+    
+    outcomes = BatchApiPipeline(memo_analyzer, poll_seconds=0.05).run(files)
+    rerun = BatchApiPipeline(memo_analyzer, poll_seconds=0.05).run(files)
+    
+    assert all(outcome.success for outcome in outcomes + rerun)
+    assert memo_analyzer.saved['meeting.m4a']['model_tier'] == "map_reduce"
+    assert memo_analyzer.saved['note.m4a']['formatted_transcript'] == SHORT
+    assert cache.get_analysis_from_cache(memo_analyzer.analysis_cache_key(SHORT)) is not None
+    # Batch-analyzed and cached memos alike are indexed
+    assert sorted(memo_analyzer.indexed) == ["meeting", "meeting", "note", "note"]
+    # The second run is served from the cache
+    assert server.stats()['/v1/batches']['requests'] == 2
@@ -0,0 +1,76 @@
+"""Tests for the offline benchmark harness."""
+
+from pathlib import Path
+from openai import OpenAI
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.run import isolated_data_dir, percentiles
+from src.voice_memo_analyzer.analysis.analyzer import ConversationAnalyzer
+from src.voice_memo_analyzer.transcription.transcriber import Transcriber
+
+def test_fake_server_serves_transcriber_and_analyzer(tmp_path):
+    """Test that the real client, transcriber and analyzer work against the fake server."""
+    audio = tmp_path / "memo.mp3"
+    audio.write_bytes(b"\0" * 48000)
+    
+    with FakeOpenAIServer(latency=0.0, jitter=0.0) as server:
+        client = OpenAI(base_url=server.base_url, api_key="fake", max_retries=0)
+        transcript = Transcriber(client).transcribe_compact(audio)
+        items = []
+        results = ConversationAnalyzer(client).analyze_transcript(
+            transcript.format(), on_item=lambda field, value: items.append(field)
+        )
+        stats = server.stats()
+    
+    assert transcript.segment_count == 3
+    assert transcript.word_count == 12
+    assert results['action_items'] == ["Send the revised plan", "Confirm the budget"]
+    assert results['key_moments'][1]['timestamp'] == "00:05"
+    assert items.count('key_moments') == 3
+    assert stats['/v1/audio/transcriptions']['bytes_received'] > 48000
+    assert stats['/v1/chat/completions']['requests'] == 1
+
+def test_fake_server_injects_rate_limits(tmp_path):
+    """Test that injected 429s are counted and retried by the client."""
+    with FakeOpenAIServer(latency=0.0, jitter=0.0, rate_limit_rate=0.5, seed=3) as server:
+        client = OpenAI(base_url=server.base_url, api_key="fake", max_retries=10)
+        for _ in range(5):
+            client.chat.completions.create(model="gpt-4o", messages=[{'role': "user", 'content': "[00:00] Hi"}])
+        stats = server.stats()['/v1/chat/completions']
+    
+    assert stats['rate_limited'] > 0
+    assert stats['requests'] == 5 + stats['rate_limited']
+
+def test_fake_server_reports_cached_prompt_prefixes():
+    """Test that a repeated prompt prefix of 1024+ tokens is reported as cached."""
+    server = FakeOpenAIServer()
+    prefix = {'role': "system", 'content': "x" * 4800}
+    first = server.usage({'messages': [prefix, {'role': "user", 'content': "one"}]}, "")
+    second = server.usage({'messages': [prefix, {'role': "user", 'content': "two"}]}, "")
+    short = server.usage({'messages': [{'role': "user", 'content': "y" * 400}] * 2}, "")
+    
+    assert first['prompt_tokens_details']['cached_tokens'] == 0
+    assert second['prompt_tokens_details']['cached_tokens'] == 1152
+    assert short['prompt_tokens_details']['cached_tokens'] == 0
+
+def test_percentiles():
+    """Test that percentiles interpolate between the sorted values."""
+    summary = percentiles([4.0, 1.0, 3.0, 2.0, 5.0])
+    
+    assert summary['count'] == 5
+    assert summary['p50'] == 3.0
+    assert summary['p90'] == 4.6
+    assert summary['max'] == 5.0
+    assert percentiles([]) == {'count': 0}
+
+def test_isolated_data_dir_restores_paths(tmp_path):
+    """Test that module path settings point at the scratch directory only inside the block."""
+    from src.voice_memo_analyzer import analyzer, config
+    from src.voice_memo_analyzer.utils import cache
+    original = cache.CACHE_DIR
+    
+    with isolated_data_dir(tmp_path):
+        assert cache.CACHE_DIR == tmp_path / "cache"
+        assert analyzer.TRANSCRIPT_DIR == tmp_path / "transcripts"
+        assert config.DATA_DIR == Path(tmp_path)
+    
+    assert cache.CACHE_DIR == original
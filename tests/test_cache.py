@@ -0,0 +1,55 @@
+"""Tests for the cache management utilities."""
+
+from src.voice_memo_analyzer.utils import cache
+
+def test_analysis_cache_key_changes_with_settings():
+    """Test that every component of the analysis key affects the key."""
+    base = cache.get_analysis_cache_key("[00:00] Hello", "v1", "gpt-4o", 0.3)
+    
+    assert base == cache.get_analysis_cache_key("[00:00] Hello", "v1", "gpt-4o", 0.3)
+    assert base != cache.get_analysis_cache_key("[00:00] Hello!", "v1", "gpt-4o", 0.3)
+    assert base != cache.get_analysis_cache_key("[00:00] Hello", "v2", "gpt-4o", 0.3)
+    assert base != cache.get_analysis_cache_key("[00:00] Hello", "v1", "gpt-4o-mini", 0.3)
+    assert base != cache.get_analysis_cache_key("[00:00] Hello", "v1", "gpt-4o", 0.7)
+
+def test_analysis_cache_round_trip():
+    """Test saving and loading an analysis from the cache."""
+    analysis = {
+        'action_items': ['Task'],
+        'overall_summary': 'Summary',
+        'key_moments': []
+    }
+    
+    assert cache.get_analysis_from_cache("abc") is None
+    cache.save_analysis_to_cache(analysis, "abc")
+    assert cache.get_analysis_from_cache("abc") == analysis
+
+def test_get_file_hash_uses_stat_index(tmp_path, monkeypatch):
+    """Test that unchanged files are served from the index without re-reading."""
+    audio_file = tmp_path / "memo.mp3"
+    audio_file.write_bytes(b"audio content")
+    
+    file_hash = cache.get_file_hash(audio_file)
+    assert file_hash == cache.compute_file_hash(audio_file)
+    
+    def fail_compute(path):
+        raise AssertionError("unchanged file should not be re-hashed")
+    monkeypatch.setattr(cache, 'compute_file_hash', fail_compute)
+    assert cache.get_file_hash(audio_file) == file_hash
+
+def test_get_file_hash_detects_changes(tmp_path):
+    """Test that a modified file is hashed again."""
+    audio_file = tmp_path / "memo.mp3"
+    audio_file.write_bytes(b"first version")
+    first_hash = cache.get_file_hash(audio_file)
+    
+    audio_file.write_bytes(b"second version, longer")
+    
+    assert cache.get_file_hash(audio_file) != first_hash
+
+def test_compute_file_hash_empty_file(tmp_path):
+    """Test hashing an empty file."""
+    empty_file = tmp_path / "empty.mp3"
+    empty_file.write_bytes(b"")
+    
+    assert cache.compute_file_hash(empty_file) == cache.hashlib.sha256().hexdigest()
@@ -0,0 +1,99 @@
+"""Tests for the SQLite cache store."""
+
+import time
+from src.voice_memo_analyzer.utils.cache_store import CacheStore
+
+def test_put_get_round_trip(tmp_path):
+    """Test storing and loading an entry."""
+    store = CacheStore(tmp_path / "cache.sqlite3")
+    
+    store.put("transcript:abc", "transcript", {'transcript': 'Hello'})
+    
+    assert store.get("transcript:abc") == {'transcript': 'Hello'}
+    assert store.get("transcript:missing") is None
+    assert store.keys("transcript") == ["transcript:abc"]
+
+def test_get_without_touch_keeps_last_access(tmp_path):
+    """Test that a non-touching read leaves the entry's LRU position alone."""
+    store = CacheStore(tmp_path / "cache.sqlite3")
+    store.put("transcript:abc", "transcript", {'transcript': 'Hello'})
+    store._connect().execute("UPDATE entries SET last_access = 0")
+    
+    assert store.get("transcript:abc", touch=False) == {'transcript': 'Hello'}
+    assert store._connect().execute("SELECT last_access FROM entries").fetchone()[0] == 0
+    store.get("transcript:abc")
+    assert store._connect().execute("SELECT last_access FROM entries").fetchone()[0] > 0
+
+def test_stats_counts_entries_and_files(tmp_path):
+    """Test that stats report entries and tracked files by kind."""
+    store = CacheStore(tmp_path / "cache.sqlite3")
+    audio_file = tmp_path / "memo.mp3"
+    audio_file.write_bytes(b"x" * 100)
+    
+    store.put("analysis:1", "analysis", {'overall_summary': 'Summary'})
+    store.track_file(audio_file, "audio")
+    stats = store.stats()
+    
+    assert stats['entries']['analysis']['count'] == 1
+    assert stats['files']['audio'] == {'count': 1, 'bytes': 100}
+    assert stats['total_bytes'] == 100 + stats['entries']['analysis']['bytes']
+
+def test_prune_by_size_evicts_least_recently_used(tmp_path):
+    """Test that size pruning removes the oldest-accessed data first."""
+    store = CacheStore(tmp_path / "cache.sqlite3")
+    old_file = tmp_path / "old.mp3"
+    new_file = tmp_path / "new.mp3"
+    old_file.write_bytes(b"x" * 1000)
+    store.track_file(old_file, "audio")
+    time.sleep(0.01)
+    new_file.write_bytes(b"x" * 1000)
+    store.track_file(new_file, "audio")
+    
+    evicted = store.prune(max_bytes=1500)
+    
+    assert evicted['files'] == 1
+    assert not old_file.exists()
+    assert new_file.exists()
+
+def test_prune_by_age(tmp_path):
+    """Test that age pruning removes entries not used recently."""
+    store = CacheStore(tmp_path / "cache.sqlite3")
+    store.put("analysis:old", "analysis", {})
+    store._connect().execute(
+        "UPDATE entries SET last_access = ? WHERE key = ?", (time.time() - 10 * 86400, "analysis:old")
+    )
+    store.put("analysis:new", "analysis", {})
+    
+    evicted = store.prune(max_age_days=5)
+    
+    assert evicted['entries'] == 1
+    assert store.get("analysis:old") is None
+    assert store.get("analysis:new") == {}
+
+def test_prune_keeps_unfinished_work(tmp_path):
+    """Test that batch jobs, plans and the chunks of a live plan are never evicted."""
+    store = CacheStore(tmp_path / "cache.sqlite3")
+    for key, kind in (("batch:in", "batch"), ("progress:live", "progress"),
+                      ("chunk:live:0.000-600.000", "chunk"), ("chunk:done:0.000-600.000", "chunk"),
+                      ("analysis:1", "analysis")):
+        store.put(key, kind, {})
+    store._connect().execute("UPDATE entries SET last_access = ?", (time.time() - 10 * 86400,))
+    
+    evicted = store.prune(max_bytes=0, max_age_days=5)
+    
+    assert evicted['entries'] == 2
+    assert store.get("chunk:done:0.000-600.000") is None
+    assert store.get("analysis:1") is None
+    assert store.keys("batch") == ["batch:in"]
+    assert store.keys("progress") == ["progress:live"]
+    assert store.keys("chunk") == ["chunk:live:0.000-600.000"]
+
+def test_scan_directory_registers_existing_files(tmp_path):
+    """Test that files created before the store are picked up for eviction."""
+    (tmp_path / "legacy.json").write_text("{}")
+    (tmp_path / ".gitkeep").write_text("")
+    store = CacheStore(tmp_path / "cache.sqlite3")
+    
+    store.scan_directory(tmp_path, "cache")
+    
+    assert store.stats()['files']['cache']['count'] == 1
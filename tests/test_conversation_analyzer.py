@@ -1,7 +1,10 @@
 """Tests for the ConversationAnalyzer class."""
 
 import pytest
-from src.voice_memo_analyzer.analysis.analyzer import ConversationAnalyzer
+from src.voice_memo_analyzer.analysis.analyzer import (
+    ANALYSIS_ERROR_SUMMARY, ANALYSIS_SYSTEM_PROMPT, ConversationAnalyzer, compact_transcript,
+    split_transcript_windows
+)
 
 def test_conversation_analyzer_initialization(mock_openai_client):
     """Test that the conversation analyzer initializes correctly."""
@@ -45,3 +48,319 @@ def test_analyze_transcript_invalid_response(mock_openai_client):
     assert results['action_items'] == []
     assert results['overall_summary'] == "Error analyzing transcript"
     assert results['key_moments'] == []
+
+def test_split_transcript_windows():
+    """Test that transcripts are split on segment boundaries within the budget."""
+    transcript = "\n".join(f"[00:{i:02d}] " + "word " * 20 for i in range(10))
+    
+    windows = split_transcript_windows(transcript, max_tokens=60)
+    
+    assert len(windows) == 5
+    assert "\n".join(windows) == transcript
+    assert all(line.startswith("[") for window in windows for line in window.splitlines())
+
+def test_compact_transcript_merges_short_segments():
+    """Test that nearby segments share a line under their first timestamp."""
+    transcript = "[00:00]  Hello   there.\n[00:04] How are you?\n[00:20] Fine.\n[00:21]\n  Untimed note  "
+    
+    assert compact_transcript(transcript) == (
+        "00:00 Hello there.\n00:04 How are you?\n00:20 Fine.\nUntimed note"
+    )
+    assert compact_transcript(transcript, merge_seconds=15) == (
+        "00:00 Hello there. How are you?\n00:20 Fine.\nUntimed note"
+    )
+
+def test_compact_transcript_merges_further_to_fit_budget():
+    """Test that merging widens to fit the token budget, but only when that succeeds."""
+    transcript = "\n".join(f"[00:{i * 5:02d}] Point {i}." for i in range(12))
+    
+    unbounded = compact_transcript(transcript, merge_seconds=10)
+    fitted = compact_transcript(transcript, merge_seconds=10, max_tokens=30)
+    hopeless = compact_transcript(transcript, merge_seconds=10, max_tokens=5)
+    
+    assert len(unbounded.splitlines()) == 6
+    assert len(fitted.splitlines()) < 6
+    assert fitted.startswith("00:00 Point 0. Point 1.")
+    assert hopeless == unbounded
+
+def test_analysis_prompt_puts_transcript_after_static_prefix(mock_openai_client):
+    """Test that every request starts with the same system prompt and ends with the transcript."""
+    analyzer = ConversationAnalyzer(mock_openai_client)
+    
+    analyzer.analyze_transcript("[00:00]   First memo.")
+    analyzer.analyze_transcript("[00:00] Second memo.")
+    
+    prompts = [call.kwargs['messages'] for call in mock_openai_client.chat.completions.create.call_args_list]
+    assert [messages[0] for messages in prompts] == [{'role': "system", 'content': ANALYSIS_SYSTEM_PROMPT}] * 2
+    assert prompts[0][-1]['content'].endswith("\n00:00 First memo.")
+    assert "First memo" not in ANALYSIS_SYSTEM_PROMPT
+
+def test_cached_prompt_tokens_are_recorded(mock_openai_client):
+    """Test that usage is split into cached and uncached prompt tokens."""
+    from unittest.mock import Mock
+    from src.voice_memo_analyzer.utils.instrumentation import Profiler
+    
+    response = mock_openai_client.chat.completions.create.return_value
+    response.usage = Mock(prompt_tokens=1500, completion_tokens=200,
+                          prompt_tokens_details=Mock(cached_tokens=1280))
+    with Profiler() as profiler:
+        ConversationAnalyzer(mock_openai_client).analyze_transcript("[00:00] A memo.")
+    stage = profiler.report()['stages']['analysis.request']
+    
+    assert stage['cached_prompt_tokens'] == 1280
+    assert stage['uncached_prompt_tokens'] == 220
+
+def test_route_chooses_tier_by_transcript_size(mock_openai_client):
+    """Test that short memos go to the small model and long ones to map-reduce."""
+    analyzer = ConversationAnalyzer(mock_openai_client, max_window_tokens=100, small_model="gpt-4o-mini",
+                                     small_max_tokens=30, small_max_segments=3)
+    short = "[00:00] Remember to buy milk."
+    many_segments = "\n".join(f"[00:0{i}] Yes." for i in range(5))
+    long = "\n".join(f"[00:{i:02d}] " + "word " * 20 for i in range(10))
+    
+    assert analyzer.route(short)[:2] == ("small", "gpt-4o-mini")
+    assert analyzer.route(many_segments)[:2] == ("standard", "gpt-4o")
+    assert analyzer.route(long)[:2] == ("map_reduce", "gpt-4o")
+    assert ConversationAnalyzer(mock_openai_client).route(short)[:2] == ("standard", "gpt-4o")
+
+def test_small_tier_is_used_and_recorded(mock_openai_client):
+    """Test that a short memo is analyzed by the small model and the tier is recorded."""
+    from src.voice_memo_analyzer.utils.instrumentation import Profiler
+    analyzer = ConversationAnalyzer(mock_openai_client, small_model="gpt-4o-mini")
+    
+    with Profiler() as profiler:
+        results = analyzer.analyze_transcript("[00:00] Remember to buy milk.")
+    
+    assert mock_openai_client.chat.completions.create.call_args.kwargs['model'] == "gpt-4o-mini"
+    assert results['model_tier'] == "small"
+    assert results['analysis_model'] == "gpt-4o-mini"
+    assert profiler.report()['spans'][-1]['attributes']['tier'] == "small"
+
+def test_cache_key_follows_the_routed_model(mock_openai_client):
+    """Test that routing settings only change the keys of transcripts they reroute."""
+    short, long = "[00:00] Buy milk.", "\n".join(f"[00:{i:02d}] " + "word " * 20 for i in range(10))
+    plain = ConversationAnalyzer(mock_openai_client)
+    routed = ConversationAnalyzer(mock_openai_client, small_model="gpt-4o-mini", small_max_tokens=100)
+    
+    assert routed.cache_key(short) != plain.cache_key(short)
+    assert routed.cache_key(long) == plain.cache_key(long)
+
+def test_analyze_transcript_map_reduce(mock_openai_client):
+    """Test that long transcripts are analyzed per window and merged."""
+    from unittest.mock import Mock
+    
+    window_response = Mock(choices=[Mock(message=Mock(content='''{
+        "action_items": ["Window action"],
+        "overall_summary": "Window summary",
+        "key_moments": [{"timestamp": "00:15", "summary": "Window moment"}]
+    }'''))])
+    reduce_response = Mock(choices=[Mock(message=Mock(content='''{
+        "action_items": ["Merged action"],
+        "overall_summary": "Merged summary"
+    }'''))])
+
+    def mock_create(model=None, messages=None, temperature=None):
+        return reduce_response if model == "gpt-4o-mini" else window_response
+    mock_openai_client.chat.completions.create.side_effect = mock_create
+    
+    analyzer = ConversationAnalyzer(mock_openai_client, max_window_tokens=20)
+    transcript = "\n".join(f"[00:{i:02d}] " + "word " * 10 for i in range(3))
+    
+    results = analyzer.analyze_transcript(transcript)
+    
+    assert mock_openai_client.chat.completions.create.call_count == 4
+    assert results['action_items'] == ["Merged action"]
+    assert results['overall_summary'] == "Merged summary"
+    assert len(results['key_moments']) == 3
+
+def test_combine_windows_sorts_untimed_moments_last(mock_openai_client):
+    """Test that key moments with a missing or unreadable timestamp don't break the merge."""
+    analyzer = ConversationAnalyzer(mock_openai_client)
+    partial_results = [
+        {"key_moments": [{"timestamp": "N/A", "summary": "Vague"}, {"timestamp": "01:30", "summary": "Late"}]},
+        {"key_moments": [{"summary": "No time"}, {"timestamp": "00:15", "summary": "Early"}]}
+    ]
+    
+    results = analyzer.combine_windows("large", "gpt-4o", partial_results)
+    
+    assert [moment['summary'] for moment in results['key_moments']] == ["Early", "Late", "Vague", "No time"]
+
+def test_analyze_transcript_short_uses_single_call(mock_openai_client):
+    """Test that transcripts within the budget are analyzed in one call."""
+    analyzer = ConversationAnalyzer(mock_openai_client)
+    
+    analyzer.analyze_transcript("[00:00] Short memo.")
+    
+    assert mock_openai_client.chat.completions.create.call_count == 1
+
+def test_analyze_transcript_async_map_reduce(mock_openai_client):
+    """Test async map-reduce analysis through the scheduler."""
+    import asyncio
+    from unittest.mock import AsyncMock, MagicMock, Mock
+    from src.voice_memo_analyzer.utils.scheduler import RateLimitScheduler
+
+    def response(content):
+        return Mock(choices=[Mock(message=Mock(content=content))])
+
+    async def mock_create(model=None, messages=None, temperature=None):
+        if model == "gpt-4o-mini":
+            return response('{"action_items": ["Merged"], "overall_summary": "Merged summary"}')
+        return response('{"action_items": ["A"], "overall_summary": "S", '
+                        '"key_moments": [{"timestamp": "01:00", "summary": "M"}]}')
+    
+    async_client = MagicMock()
+    async_client.chat.completions.create = AsyncMock(side_effect=mock_create)
+    analyzer = ConversationAnalyzer(
+        mock_openai_client, max_window_tokens=20,
+        async_client=async_client, scheduler=RateLimitScheduler()
+    )
+    transcript = "\n".join(f"[00:{i:02d}] " + "word " * 10 for i in range(3))
+    
+    results = asyncio.run(analyzer.analyze_transcript_async(transcript))
+    
+    assert async_client.chat.completions.create.await_count == 4
+    assert results['overall_summary'] == "Merged summary"
+    assert len(results['key_moments']) == 3
+
+def stream_chunks(content, size=7):
+    """Split content into streamed chunks, ending with a usage-only chunk."""
+    from types import SimpleNamespace
+    chunks = [
+        SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + size]))], usage=None)
+        for i in range(0, len(content), size)
+    ]
+    usage = SimpleNamespace(prompt_tokens=100, completion_tokens=40)
+    return chunks + [SimpleNamespace(choices=[], usage=usage)]
+
+def test_analyze_transcript_streams_items(mock_openai_client):
+    """Test that streamed items reach the callback before the call returns."""
+    content = '''```json
+    {"action_items": ["Send the deck", "Book a room"],
+     "overall_summary": "Launch planning",
+     "key_moments": [{"timestamp": "00:15", "summary": "Agreed on Friday"}]}
+    ```'''
+    mock_openai_client.chat.completions.create.return_value = iter(stream_chunks(content))
+    analyzer = ConversationAnalyzer(mock_openai_client)
+    items = []
+    
+    results = analyzer.analyze_transcript("[00:00] Short memo.", on_item=lambda field, value: items.append((field, value)))
+    
+    assert mock_openai_client.chat.completions.create.call_args.kwargs['stream'] is True
+    assert items == [
+        ('action_items', "Send the deck"),
+        ('action_items', "Book a room"),
+        ('overall_summary', "Launch planning"),
+        ('key_moments', {"timestamp": "00:15", "summary": "Agreed on Friday"})
+    ]
+    assert results['action_items'] == ["Send the deck", "Book a room"]
+
+@pytest.mark.parametrize("content", [
+    '{"action_items": ["Send the deck",], "overall_summary": "S", "key_moments": []}',
+    '{"action_items": [], "overall_summary": "S", "key_moments": [{"timestamp": 01:23, "summary": "M"}]}'
+])
+def test_malformed_stream_gets_the_same_result_as_a_malformed_response(mock_openai_client, content):
+    """Test that a broken streamed element falls back to the error result like a non-streamed one."""
+    from unittest.mock import Mock
+    analyzer = ConversationAnalyzer(mock_openai_client)
+    mock_openai_client.chat.completions.create.return_value = Mock(choices=[Mock(message=Mock(content=content))])
+    plain = analyzer.analyze_transcript("[00:00] Short memo.")
+    mock_openai_client.chat.completions.create.return_value = iter(stream_chunks(content))
+    
+    streamed = analyzer.analyze_transcript("[00:00] Short memo.", on_item=lambda field, value: None)
+    
+    assert streamed == plain
+    assert streamed['overall_summary'] == ANALYSIS_ERROR_SUMMARY
+
+def test_analyze_transcript_streaming_map_reduce(mock_openai_client):
+    """Test that windows stream key moments and the reduced items follow."""
+    from unittest.mock import Mock
+    window = '{"action_items": ["Window action"], "overall_summary": "S", "key_moments": [{"timestamp": "00:15", "summary": "M"}]}'
+    reduce_response = Mock(choices=[Mock(message=Mock(content='{"action_items": ["Merged"], "overall_summary": "Merged summary"}'))])
+
+    def mock_create(model=None, messages=None, temperature=None, stream=False, stream_options=None):
+        return reduce_response if model == "gpt-4o-mini" else iter(stream_chunks(window))
+    mock_openai_client.chat.completions.create.side_effect = mock_create
+    analyzer = ConversationAnalyzer(mock_openai_client, max_window_tokens=20)
+    transcript = "\n".join(f"[00:{i:02d}] " + "word " * 10 for i in range(3))
+    items = []
+    
+    analyzer.analyze_transcript(transcript, on_item=lambda field, value: items.append((field, value)))
+    
+    assert [field for field, _ in items] == ['key_moments'] * 3 + ['action_items', 'overall_summary']
+    assert items[-2:] == [('action_items', "Merged"), ('overall_summary', "Merged summary")]
+
+def test_analyze_transcript_async_streams_items(mock_openai_client):
+    """Test streaming over the async client."""
+    import asyncio
+    from unittest.mock import AsyncMock, MagicMock
+
+    async def stream():
+        for chunk in stream_chunks('{"action_items": ["A"], "overall_summary": "S", "key_moments": []}'):
+            yield chunk
+    
+    async_client = MagicMock()
+    async_client.chat.completions.create = AsyncMock(side_effect=lambda **kwargs: stream())
+    analyzer = ConversationAnalyzer(mock_openai_client, async_client=async_client)
+    items = []
+    
+    results = asyncio.run(analyzer.analyze_transcript_async(
+        "[00:00] Short memo.", on_item=lambda field, value: items.append((field, value))
+    ))
+    
+    assert items == [('action_items', "A"), ('overall_summary', "S")]
+    assert results['overall_summary'] == "S"
+
+def test_rolling_analysis_analyzes_chunks_then_reduces(mock_openai_client):
+    """Test that chunks are analyzed as they arrive and merged once at the end."""
+    from unittest.mock import Mock
+    from src.voice_memo_analyzer.analysis.analyzer import RollingAnalysis
+    window = '{"action_items": ["Window action"], "overall_summary": "S", "key_moments": [{"timestamp": "00:15", "summary": "M"}]}'
+    reduce_response = Mock(choices=[Mock(message=Mock(content='{"action_items": ["Merged"], "overall_summary": "Merged summary"}'))])
+    models = []
+
+    def mock_create(model=None, messages=None, temperature=None, stream=False, stream_options=None):
+        models.append(model)
+        return reduce_response if model == "gpt-4o-mini" else iter(stream_chunks(window))
+    mock_openai_client.chat.completions.create.side_effect = mock_create
+    analyzer = ConversationAnalyzer(mock_openai_client, max_window_tokens=20)
+    items = []
+    rolling = RollingAnalysis(lambda: analyzer, on_item=lambda field, value: items.append((field, value)))
+    
+    assert not rolling.started
+    rolling.add_chunk(1, 2, "[10:03] " + "second " * 10)
+    rolling.add_chunk(0, 2, "[00:05] " + "first " * 10)
+    results = rolling.finish()
+    rolling.close()
+    
+    assert models.count("gpt-4o-mini") == 1
+    assert len(models) == 3
+    assert results['overall_summary'] == "Merged summary"
+    assert len(results['key_moments']) == 2
+    assert items[-2:] == [('action_items', "Merged"), ('overall_summary', "Merged summary")]
+
+def test_rolling_analysis_single_chunk_skips_reduce(mock_openai_client):
+    """Test that a recording transcribed in one piece is analyzed in one call."""
+    from src.voice_memo_analyzer.analysis.analyzer import RollingAnalysis
+    rolling = RollingAnalysis(lambda: ConversationAnalyzer(mock_openai_client))
+    
+    rolling.add_chunk(0, 1, "[00:00] Short memo.")
+    results = rolling.finish()
+    
+    assert mock_openai_client.chat.completions.create.call_count == 1
+    assert results['key_moments']
+
+def test_rolling_analysis_of_a_short_multi_chunk_memo_is_one_routed_call(mock_openai_client):
+    """Test that chunks that fit one window are merged and analyzed in one call on the routed model."""
+    from src.voice_memo_analyzer.analysis.analyzer import RollingAnalysis
+    rolling = RollingAnalysis(lambda: ConversationAnalyzer(mock_openai_client, small_model="gpt-4o-mini"))
+    
+    rolling.add_chunk(0, 2, "[00:00] Buy milk.")
+    rolling.add_chunk(1, 2, "[10:00] Call the bank.")
+    results = rolling.finish()
+    
+    create = mock_openai_client.chat.completions.create
+    assert create.call_count == 1
+    assert create.call_args.kwargs['model'] == "gpt-4o-mini"
+    assert "Buy milk." in str(create.call_args.kwargs['messages'])
+    assert "Call the bank." in str(create.call_args.kwargs['messages'])
+    assert results['model_tier'] == "small"
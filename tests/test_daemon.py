@@ -0,0 +1,150 @@
+"""Tests for the watch-folder daemon and its job queue."""
+
+import sys
+import threading
+import time
+import pytest
+from src.voice_memo_analyzer.daemon import WatchDaemon
+from src.voice_memo_analyzer.utils.job_queue import JobQueue, DONE, FAILED, PENDING, RUNNING
+from src.voice_memo_analyzer.utils.watcher import InotifyWatcher, PollingWatcher
+
+class FakeAnalyzer:
+    """Records which memos were analyzed."""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.processed = []
+
+    def analyze_audio(self, file_path):
+        self.processed.append(file_path.name)
+        if file_path.name == self.fail_on:
+            return {'error': 'analysis failed'}
+        return {'overall_summary': 'Summary'}
+
+def wait_for(condition, timeout=5.0):
+    """Poll condition until it is true or timeout seconds pass."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_job_queue_lifecycle(tmp_path):
+    """Test that completed jobs are only requeued when the file changes."""
+    queue = JobQueue(tmp_path / "queue.sqlite3")
+    memo = tmp_path / "memo.m4a"
+    
+    assert queue.enqueue(memo, 100, 1)
+    assert not queue.enqueue(memo, 100, 1)
+    assert queue.claim() == memo.resolve()
+    assert queue.claim() is None
+    queue.complete(memo.resolve())
+    
+    assert queue.status(memo) == DONE
+    assert not queue.enqueue(memo, 100, 1)
+    assert queue.enqueue(memo, 200, 2)
+    assert queue.status(memo) == PENDING
+
+def test_job_queue_resumes_running_jobs(tmp_path):
+    """Test that jobs interrupted by a crash are picked up by the next process."""
+    db_path = tmp_path / "queue.sqlite3"
+    queue = JobQueue(db_path)
+    queue.enqueue(tmp_path / "memo.m4a", 100, 1)
+    queue.claim()
+    
+    restarted = JobQueue(db_path)
+    assert restarted.counts() == {RUNNING: 1}
+    assert restarted.resume() == 1
+    assert restarted.claim() == (tmp_path / "memo.m4a").resolve()
+
+def test_job_queue_gives_up_on_jobs_that_keep_crashing(tmp_path):
+    """Test that a job interrupted max_attempts times is failed instead of resumed again."""
+    db_path = tmp_path / "queue.sqlite3"
+    memo = (tmp_path / "memo.m4a").resolve()
+    JobQueue(db_path).enqueue(memo, 100, 1)
+    
+    for _ in range(2):
+        queue = JobQueue(db_path, max_attempts=2)
+        queue.resume()
+        assert queue.claim() == memo
+    
+    restarted = JobQueue(db_path, max_attempts=2)
+    assert restarted.resume() == 0
+    assert restarted.status(memo) == FAILED
+    assert restarted.claim() is None
+
+def test_job_queue_gives_up_after_max_attempts(tmp_path):
+    """Test that a failing job is retried, then marked failed."""
+    queue = JobQueue(tmp_path / "queue.sqlite3", max_attempts=2, retry_seconds=0)
+    queue.enqueue(tmp_path / "memo.m4a", 100, 1)
+    
+    queue.complete(queue.claim(), "boom")
+    assert queue.status(tmp_path / "memo.m4a") == PENDING
+    queue.complete(queue.claim(), "boom")
+    assert queue.status(tmp_path / "memo.m4a") == FAILED
+
+def test_job_queue_backs_off_before_retrying(tmp_path):
+    """Test that a failed job is not claimed again until its backoff has passed."""
+    queue = JobQueue(tmp_path / "queue.sqlite3", max_attempts=3, retry_seconds=0.2)
+    queue.enqueue(tmp_path / "memo.m4a", 100, 1)
+    queue.enqueue(tmp_path / "other.m4a", 100, 1)
+    
+    failed = queue.claim()
+    queue.complete(failed, "rate limited")
+    assert queue.claim() == (tmp_path / "other.m4a").resolve()
+    assert queue.claim() is None
+    time.sleep(0.25)
+    assert queue.claim() == failed
+
+def test_polling_watcher_reports_changes(tmp_path):
+    """Test that the polling watcher reports new and modified files once."""
+    watcher = PollingWatcher(tmp_path, interval=0)
+    memo = tmp_path / "memo.m4a"
+    memo.write_bytes(b"audio")
+    
+    assert watcher.wait(0) == {memo}
+    assert watcher.wait(0) == set()
+    memo.write_bytes(b"more audio")
+    assert watcher.wait(0) == {memo}
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+def test_inotify_watcher_reports_changes(tmp_path):
+    """Test that inotify events are turned into changed paths."""
+    watcher = InotifyWatcher(tmp_path)
+    try:
+        (tmp_path / "memo.m4a").write_bytes(b"audio")
+        assert tmp_path / "memo.m4a" in watcher.wait(1.0)
+    finally:
+        watcher.close()
+
+def test_daemon_processes_settled_files(tmp_path):
+    """Test that the daemon queues settled memos and skips completed ones on restart."""
+    watch_dir = tmp_path / "memos"
+    watch_dir.mkdir()
+    (watch_dir / "existing.m4a").write_bytes(b"audio")
+    (watch_dir / "notes.txt").write_text("not audio")
+    queue = JobQueue(tmp_path / "queue.sqlite3")
+    analyzer = FakeAnalyzer()
+    
+    daemon = WatchDaemon(analyzer, watch_dir, queue, settle_seconds=0.1,
+                         poll_interval=0.05, force_polling=True)
+    thread = threading.Thread(target=daemon.run)
+    thread.start()
+    try:
+        assert wait_for(lambda: analyzer.processed == ["existing.m4a"])
+        (watch_dir / "new.mp3").write_bytes(b"audio")
+        assert wait_for(lambda: queue.status(watch_dir / "new.mp3") == DONE)
+    finally:
+        daemon.stop()
+        thread.join(timeout=5)
+    
+    # A restarted daemon doesn't redo completed memos
+    restarted = WatchDaemon(analyzer, watch_dir, queue, settle_seconds=0.1,
+                            poll_interval=0.05, force_polling=True)
+    thread = threading.Thread(target=restarted.run)
+    thread.start()
+    time.sleep(0.4)
+    restarted.stop()
+    thread.join(timeout=5)
+    assert sorted(analyzer.processed) == ["existing.m4a", "new.mp3"]
@@ -0,0 +1,162 @@
+"""Tests for acoustic fingerprints and the fingerprint index."""
+
+import sqlite3
+
+import numpy as np
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+from src.voice_memo_analyzer import VoiceMemoAnalyzer, analyzer as analyzer_module
+from src.voice_memo_analyzer.transcription.model import CompactTranscript
+from src.voice_memo_analyzer.utils import fingerprint
+from src.voice_memo_analyzer.utils.fingerprint import (
+    FRAME_SECONDS, SAMPLE_RATE, FingerprintIndex, align_matches, fingerprint_pcm
+)
+
+def make_speech(seconds, seed, sample_rate=SAMPLE_RATE):
+    """Build int16 speech-like audio: short harmonic tones at random pitches, with pauses."""
+    rng = np.random.default_rng(seed)
+    parts, length = [], 0
+    while length < seconds * sample_rate:
+        count = int(rng.uniform(0.08, 0.4) * sample_rate)
+        t = np.arange(count) / sample_rate
+        pitch = rng.uniform(90, 260)
+        tone = sum(np.sin(2 * np.pi * pitch * harmonic * t + rng.uniform(0, 6)) / harmonic
+                   for harmonic in range(1, 8))
+        pause = np.zeros(int(rng.uniform(0.0, 0.3) * sample_rate))
+        parts.extend((tone * np.hanning(count) * 6000, pause))
+        length += count + len(pause)
+    samples = np.concatenate(parts)[:int(seconds * sample_rate)]
+    return samples + rng.normal(0, 30, len(samples))
+
+def to_pcm(samples):
+    return np.clip(samples, -32768, 32767).astype(np.int16).tobytes()
+
+def test_trimmed_noisier_copy_matches_at_its_offset(tmp_path):
+    """Test that a trimmed, quieter copy with different noise is found at the trim offset."""
+    original = make_speech(60, seed=1)
+    trimmed = original[int(3.3 * SAMPLE_RATE):int(50 * SAMPLE_RATE)] * 0.7
+    trimmed += np.random.default_rng(9).normal(0, 60, len(trimmed))
+    index = FingerprintIndex(tmp_path / "fingerprints.sqlite3")
+    index.add("original", fingerprint_pcm(to_pcm(original)))
+    index.add("other", fingerprint_pcm(to_pcm(make_speech(60, seed=2))))
+    
+    match = index.best_match(fingerprint_pcm(to_pcm(trimmed)))
+    
+    assert match.file_hash == "original"
+    assert match.offset == pytest.approx(3.3, abs=2 * FRAME_SECONDS)
+    assert match.start < 1.0
+    assert match.end > 45.0
+    assert match.matches >= 500
+
+def test_unrelated_recording_and_excluded_hash_do_not_match(tmp_path):
+    """Test that chance hash collisions don't line up and the query's own entry is skipped."""
+    original = fingerprint_pcm(to_pcm(make_speech(30, seed=1)))
+    index = FingerprintIndex(tmp_path / "fingerprints.sqlite3")
+    index.add("original", original)
+    
+    assert index.best_match(fingerprint_pcm(to_pcm(make_speech(30, seed=2)))) is None
+    assert index.best_match(original, exclude="original") is None
+    assert index.best_match(fingerprint_pcm(to_pcm(np.zeros(SAMPLE_RATE * 5)))) is None
+
+def test_readding_replaces_and_remove_drops(tmp_path):
+    """Test that a recording is indexed once however often it is added."""
+    fingerprint = fingerprint_pcm(to_pcm(make_speech(10, seed=1)))
+    index = FingerprintIndex(tmp_path / "fingerprints.sqlite3")
+    
+    index.add("memo", fingerprint)
+    index.add("memo", fingerprint)
+    assert index.stats() == {'recordings': 1, 'hashes': len(fingerprint.hashes)}
+    
+    index.remove("memo")
+    assert index.stats() == {'recordings': 0, 'hashes': 0}
+
+def test_failed_remove_is_rolled_back(tmp_path):
+    """Test that a remove that fails part way keeps the recording and leaves the connection usable."""
+    fingerprint = fingerprint_pcm(to_pcm(make_speech(10, seed=1)))
+    index = FingerprintIndex(tmp_path / "fingerprints.sqlite3")
+    index.add("memo", fingerprint)
+    connection = index._connect()
+
+    class FailingConnection:
+        def execute(self, sql, *args):
+            if sql.startswith("DELETE FROM recordings"):
+                raise sqlite3.OperationalError("disk I/O error")
+            return connection.execute(sql, *args)
+    index._local.connection = FailingConnection()
+    
+    with pytest.raises(sqlite3.OperationalError):
+        index.remove("memo")
+    index._local.connection = connection
+    
+    assert not connection.in_transaction
+    assert index.stats() == {'recordings': 1, 'hashes': len(fingerprint.hashes)}
+
+def test_align_matches_tolerates_one_frame_of_drift():
+    """Test that matches a frame either side of the best offset are counted with it."""
+    offset, aligned = align_matches(np.array([40, 41, 41, 42, 41, -7, 300]))
+    
+    assert offset == 41
+    assert aligned.tolist() == [True, True, True, True, True, False, False]
+
+def test_analyzer_reuses_a_trimmed_copys_transcript(tmp_path, monkeypatch):
+    """Test that a trimmed, extended copy of a memo only uploads what the original lacks."""
+    original = make_speech(30, seed=1)
+    copy = np.concatenate([original[3 * SAMPLE_RATE:], make_speech(6, seed=2)])
+    audio = {"original.m4a": to_pcm(original), "copy.m4a": to_pcm(copy)}
+    for name in audio:
+        (tmp_path / name).write_bytes(name.encode())
+    monkeypatch.setattr(analyzer_module, 'prepare_audio_file', lambda path, profile, file_hash: (path, path))
+    monkeypatch.setattr(analyzer_module, 'decode_to_pcm', lambda path, sample_rate: audio[Path(path).name])
+    monkeypatch.setattr(analyzer_module, 'write_gap_audio', lambda pcm, gaps, output_dir: [
+        Path(output_dir) / f"gap {start:.0f}-{end:.0f}" for start, end in gaps
+    ])
+    
+    analyzer = VoiceMemoAnalyzer(overlap_analysis=False, reuse_near_duplicates=True)
+    uploads = []
+    def mock_transcribe(file_path, on_chunk=None):
+        uploads.append(Path(file_path).name)
+        if Path(file_path).name == "original.m4a":
+            segments = [{'start': start, 'end': start + 5.0, 'text': f" Part {start // 5:.0f}."}
+                        for start in np.arange(0.0, 30.0, 5.0)]
+        else:
+            segments = [{'start': 0.0, 'end': 1.0, 'text': " New."}]
+        return CompactTranscript.from_response(SimpleNamespace(
+            text="".join(segment['text'] for segment in segments), segments=segments
+        ))
+    analyzer.transcriber.transcribe_compact = mock_transcribe
+    analyzer.analyzer.analyze_transcript = lambda transcript, on_item=None: {
+        'action_items': [], 'overall_summary': "Summary", 'key_moments': []
+    }
+    
+    analyzer.analyze_audio(tmp_path / "original.m4a")
+    results = analyzer.analyze_audio(tmp_path / "copy.m4a")
+    
+    assert uploads == ["original.m4a", "gap 0-2", "gap 27-33"]
+    assert results['formatted_transcript'].splitlines() == [
+        "[00:00]  New.", "[00:02]  Part 1.", "[00:07]  Part 2.", "[00:12]  Part 3.",
+        "[00:17]  Part 4.", "[00:22]  Part 5.", "[00:27]  New."
+    ]
+    assert fingerprint.get_fingerprint_index().stats()['recordings'] == 2
+
+def test_failed_lookup_falls_back_to_transcribing(tmp_path, monkeypatch):
+    """Test that an index error during the near-duplicate lookup doesn't fail the memo."""
+    (tmp_path / "memo.m4a").write_bytes(b"memo")
+    monkeypatch.setattr(analyzer_module, 'prepare_audio_file', lambda path, profile, file_hash: (path, path))
+    monkeypatch.setattr(analyzer_module, 'decode_to_pcm', lambda path, sample_rate: to_pcm(make_speech(10, seed=1)))
+    def failing_match(self, *args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(FingerprintIndex, 'best_match', failing_match)
+    
+    analyzer = VoiceMemoAnalyzer(overlap_analysis=False, reuse_near_duplicates=True)
+    analyzer.transcriber.transcribe_compact = lambda file_path, on_chunk=None: CompactTranscript.from_response(
+        SimpleNamespace(text=" Hello.", segments=[{'start': 0.0, 'end': 1.0, 'text': " Hello."}])
+    )
+    analyzer.analyzer.analyze_transcript = lambda transcript, on_item=None: {
+        'action_items': [], 'overall_summary': "Summary", 'key_moments': []
+    }
+    
+    results = analyzer.analyze_audio(tmp_path / "memo.m4a")
+    
+    assert results['formatted_transcript'] == "[00:00]  Hello."
+    assert fingerprint.get_fingerprint_index().stats()['recordings'] == 1
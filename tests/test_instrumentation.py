@@ -0,0 +1,82 @@
+"""Tests for the stage instrumentation."""
+
+import json
+import urllib.request
+import pytest
+from src.voice_memo_analyzer.transcription.transcriber import Transcriber
+from src.voice_memo_analyzer.utils.instrumentation import (
+    MetricsRegistry, Profiler, add_hook, remove_hook, serve_metrics, span
+)
+
+def test_span_records_nesting_and_measurements():
+    """Test that spans reach hooks with their parent, duration and measurements."""
+    finished = []
+    add_hook(finished.append)
+    try:
+        with span("outer"):
+            with span("inner", bytes_read=10) as inner:
+                inner.set(hit=True)
+    finally:
+        remove_hook(finished.append)
+    
+    assert [item.name for item in finished] == ["inner", "outer"]
+    assert finished[0].parent == "outer"
+    assert finished[0].attributes == {'bytes_read': 10, 'hit': True}
+    assert finished[1].duration >= finished[0].duration
+
+def test_span_records_errors():
+    """Test that a failing stage is reported with its error and re-raised."""
+    with Profiler() as profiler:
+        with pytest.raises(ValueError):
+            with span("audio.convert"):
+                raise ValueError("bad input")
+    
+    assert profiler.spans[0].error == "ValueError: bad input"
+    assert profiler.report()['stages']['audio.convert']['errors'] == 1
+
+def test_profiler_report_aggregates_stages(tmp_path):
+    """Test per-stage totals and the JSON report."""
+    with Profiler() as profiler:
+        for hit in (True, False, True):
+            with span("cache.analysis", hit=hit):
+                pass
+        with span("analysis.request", prompt_tokens=100, completion_tokens=20):
+            pass
+    with span("after.profiling"):
+        pass
+    
+    stages = profiler.report()['stages']
+    assert stages['cache.analysis']['count'] == 3
+    assert stages['cache.analysis']['hit'] == 2
+    assert stages['analysis.request']['prompt_tokens'] == 100
+    assert 'after.profiling' not in stages
+    
+    report_path = tmp_path / "profile.json"
+    profiler.write(report_path)
+    assert len(json.loads(report_path.read_text())['spans']) == 4
+
+def test_metrics_endpoint():
+    """Test that the Prometheus endpoint serves the aggregated counters."""
+    registry = MetricsRegistry()
+    add_hook(registry)
+    server = serve_metrics(registry, port=0)
+    try:
+        with span("transcribe.request", bytes_uploaded=2048):
+            pass
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        body = urllib.request.urlopen(url).read().decode()
+    finally:
+        remove_hook(registry)
+        server.shutdown()
+    
+    assert 'voice_memo_stage_runs_total{stage="transcribe.request"} 1' in body
+    assert 'voice_memo_stage_measurement_total{stage="transcribe.request",measurement="bytes_uploaded"} 2048' in body
+
+def test_transcriber_reports_upload_size(mock_openai_client, test_mp3_file):
+    """Test that transcription requests report the bytes uploaded."""
+    with Profiler() as profiler:
+        Transcriber(mock_openai_client).transcribe(test_mp3_file)
+    
+    stages = profiler.report()['stages']
+    assert stages['transcribe.request']['bytes_uploaded'] == test_mp3_file.stat().st_size
+    assert stages['transcribe']['count'] == 1
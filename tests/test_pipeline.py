@@ -0,0 +1,83 @@
+"""Tests for the batch processing pipeline."""
+
+import time
+from pathlib import Path
+from src.voice_memo_analyzer import pipeline
+from src.voice_memo_analyzer.pipeline import BatchPipeline, collect_audio_files, format_batch_summary
+
+class FakeAnalyzer:
+    """Stands in for VoiceMemoAnalyzer with slow, network-like stages."""
+    
+    def __init__(self, delay=0.0, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.encoding_profile = "speech"
+        self.saved = []
+        self.indexed = []
+    
+    def get_transcript(self, original_path, mp3_path, file_hash):
+        time.sleep(self.delay)
+        if original_path.name == self.fail_on:
+            raise RuntimeError("transcription failed")
+        return "raw", f"[00:00] {original_path.stem}"
+    
+    def get_analysis(self, formatted_transcript, reanalyze=False):
+        time.sleep(self.delay)
+        return {'action_items': [], 'overall_summary': formatted_transcript, 'key_moments': []}
+    
+    def save_results(self, results, original_filename):
+        self.saved.append(original_filename)
+
+    def index_semantic(self, file_hash, original_filename, results):
+        self.indexed.append(file_hash)
+
+def make_files(tmp_path, count):
+    files = []
+    for index in range(count):
+        path = tmp_path / f"memo{index}.m4a"
+        path.write_bytes(b"audio")
+        files.append(path)
+    return files
+
+def test_batch_pipeline_processes_all_files(tmp_path, monkeypatch):
+    """Test that every file runs through all stages, overlapping work."""
+    monkeypatch.setattr(pipeline, 'prepare_audio_file', lambda path, profile, file_hash: (path, path))
+    monkeypatch.setattr(pipeline, 'get_file_hash', lambda path: path.stem)
+    files = make_files(tmp_path, 8)
+    analyzer = FakeAnalyzer(delay=0.05)
+    
+    start = time.perf_counter()
+    results = BatchPipeline(analyzer, transcribe_workers=4, analyze_workers=4).run(files)
+    elapsed = time.perf_counter() - start
+    
+    assert [result.file_path for result in results] == files
+    assert all(result.success for result in results)
+    assert sorted(analyzer.saved) == sorted(path.name for path in files)
+    assert sorted(analyzer.indexed) == sorted(path.stem for path in files)
+    # 8 files x 2 stages x 50ms would take 0.8s serially
+    assert elapsed < 0.6
+
+def test_batch_pipeline_records_failures(tmp_path, monkeypatch):
+    """Test that a failing file is reported without stopping the batch."""
+    monkeypatch.setattr(pipeline, 'prepare_audio_file', lambda path, profile, file_hash: (path, path))
+    monkeypatch.setattr(pipeline, 'get_file_hash', lambda path: path.stem)
+    files = make_files(tmp_path, 3)
+    analyzer = FakeAnalyzer(fail_on="memo1.m4a")
+    
+    results = BatchPipeline(analyzer).run(files)
+    
+    assert [result.success for result in results] == [True, False, True]
+    assert results[1].failed_stage == "transcribe"
+    assert "transcription failed" in results[1].error
+    summary = format_batch_summary(results)
+    assert "2/3 succeeded" in summary
+    assert "memo1.m4a" in summary
+
+def test_collect_audio_files(tmp_path):
+    """Test collecting audio files from a directory and from a glob."""
+    (tmp_path / "a.m4a").write_bytes(b"")
+    (tmp_path / "b.MP3").write_bytes(b"")
+    (tmp_path / "notes.txt").write_text("")
+    
+    assert [path.name for path in collect_audio_files(tmp_path)] == ["a.m4a", "b.MP3"]
+    assert [path.name for path in collect_audio_files(str(tmp_path / "*.m4a"))] == ["a.m4a"]
@@ -0,0 +1,48 @@
+"""Tests for reusing a near-duplicate recording's transcript."""
+
+import pytest
+from types import SimpleNamespace
+from src.voice_memo_analyzer.transcription.model import CompactTranscript
+from src.voice_memo_analyzer.transcription.reuse import plan_reuse
+from src.voice_memo_analyzer.utils.fingerprint import FingerprintMatch
+
+OLD = CompactTranscript.from_response(SimpleNamespace(
+    text="One. Two. Three. Four.",
+    segments=[
+        {'start': 0.0, 'end': 4.0, 'text': ' One.'},
+        {'start': 4.0, 'end': 8.0, 'text': ' Two.'},
+        {'start': 8.0, 'end': 12.0, 'text': ' Three.'},
+        {'start': 12.0, 'end': 16.0, 'text': ' Four.'}
+    ],
+    words=[{'start': 4.2, 'end': 4.8, 'word': 'Two'}]
+))
+
+def test_trimmed_start_and_extended_end_are_transcribed():
+    """Test that a copy trimmed 3s into the first segment, with 5s added, reuses the middle."""
+    match = FingerprintMatch("old", offset=3.0, start=0.2, end=12.8, matches=400)
+    
+    reuse = plan_reuse(OLD, match, duration=18.0)
+    transcript = reuse.merge([
+        SimpleNamespace(text="Ne.", segments=[{'start': 0.0, 'end': 1.0, 'text': ' Ne.'}]),
+        SimpleNamespace(text="Five.", segments=[{'start': 0.5, 'end': 4.0, 'text': ' Five.'}])
+    ])
+    
+    assert reuse.gaps == [(0.0, 1.0), (13.0, 18.0)]
+    assert transcript.format() == "[00:00]  Ne.\n[00:01]  Two.\n[00:05]  Three.\n[00:09]  Four.\n[00:13]  Five."
+    assert transcript.raw_text == "Ne. Two. Three. Four. Five."
+    assert transcript.word(0).start == pytest.approx(1.2)
+
+def test_exact_copy_needs_no_transcription():
+    """Test that a match spanning the whole recording leaves nothing to transcribe."""
+    match = FingerprintMatch("old", offset=0.0, start=0.1, end=15.5, matches=500)
+    
+    reuse = plan_reuse(OLD, match, duration=16.0)
+    
+    assert reuse.gaps == []
+    assert reuse.merge([]).format() == OLD.format()
+
+def test_match_outside_the_transcript_is_not_reused():
+    """Test that a match with no old segments inside it gives nothing to reuse."""
+    match = FingerprintMatch("old", offset=20.0, start=0.0, end=5.0, matches=100)
+    
+    assert plan_reuse(OLD, match, duration=10.0) is None
@@ -0,0 +1,67 @@
+"""Tests for the rate-limit-aware async scheduler."""
+
+import asyncio
+import pytest
+from src.voice_memo_analyzer.utils.scheduler import RateLimitScheduler, TokenBucket, is_retryable
+
+class StatusError(Exception):
+    """An API error carrying an HTTP status code."""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = None
+
+def test_token_bucket_waits_when_empty():
+    """Test that reservations beyond capacity report a wait time."""
+    bucket = TokenBucket(rate_per_minute=60)
+    
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(30) == pytest.approx(30.0, abs=0.1)
+
+def test_is_retryable():
+    """Test which errors are retried."""
+    assert is_retryable(StatusError(429))
+    assert is_retryable(StatusError(503))
+    assert not is_retryable(StatusError(400))
+    assert not is_retryable(ValueError("bad input"))
+
+def test_submit_retries_rate_limit_errors():
+    """Test that 429 responses are retried until the call succeeds."""
+    scheduler = RateLimitScheduler(base_delay=0.001, max_delay=0.01)
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise StatusError(429)
+        return "ok"
+    
+    assert asyncio.run(scheduler.submit(call, tokens=100)) == "ok"
+    assert len(attempts) == 3
+
+def test_submit_gives_up_after_max_retries():
+    """Test that the last error is raised once retries run out."""
+    scheduler = RateLimitScheduler(max_retries=2, base_delay=0.001, max_delay=0.01)
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        raise StatusError(500)
+    
+    with pytest.raises(StatusError):
+        asyncio.run(scheduler.submit(call))
+    assert len(attempts) == 3
+
+def test_submit_does_not_retry_client_errors():
+    """Test that non-retryable errors are raised immediately."""
+    scheduler = RateLimitScheduler(base_delay=0.001)
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        raise StatusError(400)
+    
+    with pytest.raises(StatusError):
+        asyncio.run(scheduler.submit(call))
+    assert len(attempts) == 1
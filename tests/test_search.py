@@ -0,0 +1,95 @@
+"""Tests for the transcript full-text search index."""
+
+import sqlite3
+import pytest
+from src.voice_memo_analyzer.utils import cache
+from src.voice_memo_analyzer.utils.search import SearchIndex, parse_segments, reindex_from_cache
+
+TRANSCRIPT = """[00:00] Let's start with the quarterly budget review.
+[00:42] The marketing budget is over by ten percent.
+[01:15] Next week we'll plan the product launch."""
+
+def test_parse_segments():
+    """Test splitting a formatted transcript into timed segments."""
+    segments = parse_segments(TRANSCRIPT + "\n\nnot a segment\n[02:00]")
+    
+    assert len(segments) == 3
+    assert segments[1] == ("00:42", 42.0, "The marketing budget is over by ten percent.")
+    assert segments[2][1] == 75.0
+
+def test_search_returns_timestamps_and_snippets(tmp_path):
+    """Test that matches carry the memo, segment timestamp and a highlighted snippet."""
+    index = SearchIndex(tmp_path / "search.sqlite3")
+    index.index_transcript("hash1", "standup.m4a", TRANSCRIPT)
+    index.index_transcript("hash2", "groceries.m4a", "[00:05] Buy milk and eggs.")
+    
+    hits = index.search("budget")
+    
+    assert sorted(hit.timestamp for hit in hits) == ["00:00", "00:42"]
+    assert {hit.original_filename for hit in hits} == {"standup.m4a"}
+    assert all("[budget]" in hit.snippet for hit in hits)
+    assert hits[0].rank <= hits[1].rank
+    assert index.search("marketing budget")[0].seconds == 42.0
+    assert index.stats() == {'memos': 2, 'segments': 4}
+
+def test_reindexing_replaces_segments(tmp_path):
+    """Test that indexing a memo again drops its old segments."""
+    index = SearchIndex(tmp_path / "search.sqlite3")
+    index.index_transcript("hash1", "memo.m4a", TRANSCRIPT)
+    
+    index.index_transcript("hash1", "memo.m4a", "[00:10] A completely different memo.")
+    
+    assert index.search("budget") == []
+    assert index.search("different")[0].timestamp == "00:10"
+    assert index.stats() == {'memos': 1, 'segments': 1}
+    
+    index.remove("hash1")
+    assert index.stats() == {'memos': 0, 'segments': 0}
+
+def test_failed_remove_is_rolled_back(tmp_path):
+    """Test that a remove that fails part way leaves the memo indexed and the connection usable."""
+    index = SearchIndex(tmp_path / "search.sqlite3")
+    index.index_transcript("hash1", "memo.m4a", TRANSCRIPT)
+    connection = index._connect()
+
+    class FailingConnection:
+        def execute(self, sql, *args):
+            if sql.startswith("DELETE FROM memos"):
+                raise sqlite3.OperationalError("disk I/O error")
+            return connection.execute(sql, *args)
+    index._local.connection = FailingConnection()
+    
+    with pytest.raises(sqlite3.OperationalError):
+        index.remove("hash1")
+    index._local.connection = connection
+    
+    assert not connection.in_transaction
+    assert index.stats() == {'memos': 1, 'segments': 3}
+
+def test_query_syntax_is_escaped_and_prefixes_match(tmp_path):
+    """Test punctuation in queries, stemming and trailing-* prefix search."""
+    index = SearchIndex(tmp_path / "search.sqlite3")
+    index.index_transcript("hash1", "memo.m4a", TRANSCRIPT)
+    
+    assert len(index.search("we'll plan")) == 1
+    assert len(index.search('(launch) "week')) == 1
+    assert len(index.search("quart*")) == 1
+    assert len(index.search("planning")) == 1
+    assert index.search("   ") == []
+
+def test_reindex_from_cache(tmp_path):
+    """Test rebuilding the index from cached transcripts."""
+    cache.save_to_cache({
+        'original_filename': 'standup.m4a',
+        'formatted_transcript': TRANSCRIPT,
+        'transcript_path': str(tmp_path / "standup.txt"),
+        'mp3_path': str(tmp_path / "standup.mp3")
+    }, "hash1")
+    index = SearchIndex(tmp_path / "search.sqlite3")
+    store = cache.get_store()
+    store._connect().execute("UPDATE entries SET last_access = 0")
+    
+    assert reindex_from_cache(index) == 1
+    assert index.search("launch")[0].original_filename == "standup.m4a"
+    # Reindexing doesn't make every memo look recently used to the pruner
+    assert store._connect().execute("SELECT MAX(last_access) FROM entries").fetchone()[0] == 0
@@ -0,0 +1,159 @@
+"""Tests for the memory-mapped semantic search index."""
+
+import sqlite3
+
+import numpy as np
+import pytest
+from src.voice_memo_analyzer import VoiceMemoAnalyzer
+from src.voice_memo_analyzer.utils import cache
+from src.voice_memo_analyzer.utils.semantic import SemanticIndex, memo_items, reindex_semantic_from_cache, top_k
+
+# A tiny embedding space where paraphrases share concepts
+CONCEPTS = {
+    'push': 0, 'delay': 0, 'postpone': 0, 'back': 0,
+    'launch': 1, 'release': 1, 'ship': 1,
+    'budget': 2, 'money': 2, 'spend': 2,
+    'milk': 3, 'eggs': 3, 'groceries': 3,
+}
+
+def fake_embed(texts):
+    """Embed texts as bags of concepts."""
+    vectors = np.zeros((len(texts), 8), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.lower().replace('.', ' ').split():
+            if word in CONCEPTS:
+                vectors[row, CONCEPTS[word]] += 1
+        vectors[row, 7] += 0.1
+    return vectors
+
+TRANSCRIPT = """[00:00] We need to delay the release by two weeks.
+[00:30] The budget is fine for now.
+[01:05] Pick up milk and eggs on the way home."""
+
+ANALYSIS = {
+    'key_moments': [{'timestamp': '00:30', 'summary': 'Budget confirmed'}],
+    'action_items': ['Postpone the launch announcement'],
+    'overall_summary': 'Planning'
+}
+
+def test_memo_items_cover_segments_and_analysis():
+    """Test that segments, key moments and action items are all indexed."""
+    items = memo_items(TRANSCRIPT, ANALYSIS)
+    
+    assert [item[0] for item in items] == ['segment'] * 3 + ['key_moment', 'action_item']
+    assert items[3] == ('key_moment', '00:30', 30.0, 'Budget confirmed')
+    assert items[4] == ('action_item', None, None, 'Postpone the launch announcement')
+
+def test_search_finds_paraphrases(tmp_path):
+    """Test that a query matches items with the same meaning but other words."""
+    batches = []
+    def embed(texts):
+        batches.append(len(texts))
+        return fake_embed(texts)
+    index = SemanticIndex(tmp_path, embed, model="fake", batch_size=2)
+    
+    assert index.index_memo("hash1", "standup.m4a", TRANSCRIPT, ANALYSIS) == 5
+    assert batches == [2, 2, 1]
+    hits = index.search("push the launch back", limit=2)
+    
+    assert {(hit.kind, hit.timestamp) for hit in hits} == {('segment', '00:00'), ('action_item', None)}
+    assert hits[0].original_filename == "standup.m4a"
+    assert hits[0].score > 0.9
+    assert index.search("groceries", limit=1)[0].seconds == 65.0
+    
+    # Unchanged memos are not embedded again (only the two queries were)
+    assert index.index_memo("hash1", "standup.m4a", TRANSCRIPT, ANALYSIS) == 0
+    assert batches == [2, 2, 1, 1, 1]
+
+def test_reindexing_skips_dead_rows_and_compacts(tmp_path):
+    """Test that replaced items are never returned and compact() drops their rows."""
+    index = SemanticIndex(tmp_path, fake_embed, model="fake", compact_fraction=None)
+    index.index_memo("hash1", "memo.m4a", TRANSCRIPT)
+    index.index_memo("hash2", "other.m4a", "[00:10] Spend less money.")
+    
+    index.index_memo("hash1", "memo.m4a", "[00:05] Ship it today.")
+    hits = index.search("budget", limit=10)
+    
+    assert [hit.text for hit in hits][0] == "Spend less money."
+    assert "The budget is fine for now." not in [hit.text for hit in hits]
+    assert index.stats()['rows'] == 5
+    
+    assert index.compact() == 3
+    assert index.stats()['rows'] == index.stats()['items'] == 2
+    assert index.search("release", limit=1)[0].text == "Ship it today."
+
+def test_dead_rows_are_compacted_past_the_fraction(tmp_path):
+    """Test that writers compact the matrix once enough of it is dead."""
+    index = SemanticIndex(tmp_path, fake_embed, model="fake", compact_fraction=0.5)
+    index.index_memo("hash1", "memo.m4a", TRANSCRIPT)
+    index.index_memo("hash2", "other.m4a", "[00:10] Spend less money.")
+    
+    # 1 of 4 rows dead stays below the fraction
+    index.index_memo("hash2", "other.m4a", "[00:10] Spend more money.")
+    assert index.stats()['rows'] == 5
+    
+    index.remove("hash1")
+    assert index.stats()['rows'] == index.stats()['items'] == 1
+    assert index.search("budget", limit=5)[0].text == "Spend more money."
+
+def test_failed_remove_is_rolled_back(tmp_path):
+    """Test that a remove that fails part way leaves the memo indexed and the connection usable."""
+    index = SemanticIndex(tmp_path, fake_embed, model="fake")
+    index.index_memo("hash1", "memo.m4a", TRANSCRIPT)
+    connection = index._connect()
+
+    class FailingConnection:
+        def execute(self, sql, *args):
+            if sql.startswith("DELETE FROM memos"):
+                raise sqlite3.OperationalError("disk I/O error")
+            return connection.execute(sql, *args)
+    index._local.connection = FailingConnection()
+    
+    with pytest.raises(sqlite3.OperationalError):
+        index.remove("hash1")
+    index._local.connection = connection
+    
+    assert not connection.in_transaction
+    assert index.stats()['memos'] == 1
+    assert index.stats()['items'] == 3
+
+def test_interrupted_write_is_ignored(tmp_path):
+    """Test that rows written past the committed count are discarded."""
+    index = SemanticIndex(tmp_path, fake_embed, model="fake")
+    index.index_memo("hash1", "memo.m4a", TRANSCRIPT)
+    with open(index.vectors_path, "ab") as f:
+        f.write(b"\x00" * 32 * 3)
+    
+    index.index_memo("hash2", "other.m4a", "[00:10] Buy groceries.")
+    
+    assert index.stats()['rows'] == 4
+    assert index.vectors_path.stat().st_size == 4 * 8 * 4
+    assert index.search("milk", limit=2)[0].text == "Buy groceries."
+
+def test_top_k_matches_full_sort():
+    """Test that chunked top-k agrees with sorting every score."""
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((1000, 16)).astype(np.float32)
+    query = rng.standard_normal(16).astype(np.float32)
+    
+    rows, scores = top_k(matrix, query, 10, chunk_rows=64)
+    
+    expected = np.argsort(-(matrix @ query))[:10]
+    assert list(rows) == list(expected)
+    assert np.all(np.diff(scores) <= 0)
+
+def test_reindex_semantic_from_cache(tmp_path):
+    """Test rebuilding the index from cached transcripts and analyses."""
+    cache.save_to_cache({
+        'original_filename': 'standup.m4a',
+        'formatted_transcript': TRANSCRIPT,
+        'transcript': '',
+        'transcript_path': str(tmp_path / "standup.txt"),
+        'mp3_path': str(tmp_path / "standup.mp3")
+    }, "hash1")
+    analyzer = VoiceMemoAnalyzer()
+    cache.save_analysis_to_cache(ANALYSIS, analyzer.analysis_cache_key(TRANSCRIPT))
+    index = SemanticIndex(tmp_path / "semantic", fake_embed, model="fake")
+    
+    assert reindex_semantic_from_cache(index, analyzer.analysis_cache_key) == 1
+    assert index.stats()['items'] == 5
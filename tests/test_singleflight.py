@@ -0,0 +1,168 @@
+"""Tests for single-flight deduplication and atomic writes."""
+
+import asyncio
+import os
+import threading
+import time
+import pytest
+from src.voice_memo_analyzer.utils.singleflight import SingleFlight, atomic_write_text
+
+def wait_for_waiters(flight, key, count, timeout=5.0):
+    """Block until count callers are waiting on key's flight, failing the test after timeout."""
+    deadline = time.monotonic() + timeout
+    while flight.waiters(key) < count:
+        if time.monotonic() > deadline:
+            pytest.fail(f"{count} callers never joined {key}")
+        time.sleep(0.001)
+
+def test_concurrent_callers_share_one_computation(tmp_path):
+    """Test that callers arriving while the work runs wait for its result."""
+    flight = SingleFlight(tmp_path)
+    started = threading.Event()
+    calls = []
+    results = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        # Finish only once every follower has joined this flight
+        wait_for_waiters(flight, "transcript:abc", 3)
+        return "transcript"
+    leader = threading.Thread(target=lambda: results.append(flight.run("transcript:abc", compute)))
+    leader.start()
+    started.wait(5)
+    followers = [
+        threading.Thread(target=lambda: results.append(flight.run("transcript:abc", compute)))
+        for _ in range(3)
+    ]
+    for follower in followers:
+        follower.start()
+    for thread in [leader, *followers]:
+        thread.join(5)
+    
+    assert calls == [1]
+    assert sorted(results) == [("transcript", False)] * 3 + [("transcript", True)]
+
+def test_other_process_result_is_reused(tmp_path):
+    """Test that a caller blocked on the lock file reuses the holder's stored result."""
+    # Two coordinators over one lock directory stand in for two processes
+    first, second = SingleFlight(tmp_path), SingleFlight(tmp_path)
+    store = {}
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_compute():
+        started.set()
+        release.wait(5)
+        store['key'] = "first"
+        return "first"
+    thread = threading.Thread(target=lambda: first.run("analysis:key", slow_compute, lambda: store.get('key')))
+    thread.start()
+    started.wait(5)
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(
+        second.run("analysis:key", lambda: pytest.fail("work was repeated"), lambda: store.get('key'))
+    ))
+    waiter.start()
+    
+    waiter.join(0.2)
+    assert waiter.is_alive()
+    release.set()
+    thread.join(5)
+    waiter.join(5)
+    
+    assert results == [("first", False)]
+
+def test_errors_reach_waiting_callers_and_are_not_remembered(tmp_path):
+    """Test that a failed flight fails its waiters and the next caller starts over."""
+    flight = SingleFlight(tmp_path)
+    started = threading.Event()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        started.set()
+        wait_for_waiters(flight, "transcript:abc", 1)
+        raise RuntimeError("rate limited")
+    errors = []
+
+    def call():
+        try:
+            flight.run("transcript:abc", failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    leader.join(5)
+    follower.join(5)
+    
+    assert calls == [1]
+    assert errors == ["rate limited", "rate limited"]
+    assert flight.run("transcript:abc", lambda: "retried") == ("retried", True)
+
+def test_lock_files_are_removed_after_release(tmp_path):
+    """Test that no lock file is left behind once a key's work is done."""
+    flight = SingleFlight(tmp_path)
+    
+    assert flight.run("transcript:abc", lambda: "transcript") == ("transcript", True)
+    assert flight.run("transcript:abc", lambda: "again") == ("again", True)
+    assert list(tmp_path.iterdir()) == []
+
+def test_lock_taken_on_an_unlinked_file_is_retaken(tmp_path):
+    """Test that a waiter whose lock file was removed by the holder locks the new file instead."""
+    first, second = SingleFlight(tmp_path), SingleFlight(tmp_path)
+    held = first._acquire("transcript:abc")
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(second._acquire("transcript:abc")))
+    waiter.start()
+    
+    waiter.join(0.2)
+    assert waiter.is_alive()
+    first._release(held)
+    waiter.join(5)
+    lock_path = tmp_path / "transcript_abc.lock"
+    
+    assert lock_path.stat().st_ino == os.fstat(acquired[0].fileno()).st_ino
+    # While the waiter holds the lock, a third caller can't take it
+    third = threading.Thread(target=lambda: second._release(first._acquire("transcript:abc")))
+    third.start()
+    third.join(0.2)
+    assert third.is_alive()
+    second._release(acquired[0])
+    third.join(5)
+    assert not third.is_alive()
+
+def test_run_async_shares_one_computation(tmp_path):
+    """Test that concurrent coroutines share one computation."""
+    flight = SingleFlight(tmp_path)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "analysis"
+
+    async def main():
+        return await asyncio.gather(*(flight.run_async("analysis:key", compute) for _ in range(4)))
+    results = asyncio.run(main())
+    
+    assert calls == [1]
+    assert sorted(results) == [("analysis", False)] * 3 + [("analysis", True)]
+
+def test_atomic_write_replaces_whole_file(tmp_path, monkeypatch):
+    """Test that a failed write leaves the previous file intact and no temp files."""
+    from src.voice_memo_analyzer.utils import singleflight
+    path = tmp_path / "memo_analysis.json"
+    atomic_write_text(path, "old")
+
+    def fail_replace(source, destination):
+        raise OSError("disk full")
+    monkeypatch.setattr(singleflight.os, 'replace', fail_replace)
+    with pytest.raises(OSError):
+        atomic_write_text(path, "new")
+    
+    assert path.read_text() == "old"
+    assert [item.name for item in tmp_path.iterdir()] == ["memo_analysis.json"]
@@ -0,0 +1,57 @@
+"""Tests for incremental parsing of streamed analysis JSON."""
+
+import pytest
+from src.voice_memo_analyzer.analysis.streaming import IncrementalJSONParser
+
+DOCUMENT = '''```json
+{
+    "action_items": ["Email Sam, then \\"confirm\\" the date", "Order 3 {chairs}"],
+    "overall_summary": "Budget [approved]",
+    "key_moments": [
+        {"timestamp": "00:15", "summary": "Agreed, finally"},
+        {"timestamp": "01:30", "summary": "Scope cut"}
+    ],
+    "confidence": 0.9
+}
+```'''
+
+@pytest.mark.parametrize("chunk_size", [1, 5, len(DOCUMENT)])
+def test_items_are_reported_as_they_complete(chunk_size):
+    """Test that every item is reported once, however the text is chunked."""
+    parser = IncrementalJSONParser()
+    events = []
+    for start in range(0, len(DOCUMENT), chunk_size):
+        events.extend(parser.feed(DOCUMENT[start:start + chunk_size]))
+    
+    assert [path for path, _ in events] == [
+        ('action_items', 0), ('action_items', 1), ('action_items',),
+        ('overall_summary',),
+        ('key_moments', 0), ('key_moments', 1), ('key_moments',),
+        ('confidence',)
+    ]
+    assert events[0][1] == 'Email Sam, then "confirm" the date'
+    assert events[4][1] == {"timestamp": "00:15", "summary": "Agreed, finally"}
+    assert events[-1][1] == 0.9
+    assert parser.result()['overall_summary'] == "Budget [approved]"
+
+def test_item_is_reported_only_when_closed():
+    """Test that a partially received item isn't reported yet."""
+    parser = IncrementalJSONParser()
+    
+    assert parser.feed('{"action_items": ["First", "Sec') == [(('action_items', 0), "First")]
+    assert parser.feed('ond"') == [(('action_items', 1), "Second")]
+    assert not parser.done
+    with pytest.raises(ValueError):
+        parser.result()
+
+def test_malformed_element_stops_reporting():
+    """Test that a malformed value ends the events and makes result() fail instead of raising from feed()."""
+    parser = IncrementalJSONParser()
+    
+    events = parser.feed('{"action_items": ["Call Sam"], "key_moments": [{"timestamp": 01:23, "summary": "x"}], ')
+    
+    assert events == [(('action_items', 0), "Call Sam"), (('action_items',), ["Call Sam"])]
+    assert parser.error is not None
+    assert parser.feed('"overall_summary": "S"}') == []
+    with pytest.raises(ValueError):
+        parser.result()
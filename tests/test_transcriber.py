@@ -37,3 +37,160 @@ def test_transcribe_api_error(mock_openai_client, test_mp3_file):
     with pytest.raises(Exception) as exc_info:
         transcriber.transcribe(test_mp3_file)
     assert "API Error" in str(exc_info.value)
+
+def test_transcribe_chunked_offsets_timestamps(mock_openai_client, test_mp3_file, monkeypatch):
+    """Test that chunk offsets are added to segment timestamps."""
+    from types import SimpleNamespace
+    from src.voice_memo_analyzer.transcription import transcriber as transcriber_module
+
+    def mock_split(audio_path, output_dir, chunk_seconds):
+        chunks = []
+        for index, offset in enumerate([0.0, 598.5]):
+            chunk_path = output_dir / f"chunk{index}.mp3"
+            chunk_path.write_bytes(b"chunk")
+            chunks.append((chunk_path, offset))
+        return chunks
+    monkeypatch.setattr(transcriber_module, 'get_audio_duration', lambda path: 1200.0)
+    monkeypatch.setattr(transcriber_module, 'split_audio_at_silence', mock_split)
+
+    def mock_create(**kwargs):
+        return SimpleNamespace(
+            text="Chunk text",
+            segments=[SimpleNamespace(start=5.0, end=9.0, text="Chunk text")],
+            words=[SimpleNamespace(start=5.0, end=6.0, word="Chunk")]
+        )
+    mock_openai_client.audio.transcriptions.create = mock_create
+    
+    transcriber = Transcriber(mock_openai_client, chunk_seconds=600, max_workers=2)
+    raw_transcript, formatted_transcript = transcriber.transcribe(test_mp3_file)
+    
+    assert raw_transcript == "Chunk text Chunk text"
+    assert formatted_transcript.splitlines() == [
+        "[00:05] Chunk text",
+        "[10:03] Chunk text"
+    ]
+
+def test_transcribe_compact_reports_chunks(mock_openai_client, test_mp3_file, monkeypatch):
+    """Test that each chunk's transcript is passed to on_chunk with recording timestamps."""
+    from types import SimpleNamespace
+    from src.voice_memo_analyzer.transcription import transcriber as transcriber_module
+
+    def mock_split(audio_path, output_dir, chunk_seconds):
+        chunks = []
+        for index, offset in enumerate([0.0, 598.5]):
+            chunk_path = output_dir / f"chunk{index}.mp3"
+            chunk_path.write_bytes(b"chunk")
+            chunks.append((chunk_path, offset))
+        return chunks
+    monkeypatch.setattr(transcriber_module, 'get_audio_duration', lambda path: 1200.0)
+    monkeypatch.setattr(transcriber_module, 'split_audio_at_silence', mock_split)
+    mock_openai_client.audio.transcriptions.create = lambda **kwargs: SimpleNamespace(
+        text="Chunk text", segments=[SimpleNamespace(start=5.0, end=9.0, text="Chunk text")]
+    )
+    chunks = []
+    
+    transcriber = Transcriber(mock_openai_client, chunk_seconds=600, max_workers=2)
+    transcript = transcriber.transcribe_compact(test_mp3_file, on_chunk=lambda *args: chunks.append(args))
+    
+    assert sorted(chunks) == [(0, 2, "[00:05] Chunk text"), (1, 2, "[10:03] Chunk text")]
+    assert transcript.segment_count == 2
+
+def test_transcribe_short_file_skips_chunking(mock_openai_client, test_mp3_file, monkeypatch):
+    """Test that files shorter than chunk_seconds are uploaded whole."""
+    from src.voice_memo_analyzer.transcription import transcriber as transcriber_module
+    
+    monkeypatch.setattr(transcriber_module, 'get_audio_duration', lambda path: 30.0)
+    def fail_split(*args, **kwargs):
+        raise AssertionError("short files should not be split")
+    monkeypatch.setattr(transcriber_module, 'split_audio_at_silence', fail_split)
+    
+    transcriber = Transcriber(mock_openai_client, chunk_seconds=600)
+    raw_transcript, _ = transcriber.transcribe(test_mp3_file)
+    
+    assert raw_transcript == "This is a test transcript"
+
+def test_transcribe_async(mock_openai_client, test_mp3_file):
+    """Test transcription over the async client."""
+    import asyncio
+    from types import SimpleNamespace
+    from unittest.mock import AsyncMock, MagicMock
+    
+    async_client = MagicMock()
+    async_client.audio.transcriptions.create = AsyncMock(return_value=SimpleNamespace(
+        text="Async transcript",
+        segments=[SimpleNamespace(start=65.0, end=70.0, text="Async transcript")]
+    ))
+    transcriber = Transcriber(mock_openai_client, async_client=async_client)
+    
+    raw_transcript, formatted_transcript = asyncio.run(transcriber.transcribe_async(test_mp3_file))
+    
+    assert raw_transcript == "Async transcript"
+    assert formatted_transcript == "[01:05] Async transcript"
+    file_arg = async_client.audio.transcriptions.create.call_args.kwargs['file']
+    assert file_arg == (test_mp3_file.name, b"mock mp3 content")
+
+def test_transcribe_with_offset_map(mock_openai_client, test_mp3_file):
+    """Test that timestamps of trimmed audio are mapped back to the original."""
+    from types import SimpleNamespace
+    from src.voice_memo_analyzer.utils.vad import OffsetMap
+    
+    mock_openai_client.audio.transcriptions.create = lambda **kwargs: SimpleNamespace(
+        text="First Second",
+        segments=[
+            SimpleNamespace(start=0.0, end=2.0, text="First"),
+            SimpleNamespace(start=3.0, end=4.0, text="Second")
+        ]
+    )
+    transcriber = Transcriber(mock_openai_client)
+    offset_map = OffsetMap([(60.0, 63.0), (300.0, 310.0)])
+    
+    _, formatted_transcript = transcriber.transcribe(test_mp3_file, offset_map=offset_map)
+    
+    assert formatted_transcript.splitlines() == ["[01:00] First", "[05:00] Second"]
+
+def test_transcribe_resumes_from_checkpointed_chunks(mock_openai_client, test_mp3_file, monkeypatch):
+    """Test that a failed chunked run keeps finished chunks and a rerun uploads only the rest."""
+    from types import SimpleNamespace
+    from src.voice_memo_analyzer.transcription import transcriber as transcriber_module
+    from src.voice_memo_analyzer.utils import cache
+
+    def mock_split(audio_path, output_dir, chunk_seconds):
+        chunks = []
+        for index, offset in enumerate([0.0, 598.5]):
+            chunk_path = output_dir / f"chunk{index}.mp3"
+            chunk_path.write_bytes(b"chunk")
+            chunks.append((chunk_path, offset))
+        return chunks
+    monkeypatch.setattr(transcriber_module, 'get_audio_duration', lambda path: 1200.0)
+    monkeypatch.setattr(transcriber_module, 'split_audio_at_silence', mock_split)
+    uploads = []
+    fail = {'chunk1.mp3'}
+
+    def mock_create(file=None, **kwargs):
+        name = Path(file.name).name
+        uploads.append(name)
+        if name in fail:
+            raise Exception("Connection reset")
+        return SimpleNamespace(
+            text=f"Text of {name}",
+            segments=[SimpleNamespace(start=5.0, end=9.0, text=f"Text of {name}")],
+            words=[SimpleNamespace(start=5.0, end=6.0, word="Text")]
+        )
+    mock_openai_client.audio.transcriptions.create = mock_create
+    transcriber = Transcriber(mock_openai_client, chunk_seconds=600, checkpoint=True)
+    
+    with pytest.raises(Exception, match="Connection reset"):
+        transcriber.transcribe(test_mp3_file)
+    [progress] = cache.get_transcription_progress()
+    assert (progress['filename'], progress['done'], progress['chunks']) == ("test_memo.mp3", 1, 2)
+    assert progress['pending'] == [(598.5, 1200.0)]
+    
+    fail.clear()
+    uploads.clear()
+    transcript = transcriber.transcribe_compact(test_mp3_file)
+    
+    assert uploads == ["chunk1.mp3"]
+    assert transcript.format().splitlines() == ["[00:05] Text of chunk0.mp3", "[10:03] Text of chunk1.mp3"]
+    assert transcript.word(0).text == "Text"
+    assert cache.get_transcription_progress() == []
+    assert cache.get_store().keys("chunk") == []
@@ -0,0 +1,88 @@
+"""Tests for the compact array-backed transcript model."""
+
+import pytest
+from types import SimpleNamespace
+from src.voice_memo_analyzer.transcription.model import CompactTranscript
+from src.voice_memo_analyzer.transcription.transcriber import Transcriber
+from src.voice_memo_analyzer.utils.formatting import format_transcript_with_timestamps
+
+RESPONSE = SimpleNamespace(
+    text="Hello there. Ship it Friday.",
+    segments=[
+        {'start': 0.0, 'end': 1.5, 'text': ' Hello there.'},
+        {'start': 62.4, 'end': 64.0, 'text': ' Ship it Friday.'}
+    ],
+    words=[
+        {'start': 0.0, 'end': 0.6, 'word': 'Hello'},
+        {'start': 0.7, 'end': 1.5, 'word': 'there'},
+        {'start': 62.4, 'end': 62.8, 'word': 'Ship'},
+        {'start': 62.8, 'end': 63.0, 'word': 'it'},
+        {'start': 63.1, 'end': 64.0, 'word': 'Friday'}
+    ]
+)
+
+def test_format_matches_segment_formatting():
+    """Test that the compact transcript rebuilds the same formatted output."""
+    transcript = CompactTranscript.from_response(RESPONSE)
+    
+    assert transcript.raw_text == RESPONSE.text
+    assert transcript.format() == format_transcript_with_timestamps(RESPONSE)
+    assert transcript.segment_count == 2
+    assert transcript.word_count == 5
+
+def test_time_lookups():
+    """Test word, range and key-moment lookups."""
+    transcript = CompactTranscript.from_response(RESPONSE)
+    
+    assert transcript.word_at(62.9).text == "it"
+    assert transcript.word_at(30.0) is None
+    assert transcript.text_between(62.0, 63.05) == "Ship it"
+    assert [word.text for word in transcript.words_between(0.5, 0.8)] == ["Hello", "there"]
+    
+    moment = transcript.resolve_timestamp("01:02")
+    assert (moment.start, moment.end, moment.text) == (62.4, 64.0, " Ship it Friday.")
+    assert transcript.resolve_timestamp("00:00").text == " Hello there."
+
+def test_text_between_falls_back_to_segments():
+    """Test range lookups on transcripts without word timings."""
+    transcript = CompactTranscript.from_response(SimpleNamespace(text=RESPONSE.text, segments=RESPONSE.segments))
+    
+    assert transcript.word_count == 0
+    assert transcript.text_between(60.0, 70.0) == "Ship it Friday."
+
+def test_to_response_keeps_only_whole_items_in_range():
+    """Test that a clipped response round-trips and drops items cut by the range."""
+    transcript = CompactTranscript.from_response(RESPONSE)
+    
+    whole = CompactTranscript.from_response(transcript.to_response())
+    clipped = transcript.to_response(60.0, 63.5)
+    
+    assert whole.format() == transcript.format()
+    assert whole.raw_text == RESPONSE.text
+    assert transcript.to_response(62.0, 70.0).text == "Ship it Friday."
+    assert clipped.segments == []
+    assert [word['word'] for word in clipped.words] == ["Ship", "it"]
+
+def test_sidecar_round_trip(tmp_path):
+    """Test saving and loading the binary sidecar."""
+    transcript = CompactTranscript.from_response(RESPONSE)
+    path = tmp_path / "memo.timings"
+    
+    transcript.save(path)
+    loaded = CompactTranscript.load(path)
+    
+    assert loaded.format() == transcript.format()
+    assert loaded.raw_text == transcript.raw_text
+    assert loaded.word(4) == transcript.word(4)
+    
+    path.write_bytes(b"not a transcript" * 4)
+    with pytest.raises(ValueError):
+        CompactTranscript.load(path)
+
+def test_transcriber_keeps_word_timings(mock_openai_client, test_mp3_file):
+    """Test that transcribe_compact keeps the words Whisper returns."""
+    transcript = Transcriber(mock_openai_client).transcribe_compact(test_mp3_file)
+    
+    assert transcript.word_count == 5
+    assert transcript.word_at(3.5).text == "test"
+    assert transcript.format() == "[00:00] This is a test transcript"
@@ -0,0 +1,80 @@
+"""Tests for voice-activity trimming."""
+
+import numpy as np
+import pytest
+from src.voice_memo_analyzer.utils import vad
+from src.voice_memo_analyzer.utils.vad import OffsetMap, detect_speech, trim_to_speech
+
+def make_recording(layout, sample_rate=16000):
+    """Build int16 audio from (seconds, is_speech) pairs: tones over faint noise."""
+    rng = np.random.default_rng(0)
+    parts = []
+    for seconds, is_speech in layout:
+        count = int(seconds * sample_rate)
+        noise = rng.normal(0, 30, count)
+        if is_speech:
+            t = np.arange(count) / sample_rate
+            noise += 8000 * np.sin(2 * np.pi * 220 * t)
+        parts.append(noise)
+    return np.concatenate(parts).astype(np.int16)
+
+def test_detect_speech_finds_regions():
+    """Test that loud regions are found and long silences are skipped."""
+    samples = make_recording([(5, False), (3, True), (10, False), (2, True), (4, False)])
+    
+    regions = detect_speech(samples)
+    
+    assert len(regions) == 2
+    assert regions[0][0] == pytest.approx(5, abs=0.3)
+    assert regions[0][1] == pytest.approx(8, abs=0.3)
+    assert regions[1][0] == pytest.approx(18, abs=0.3)
+    assert regions[1][1] == pytest.approx(20, abs=0.3)
+
+def test_detect_speech_bridges_short_pauses():
+    """Test that pauses shorter than min_silence don't split a region."""
+    samples = make_recording([(2, False), (2, True), (0.3, False), (2, True), (2, False)])
+    
+    assert len(detect_speech(samples)) == 1
+
+def test_detect_speech_is_the_same_in_blocks(monkeypatch):
+    """Test that measuring frames a few at a time finds the same regions as all at once."""
+    samples = make_recording([(5, False), (3, True), (10, False), (2, True), (4, False)])
+    whole = detect_speech(samples)
+    monkeypatch.setattr(vad, 'BLOCK_FRAMES', 7)
+    
+    assert detect_speech(samples) == whole
+
+def test_offset_map_to_original():
+    """Test mapping trimmed times back to the original recording."""
+    offset_map = OffsetMap([(5.0, 8.0), (18.0, 20.0)])
+    
+    assert offset_map.to_original(0.0) == 5.0
+    assert offset_map.to_original(2.5) == 7.5
+    assert offset_map.to_original(3.0) == 18.0
+    assert offset_map.to_original(4.5) == 19.5
+
+def test_trim_to_speech(tmp_path, monkeypatch):
+    """Test that only speech is encoded and an offset map is returned."""
+    samples = make_recording([(10, False), (3, True), (10, False)])
+    monkeypatch.setattr(vad, 'decode_to_pcm', lambda path, rate: samples.tobytes())
+    encoded = {}
+    def mock_encode(pcm, output_path, rate):
+        encoded['seconds'] = len(pcm) / 2 / rate
+        return output_path
+    monkeypatch.setattr(vad, 'encode_pcm_to_mp3', mock_encode)
+    
+    upload_path, offset_map = trim_to_speech(tmp_path / "memo.mp3", tmp_path)
+    
+    assert upload_path == tmp_path / "memo_speech.mp3"
+    assert encoded['seconds'] == pytest.approx(3.4, abs=0.3)
+    assert offset_map.to_original(0.0) == pytest.approx(9.8, abs=0.3)
+
+def test_trim_to_speech_skips_continuous_speech(tmp_path, monkeypatch):
+    """Test that recordings with almost no silence are uploaded unchanged."""
+    samples = make_recording([(5, True)])
+    monkeypatch.setattr(vad, 'decode_to_pcm', lambda path, rate: samples.tobytes())
+    
+    upload_path, offset_map = trim_to_speech(tmp_path / "memo.mp3", tmp_path)
+    
+    assert upload_path == tmp_path / "memo.mp3"
+    assert offset_map is None